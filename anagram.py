@@ -0,0 +1,73 @@
+from wordbank import bank_cache, word_key
+
+
+def signature(word):
+    return ''.join(sorted(word_key(word)))
+
+
+def is_degenerate(word):
+    # Words made of a single repeated letter have no scramble that differs from them
+    return len(set(word_key(word))) < 2
+
+
+class AnagramIndex:
+    def __init__(self, bank):
+        self.bank = bank
+        self.groups = {}
+        self.degenerate = set()
+        self._dirty = True
+        bank.listeners.append(self.on_bank_change)
+
+    def _rebuild(self):
+        self.groups = {}
+        self.degenerate = set()
+        for entry in self.bank.entries:
+            self._add(entry['word'])
+        self._dirty = False
+
+    def _ensure(self):
+        if self._dirty:
+            self._rebuild()
+
+    def _add(self, word):
+        key = word_key(word)
+        self.groups.setdefault(signature(key), set()).add(key)
+        if is_degenerate(key):
+            self.degenerate.add(key)
+
+    def _remove(self, word):
+        key = word_key(word)
+        group = self.groups.get(signature(key))
+        if group is not None:
+            group.discard(key)
+            if not group:
+                del self.groups[signature(key)]
+        self.degenerate.discard(key)
+
+    def on_bank_change(self, kind, old, new):
+        if kind == "reload":
+            self._dirty = True
+            return
+        if self._dirty:
+            return
+        if old is not None:
+            self._remove(old['word'])
+        if new is not None:
+            self._add(new['word'])
+
+    def anagrams(self, word):
+        self._ensure()
+        return self.groups.get(signature(word), set())
+
+    def is_scrambleable(self, word):
+        self._ensure()
+        return word_key(word) not in self.degenerate
+
+    def is_other_anagram(self, guess, target):
+        # A bank word spelled with the target's letters that isn't the target itself
+        self._ensure()
+        guess = word_key(guess)
+        return guess != word_key(target) and guess in self.groups.get(signature(target), ())
+
+
+get_anagram_index = bank_cache(AnagramIndex)
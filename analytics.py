@@ -0,0 +1,300 @@
+import argparse
+import json
+import os
+import sys
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from history import HISTORY_FILE
+from wordbank import DIFFICULTIES, normalize_difficulty, write_atomic
+
+COLUMNS_SUFFIX = ".columns"
+VERSION = 1
+# One raw little-endian array per field, appended to as the log grows
+COLUMNS = {
+    "word": "<i4",
+    # Seconds since the epoch, read as written (local time); NaT when missing
+    "time": "<i8",
+    "correct": "u1",
+    # Index into DIFFICULTIES, -1 when the record has none
+    "difficulty": "i1",
+    # -1 when the record has no player
+    "player": "<i4",
+    # Seconds into the round, NaN when not recorded
+    "elapsed": "<f4",
+}
+MISSING_TIME = -(1 << 63)
+# Bytes of log parsed at a time and rows aggregated at a time; both bound memory
+INGEST_BYTES = 8 << 20
+SCAN_ROWS = 4_000_000
+GROUPS = ("word", "difficulty", "hour", "player")
+SORTS = ("guesses", "misses", "miss_rate", "solve_time")
+
+
+def _parse(lines):
+    # One json.loads call for the whole chunk; a bad line sends it line by line
+    try:
+        records = json.loads(b"[" + b",".join(lines) + b"]")
+    except json.JSONDecodeError:
+        records = []
+        for line in lines:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return [record for record in records if isinstance(record, dict) and "word" in record and "result" in record]
+
+
+def _times(values):
+    try:
+        return np.array(values, dtype="datetime64[s]").astype("<i8")
+    except (ValueError, TypeError):
+        times = np.empty(len(values), dtype="<i8")
+        for i, value in enumerate(values):
+            try:
+                times[i] = np.datetime64(value, "s").astype("<i8")
+            except (ValueError, TypeError):
+                times[i] = MISSING_TIME
+        return times
+
+
+def _elapsed(values):
+    try:
+        return np.array(values, dtype="<f4")
+    except (ValueError, TypeError):
+        return np.array([value if isinstance(value, (int, float)) else None for value in values], dtype="<f4")
+
+
+class HistoryColumns:
+    # The guess log compiled to columns under <log>.columns/. Each run only parses
+    # the lines appended since the last one; a log that shrank is compiled again.
+
+    def __init__(self, path=HISTORY_FILE):
+        self.path = path
+        self.dir = path + COLUMNS_SUFFIX
+        self.meta_path = os.path.join(self.dir, "meta.json")
+        self.offset = 0
+        self.rows = 0
+        self.words = []
+        self.players = []
+        self._word_ids = {}
+        self._player_ids = {}
+        self._difficulty_codes = {}
+
+    def _file(self, name):
+        return os.path.join(self.dir, name + ".bin")
+
+    def _load(self):
+        try:
+            with open(self.meta_path, 'r') as f:
+                meta = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return False
+        if meta.get("version") != VERSION or meta["offset"] > os.path.getsize(self.path):
+            return False
+        try:
+            # Rows appended by a run that stopped before saving meta.json are dropped
+            for name, dtype in COLUMNS.items():
+                with open(self._file(name), 'r+b') as f:
+                    f.truncate(meta["rows"] * np.dtype(dtype).itemsize)
+        except OSError:
+            return False
+        self.offset = meta["offset"]
+        self.rows = meta["rows"]
+        self.words = meta["words"]
+        self.players = meta["players"]
+        return True
+
+    def _reset(self):
+        self.offset = 0
+        self.rows = 0
+        self.words = []
+        self.players = []
+        for name in COLUMNS:
+            open(self._file(name), 'wb').close()
+
+    def _save(self):
+        meta = {"version": VERSION, "offset": self.offset, "rows": self.rows,
+                "words": self.words, "players": self.players}
+        write_atomic(self.meta_path, lambda f: json.dump(meta, f))
+
+    def _ids(self, values, names, ids):
+        out = np.empty(len(values), dtype="<i4")
+        for i, value in enumerate(values):
+            if value is None:
+                out[i] = -1
+                continue
+            index = ids.get(value)
+            if index is None:
+                index = ids[value] = len(names)
+                names.append(value)
+            out[i] = index
+        return out
+
+    def _difficulties(self, values):
+        codes = self._difficulty_codes
+        out = np.empty(len(values), dtype="i1")
+        for i, value in enumerate(values):
+            code = codes.get(value)
+            if code is None:
+                tier = normalize_difficulty(value) if isinstance(value, str) else None
+                code = codes[value] = DIFFICULTIES.index(tier) if tier in DIFFICULTIES else -1
+            out[i] = code
+        return out
+
+    def _columns(self, records):
+        return {
+            "word": self._ids([str(record["word"]) for record in records], self.words, self._word_ids),
+            "time": _times([record.get("time") for record in records]),
+            "correct": np.array([record["result"] == "Correct" for record in records], dtype="u1"),
+            "difficulty": self._difficulties([record.get("difficulty") for record in records]),
+            "player": self._ids([record.get("player") for record in records], self.players, self._player_ids),
+            "elapsed": _elapsed([record.get("elapsed") for record in records]),
+        }
+
+    def update(self, rebuild=False):
+        # Returns how many rows were added
+        os.makedirs(self.dir, exist_ok=True)
+        if rebuild or not self._load():
+            self._reset()
+        self._word_ids = {word: i for i, word in enumerate(self.words)}
+        self._player_ids = {player: i for i, player in enumerate(self.players)}
+        added = 0
+        files = {name: open(self._file(name), 'ab') for name in COLUMNS}
+        try:
+            with open(self.path, 'rb') as log:
+                log.seek(self.offset)
+                while True:
+                    lines = log.readlines(INGEST_BYTES)
+                    if lines and not lines[-1].endswith(b"\n"):
+                        # A line still being written; it is picked up next time
+                        lines.pop()
+                    if not lines:
+                        break
+                    self.offset += sum(map(len, lines))
+                    records = _parse(lines)
+                    for name, column in self._columns(records).items():
+                        column.tofile(files[name])
+                    added += len(records)
+        finally:
+            for f in files.values():
+                f.close()
+        self.rows += added
+        self._save()
+        return added
+
+    def column(self, name):
+        if not self.rows:
+            return np.empty(0, dtype=COLUMNS[name])
+        return np.memmap(self._file(name), dtype=COLUMNS[name], mode='r', shape=(self.rows,))
+
+    def labels(self, by):
+        if by == "word":
+            return list(self.words)
+        if by == "player":
+            return self.players + ["-"]
+        if by == "difficulty":
+            return [tier.capitalize() for tier in DIFFICULTIES] + ["-"]
+        return [f"{hour:02d}:00" for hour in range(24)] + ["-"]
+
+    def _keys(self, by, columns, rows):
+        # Group number of every row in the slice; the last group collects missing values
+        if by == "word":
+            return columns["word"][rows].astype(np.intp)
+        if by == "player":
+            keys = columns["player"][rows].astype(np.intp)
+            keys[keys < 0] = len(self.players)
+            return keys
+        if by == "difficulty":
+            keys = columns["difficulty"][rows].astype(np.intp)
+            keys[keys < 0] = len(DIFFICULTIES)
+            return keys
+        times = columns["time"][rows]
+        keys = (times // 3600 % 24).astype(np.intp)
+        keys[times == MISSING_TIME] = 24
+        return keys
+
+    def summarize(self, by, since=None):
+        # Per group: guesses, correct guesses, and the sum and count of solve times
+        # (elapsed on correct guesses), accumulated over slices of the columns
+        groups = len(self.labels(by))
+        guesses = np.zeros(groups, dtype=np.int64)
+        wins = np.zeros(groups, dtype=np.int64)
+        solve_total = np.zeros(groups)
+        solves = np.zeros(groups, dtype=np.int64)
+        columns = {name: self.column(name) for name in ("word", "time", "correct", "difficulty", "player", "elapsed")}
+        for start in range(0, self.rows, SCAN_ROWS):
+            rows = slice(start, start + SCAN_ROWS)
+            keys = self._keys(by, columns, rows)
+            correct = columns["correct"][rows].astype(bool)
+            elapsed = columns["elapsed"][rows]
+            if since is not None:
+                keep = columns["time"][rows] >= since
+                keys, correct, elapsed = keys[keep], correct[keep], elapsed[keep]
+            guesses += np.bincount(keys, minlength=groups)
+            wins += np.bincount(keys[correct], minlength=groups)
+            timed = correct & ~np.isnan(elapsed)
+            solve_total += np.bincount(keys[timed], weights=elapsed[timed], minlength=groups)
+            solves += np.bincount(keys[timed], minlength=groups)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return {
+                "guesses": guesses,
+                "misses": guesses - wins,
+                "miss_rate": (guesses - wins) / guesses,
+                "solve_time": solve_total / solves,
+            }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize the guess history by word, difficulty, hour or player")
+    parser.add_argument("--history", default=HISTORY_FILE)
+    parser.add_argument("--by", choices=GROUPS, default="word")
+    parser.add_argument("--sort", choices=SORTS, default="misses")
+    parser.add_argument("--since", help="only guesses at or after this date, e.g. 2025-05-01")
+    parser.add_argument("--min-guesses", type=int, default=1, help="hide groups with fewer guesses")
+    parser.add_argument("-k", type=int, default=20, help="rows to show (0 for all)")
+    parser.add_argument("--rebuild", action="store_true", help="compile the columns from scratch")
+    args = parser.parse_args(argv)
+
+    if np is None:
+        sys.exit("analytics.py needs NumPy: pip install numpy")
+    if not os.path.exists(args.history):
+        print("No history yet.")
+        return
+
+    columns = HistoryColumns(args.history)
+    added = columns.update(args.rebuild)
+    since = None
+    if args.since:
+        try:
+            since = np.datetime64(args.since, "s").astype("<i8")
+        except ValueError:
+            sys.exit(f"Can't read --since date: {args.since}")
+    summary = columns.summarize(args.by, since)
+    labels = columns.labels(args.by)
+
+    shown = np.flatnonzero(summary["guesses"] >= max(args.min_guesses, 1))
+    if args.by in ("hour", "difficulty"):
+        order = shown
+    else:
+        # NaN (no timed solves) sorts last
+        values = np.nan_to_num(summary[args.sort][shown].astype(float), nan=-np.inf)
+        order = shown[np.argsort(-values, kind="stable")]
+    if args.k:
+        order = order[:args.k]
+
+    print(f"{columns.rows} guesses ({added} new), {len(shown)} {args.by} groups")
+    width = max([len(args.by)] + [len(labels[i]) for i in order])
+    print(f"{args.by:<{width}}  {'guesses':>9}  {'misses':>9}  {'miss rate':>9}  {'solve s':>8}")
+    for i in order:
+        solve = summary["solve_time"][i]
+        solve = f"{solve:8.1f}" if not np.isnan(solve) else f"{'-':>8}"
+        print(f"{labels[i]:<{width}}  {summary['guesses'][i]:>9}  {summary['misses'][i]:>9}  "
+              f"{summary['miss_rate'][i]:>9.1%}  {solve}")
+
+
+if __name__ == "__main__":
+    main()
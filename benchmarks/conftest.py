@@ -0,0 +1,99 @@
+import json
+import os
+import random
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import compiledbank
+from wordbank import DIFFICULTIES, compiled_path
+
+DEFAULT_SIZES = "1000,10000,100000"
+SEED = 1234
+LETTERS = "etaoinshrdlcumwfgypbvkjxqz"
+# Roughly English letter frequencies, so anagram groups and guess outcomes look like a real bank
+WEIGHTS = [12.7, 9.1, 8.2, 7.5, 7.0, 6.7, 6.3, 6.1, 6.0, 4.3, 4.0, 2.8, 2.8, 2.4, 2.4, 2.2,
+           2.0, 2.0, 1.9, 1.5, 1.0, 0.8, 0.2, 0.2, 0.1, 0.1]
+# Share of words that can't be scrambled ("aaaa"), which the scramble game has to skip
+DEGENERATE_EVERY = 200
+
+
+def pytest_addoption(parser):
+    parser.addoption("--bank-sizes", default=os.environ.get("WORDGUESS_BENCH_SIZES", DEFAULT_SIZES),
+                     help="comma separated synthetic bank sizes (default: %(default)s)")
+
+
+def pytest_generate_tests(metafunc):
+    if "bank_size" in metafunc.fixturenames:
+        sizes = [int(size) for size in metafunc.config.getoption("bank_sizes").split(",") if size]
+        metafunc.parametrize("bank_size", sizes, ids=[f"{size:_}" for size in sizes], scope="session")
+
+
+def synthetic_entries(count, seed=SEED):
+    rng = random.Random(seed)
+    seen = set()
+    entries = []
+    while len(entries) < count:
+        word = None
+        if len(entries) % DEGENERATE_EVERY == DEGENERATE_EVERY - 1:
+            word = rng.choice(LETTERS) * rng.randint(2, 40)
+        if word is None or word in seen:
+            # There are only so many single-letter words; big banks run out of them
+            word = "".join(rng.choices(LETTERS, WEIGHTS, k=rng.randint(3, 12)))
+        if word in seen:
+            continue
+        seen.add(word)
+        entries.append({"word": word, "hint": f"Synthetic hint number {len(entries)}",
+                        "difficulty": DIFFICULTIES[len(entries) % len(DIFFICULTIES)].capitalize()})
+    return entries
+
+
+def synthetic_history(entries, count, seed=SEED):
+    rng = random.Random(seed)
+    for i in range(count):
+        entry = rng.choice(entries)
+        correct = rng.random() < 0.6
+        yield {"word": entry["word"], "guess": entry["word"] if correct else "nope",
+               "result": "Correct" if correct else "Wrong", "time": "2025-01-01 12:00:00",
+               "difficulty": entry["difficulty"]}
+
+
+@pytest.fixture(scope="session")
+def bank_entries(bank_size):
+    return synthetic_entries(bank_size)
+
+
+@pytest.fixture(scope="session")
+def bank_dir(tmp_path_factory, bank_size):
+    return tmp_path_factory.mktemp(f"bank{bank_size}")
+
+
+@pytest.fixture(scope="session")
+def bank_file(bank_dir, bank_entries):
+    path = str(bank_dir / "words.json")
+    with open(path, 'w') as f:
+        json.dump(bank_entries, f, indent=4)
+    return path
+
+
+@pytest.fixture(scope="session")
+def compiled_bank_file(tmp_path_factory, bank_size, bank_entries):
+    # A separate directory: a compiled sibling would otherwise shadow the JSON snapshot
+    path = str(tmp_path_factory.mktemp(f"compiled{bank_size}") / "words.json")
+    with open(compiled_path(path), 'wb') as f:
+        compiledbank.dump(bank_entries, f)
+    return path
+
+
+@pytest.fixture(scope="session")
+def history_file(bank_dir, bank_entries, bank_size):
+    # As many history records as bank entries
+    path = str(bank_dir / "history.jsonl")
+    with open(path, 'w') as f:
+        for record in synthetic_history(bank_entries, bank_size):
+            f.write(json.dumps(record) + "\n")
+    return path
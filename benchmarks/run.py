@@ -0,0 +1,40 @@
+import argparse
+import os
+import sys
+
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+# Saved runs are per machine, so they stay out of version control
+STORAGE = os.path.join(HERE, ".benchmarks")
+BASELINE = "baseline"
+# A benchmark fails the comparison when its median is this much slower than the baseline
+THRESHOLD = 10.0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the benchmark suite against a saved baseline")
+    parser.add_argument("--bank-sizes", default=None, help="comma separated synthetic bank sizes, e.g. 1000,1000000")
+    parser.add_argument("-k", dest="keyword", default=None, help="only run benchmarks matching this expression")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("save", help=f"run and save the results as the new '{BASELINE}'")
+    compare_cmd = commands.add_parser("compare", help="run and fail on any regression against the latest baseline")
+    compare_cmd.add_argument("--threshold", type=float, default=THRESHOLD,
+                             help="allowed median slowdown in percent (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    options = [HERE, "-q", f"--benchmark-storage=file://{STORAGE}", "--benchmark-sort=name",
+               "--benchmark-columns=min,median,mean,stddev,rounds"]
+    if args.bank_sizes:
+        options.append(f"--bank-sizes={args.bank_sizes}")
+    if args.keyword:
+        options += ["-k", args.keyword]
+    if args.command == "save":
+        options.append(f"--benchmark-save={BASELINE}")
+    else:
+        options += [f"--benchmark-compare=*{BASELINE}", f"--benchmark-compare-fail=median:{args.threshold:g}%"]
+    return pytest.main(options)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
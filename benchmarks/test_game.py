@@ -0,0 +1,123 @@
+import random
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from anagram import AnagramIndex
+from engine import HangmanState, PLAYING, WON, ScrambleRound, scramble
+from nearby import NearbyIndex
+from scheduler import WordScheduler
+from wordbank import WordBank
+from conftest import SEED, synthetic_entries
+
+ENGLISH_ORDER = "etaoinshrdlcumwfgypbvkjxqz"
+SAMPLE = synthetic_entries(1000)
+
+
+@pytest.fixture(scope="session")
+def loaded_bank(bank_file):
+    return WordBank(bank_file).refresh()
+
+
+@pytest.fixture
+def get_random_word(loaded_bank):
+    # What the scramble app does for every new round: refresh, then draw a word it can scramble
+    scheduler = WordScheduler(loaded_bank, seed=SEED)
+    anagrams = AnagramIndex(loaded_bank)
+    # Build the index now rather than inside the first timed draw
+    anagrams.is_scrambleable("warm")
+
+    def draw():
+        loaded_bank.refresh()
+        return scheduler.draw(accept=lambda entry: anagrams.is_scrambleable(entry['word']))
+    draw.scheduler = scheduler
+    yield draw
+    loaded_bank.listeners.remove(scheduler.on_bank_change)
+    loaded_bank.listeners.remove(anagrams.on_bank_change)
+
+
+def test_random_word(benchmark, get_random_word):
+    assert benchmark(get_random_word) is not None
+
+
+def test_random_word_late_cycle(benchmark, get_random_word):
+    # Every word has been handed out, so this draw has to start the next cycle
+    bag = get_random_word.scheduler._bag(None)
+
+    def exhaust():
+        bag.bag.clear()
+        bag.pos.clear()
+
+    entry = benchmark.pedantic(get_random_word, setup=exhaust, rounds=20)
+    assert entry is not None
+
+
+def test_player_word(benchmark, loaded_bank):
+    # A round for a named player: draw from their review queue, then record a miss
+    scheduler = WordScheduler(loaded_bank, seed=SEED)
+    scheduler.draw(player="bench")
+
+    def play():
+        entry = scheduler.draw(player="bench")
+        scheduler.record(entry["word"], False, "bench")
+        return entry
+
+    assert benchmark(play) is not None
+    loaded_bank.listeners.remove(scheduler.on_bank_change)
+
+
+def test_scramble(benchmark):
+    rng = random.Random(SEED)
+    words = [entry["word"] for entry in SAMPLE]
+    benchmark(lambda: [scramble(word, rng) for word in words])
+
+
+def test_scramble_guess(benchmark, loaded_bank):
+    # Checking a wrong guess costs the most: it is also looked up as another anagram
+    anagrams = AnagramIndex(loaded_bank)
+    rounds = [ScrambleRound(entry, random.Random(SEED)) for entry in loaded_bank.entries[:1000]]
+
+    def guess_all():
+        other = 0
+        for round in rounds:
+            if not round.check(round.scrambled):
+                other += anagrams.is_other_anagram(round.scrambled, round.word)
+        return other
+
+    benchmark(guess_all)
+    loaded_bank.listeners.remove(anagrams.on_bank_change)
+
+
+def test_close_guess(benchmark, loaded_bank):
+    # A wrong guess looked up against the whole bank: bank words with one letter changed
+    nearby = NearbyIndex(loaded_bank)
+    nearby.build()
+    rng = random.Random(SEED)
+    guesses = []
+    for entry in loaded_bank.entries[:1000]:
+        word = entry["word"]
+        i = rng.randrange(len(word))
+        guesses.append(word[:i] + rng.choice(ENGLISH_ORDER) + word[i + 1:])
+
+    found = benchmark(lambda: sum(bool(nearby.near(guess, limit=1)) for guess in guesses))
+    assert found == len(guesses)
+    loaded_bank.listeners.remove(nearby.on_bank_change)
+
+
+def test_hangman_guess(benchmark):
+    # Whole games, one letter at a time in English frequency order
+    words = [entry["word"] for entry in SAMPLE]
+
+    def play_all():
+        won = 0
+        for word in words:
+            game = HangmanState(word)
+            for letter in ENGLISH_ORDER:
+                game.guess(letter)
+                if game.status != PLAYING:
+                    break
+            won += game.status == WON
+        return won
+
+    assert benchmark(play_all) > 0
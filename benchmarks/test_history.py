@@ -0,0 +1,42 @@
+import itertools
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from history import HistoryLog
+from iowriter import IOWriter
+
+
+def test_history_load(benchmark, history_file, bank_size):
+    # No stats checkpoint, so the whole log is scanned
+    log = benchmark(HistoryLog, history_file, legacy_path=None)
+    assert sum(total for _, total in log.word_stats.values()) == bank_size
+
+
+def test_history_append(benchmark, tmp_path):
+    log = HistoryLog(str(tmp_path / "history.jsonl"), legacy_path=None)
+    guesses = itertools.count()
+    benchmark(lambda: log.append("lantern", f"guess{next(guesses)}", False, "Medium"))
+    log.close()
+
+
+def test_history_append_queued(benchmark, tmp_path):
+    # What a front end pays per guess; the write itself happens on the writer thread
+    writer = IOWriter()
+    log = HistoryLog(str(tmp_path / "history.jsonl"), legacy_path=None, writer=writer)
+    guesses = itertools.count()
+    benchmark(lambda: log.append("lantern", f"guess{next(guesses)}", False, "Medium"))
+    log.close()
+    writer.close()
+    assert writer.errors == 0
+
+
+def test_history_summary(benchmark, history_file, bank_size):
+    # Columns compiled by an earlier run; what a summary by word costs from then on
+    pytest.importorskip("numpy")
+    from analytics import HistoryColumns
+    columns = HistoryColumns(history_file)
+    columns.update(rebuild=True)
+    summary = benchmark(columns.summarize, "word")
+    assert summary["guesses"].sum() == bank_size
@@ -0,0 +1,56 @@
+import json
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+import compiledbank
+from wordbank import WordBank, compiled_path
+from conftest import synthetic_entries
+
+PROBES = 1000
+
+
+def _load(path):
+    return WordBank(path).refresh()
+
+
+def test_load_json(benchmark, bank_file, bank_size):
+    bank = benchmark(_load, bank_file)
+    assert len(bank) == bank_size
+
+
+def test_load_compiled(benchmark, compiled_bank_file, bank_size):
+    bank = benchmark(_load, compiled_bank_file)
+    assert bank.snapshot_path == bank.compiled_path
+    assert len(bank) == bank_size
+
+
+def test_save_json(benchmark, tmp_path, bank_entries):
+    path = str(tmp_path / "words.json")
+    with open(path, 'w') as f:
+        json.dump(bank_entries, f)
+    bank = _load(path)
+    benchmark(bank.save)
+    bank.close()
+    assert len(_load(path)) == len(bank_entries)
+
+
+def test_save_compiled(benchmark, tmp_path, bank_entries):
+    path = str(tmp_path / "words.json")
+    with open(compiled_path(path), 'wb') as f:
+        compiledbank.dump(bank_entries, f)
+    bank = _load(path)
+    benchmark(bank.save)
+    bank.close()
+    assert len(_load(path)) == len(bank_entries)
+
+
+def test_duplicate_check(benchmark, bank_file, bank_entries):
+    # Half the probes are in the bank, half aren't (different case, as typed by a player)
+    bank = _load(bank_file)
+    present = [entry["word"].upper() for entry in bank_entries[:PROBES // 2]]
+    absent = [entry["word"] for entry in synthetic_entries(PROBES // 2, seed=99) if entry["word"] not in bank]
+    probes = present + absent
+    found = benchmark(lambda: sum(word in bank for word in probes))
+    assert found == len(present)
@@ -0,0 +1,139 @@
+import argparse
+import sys
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from history import HistoryLog, HISTORY_FILE
+from wordbank import DIFFICULTIES, JSON_FILE, ConflictError, get_bank, normalize_difficulty, word_key
+
+# Weight of each standardized feature in the predicted difficulty score
+FEATURE_WEIGHTS = {
+    "length": 0.35,
+    "distinct": 0.25,
+    "rarity": 0.25,
+    "ambiguity": 0.15,
+}
+
+# Observed results outweigh the features once a word has had this many guesses. The
+# history counts guesses, not games: every wrong guess before a win counts as a loss
+PRIOR_GUESSES = 10
+
+
+def _standardize(values):
+    std = values.std()
+    return (values - values.mean()) / std if std > 0 else np.zeros_like(values)
+
+
+def word_features(words):
+    # One pass over the whole bank: every word is flattened into a single letter
+    # buffer and all per-word figures come from bincounts over that buffer
+    words = [word.lower() for word in words]
+    n = len(words)
+    lengths = np.fromiter(map(len, words), dtype=np.int64, count=n)
+    buf = np.frombuffer("".join(words).encode("latin-1", "replace"), dtype=np.uint8)
+    owner = np.repeat(np.arange(n), lengths)
+    codes = buf.astype(np.int64) - ord("a")
+    valid = (codes >= 0) & (codes < 26)
+    owner, codes = owner[valid], codes[valid]
+
+    counts = np.bincount(owner * 26 + codes, minlength=n * 26).reshape(n, 26)
+    letters = counts.sum(axis=1)
+    distinct = (counts > 0).sum(axis=1)
+
+    frequency = counts.sum(axis=0) / max(1, counts.sum())
+    surprise = -np.log(np.where(frequency > 0, frequency, 1.0))
+    rarity = np.bincount(owner, weights=surprise[codes], minlength=n) / np.maximum(letters, 1)
+
+    # Scramble ambiguity: other bank words built from exactly the same letters,
+    # plus how few distinct orderings the letters allow
+    _, group, group_size = np.unique(counts, axis=0, return_inverse=True, return_counts=True)
+    anagrams = group_size[group.ravel()] - 1
+    log_fact = np.concatenate([[0.0], np.cumsum(np.log(np.arange(1, max(1, lengths.max(initial=0)) + 1)))])
+    orderings = log_fact[letters] - log_fact[counts].sum(axis=1)
+    ambiguity = np.log1p(anagrams) - orderings / np.maximum(orderings.max(initial=0), 1.0)
+
+    return {
+        "length": lengths.astype(np.float64),
+        "distinct": distinct.astype(np.float64),
+        "rarity": rarity,
+        "ambiguity": ambiguity,
+    }
+
+
+def difficulty_scores(words, word_stats=None):
+    features = word_features(words)
+    score = sum(weight * _standardize(features[name]) for name, weight in FEATURE_WEIGHTS.items())
+    if word_stats:
+        guesses = np.zeros(len(words))
+        wins = np.zeros(len(words))
+        for i, word in enumerate(words):
+            stats = word_stats.get(word_key(word))
+            if stats:
+                wins[i], guesses[i] = stats
+        played = guesses > 0
+        if played.any():
+            loss_rate = np.where(played, 1 - wins / np.maximum(guesses, 1), 0.0)
+            observed = np.zeros(len(words))
+            observed[played] = _standardize(loss_rate[played])
+            weight = guesses / (guesses + PRIOR_GUESSES)
+            score = (1 - weight) * score + weight * observed
+    return score
+
+
+def assign_tiers(scores, tiers=DIFFICULTIES):
+    cuts = np.quantile(scores, np.linspace(0, 1, len(tiers) + 1)[1:-1])
+    return np.digitize(scores, cuts)
+
+
+def calibrate(bank, history=None):
+    entries = bank.entries
+    words = [entry['word'] for entry in entries]
+    scores = difficulty_scores(words, history.word_stats if history else None)
+    tiers = assign_tiers(scores)
+    updates = []
+    for index, tier in enumerate(tiers.tolist()):
+        entry = entries[index]
+        difficulty = DIFFICULTIES[tier]
+        if entry.get('difficulty') != difficulty:
+            updates.append((index, dict(entry, difficulty=difficulty)))
+    return updates
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Recompute word difficulty tiers from word features and play history")
+    parser.add_argument("--bank", default=JSON_FILE)
+    parser.add_argument("--history", default=HISTORY_FILE,
+                        help="play history; its win rates are per guess, not per game")
+    parser.add_argument("--write", action="store_true", help="write the new tiers back to the bank")
+    args = parser.parse_args(argv)
+
+    if np is None:
+        sys.exit("calibrate.py needs NumPy: pip install numpy")
+
+    bank = get_bank(args.bank)
+    if not len(bank):
+        print("Word bank is empty.")
+        return
+    # Read only: a legacy history file still counts, but a dry run mustn't migrate it
+    history = HistoryLog(args.history, read_only=True)
+    updates = calibrate(bank, history)
+    moved = sum(1 for index, entry in updates
+                if normalize_difficulty(bank.entries[index].get('difficulty')) != entry['difficulty'])
+    before = {tier: len(bank.words(tier)) for tier in DIFFICULTIES}
+    print(f"{len(bank)} words, {moved} change tier, {len(updates) - moved} only normalized")
+    print("  before: " + ", ".join(f"{tier} {count}" for tier, count in before.items()))
+    if args.write:
+        try:
+            bank.replace_many(updates)
+        except ConflictError as e:
+            sys.exit(f"{e} while calibrating; nothing was written, run it again")
+        bank.close()
+        after = {tier: len(bank.words(tier)) for tier in DIFFICULTIES}
+        print("  after:  " + ", ".join(f"{tier} {count}" for tier, count in after.items()))
+
+
+if __name__ == "__main__":
+    main()
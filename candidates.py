@@ -0,0 +1,129 @@
+from engine import letter_bit
+from wordbank import bank_cache
+
+# Letters are stored as codes 1-26; anything else (digits, hyphens, accented
+# letters) is OTHER, which hangman shows from the start
+CODES = {ord(ch): i for i, ch in enumerate("abcdefghijklmnopqrstuvwxyz", 1)}
+OTHER = 0
+# bytes.translate tables: BIT_TABLES[code] turns a column of codes into b"1"
+# where the code matches and b"0" everywhere else
+BIT_TABLES = [bytes(49 if j == code else 48 for j in range(256)) for code in range(27)]
+
+
+def _column_codes(column):
+    if column.isascii() and column.isalpha():
+        return column.translate(CODES).encode("latin-1")
+    return bytes(CODES.get(ord(ch), OTHER) for ch in column)
+
+
+class LengthGroup:
+    # Bitsets over the words of one length, bit j standing for words[j]
+    __slots__ = ("words", "live", "positions", "letters")
+
+    def __init__(self, words, length):
+        self.words = words
+        self.live = (1 << len(words)) - 1
+        # positions[i][code]: words with that code at position i; letters[code]: anywhere
+        self.positions = []
+        self.letters = [0] * 27
+        # All words have the same length, so position i is every length-th character
+        joined = "".join(words)
+        for i in range(length):
+            column = _column_codes(joined[i::length])
+            row = [0] * 27
+            for code in set(column):
+                # int() reads the most significant digit first, so the column is reversed
+                row[code] = int(column.translate(BIT_TABLES[code])[::-1], 2)
+                if code != OTHER:
+                    self.letters[code] |= row[code]
+            self.positions.append(row)
+
+
+class CandidateIndex:
+    # How many bank words still fit a hangman game. A guess narrows the candidates
+    # with a few ANDs on Python ints; a bank change only drops the group for that
+    # word length, which is rebuilt the next time it is needed.
+
+    def __init__(self, bank):
+        self.bank = bank
+        self.groups = {}
+        bank.listeners.append(self.on_bank_change)
+
+    def on_bank_change(self, kind, old, new):
+        if kind == "reload":
+            self.groups.clear()
+            return
+        for entry in (old, new):
+            if entry is not None:
+                self.groups.pop(len(entry['word']), None)
+
+    def group(self, length):
+        group = self.groups.get(length)
+        if group is None:
+            words = [str(entry['word']).lower() for entry in self.bank.by_length.get(length, ())]
+            group = self.groups[length] = LengthGroup(words, length)
+        return group
+
+    def build(self):
+        # Every word length at once; group() would otherwise build one per length as games reach it
+        for length in list(self.bank.by_length):
+            self.group(length)
+
+    def track(self, word):
+        return Candidates(self, word)
+
+
+class Candidates:
+    # The bank words still possible in one game, narrowed as letters are guessed
+    __slots__ = ("index", "word", "guessed", "group", "mask")
+
+    def __init__(self, index, word):
+        self.index = index
+        self.word = word.lower()
+        self.guessed = []
+        self.group = None
+        self.mask = 0
+
+    def _current(self):
+        return self.group is not None and self.index.groups.get(len(self.word)) is self.group
+
+    def _start(self):
+        # Every non-letter is shown from the start, so candidates have one in the same
+        # places and nowhere else; then the guesses so far are replayed
+        self.group = self.index.group(len(self.word))
+        mask = self.group.live
+        for i, ch in enumerate(self.word):
+            other = self.group.positions[i][OTHER]
+            mask &= ~other if ord(ch) in CODES else other
+        self.mask = mask
+        for letter in self.guessed:
+            self._narrow(letter)
+
+    def _narrow(self, letter):
+        code = CODES[ord(letter)]
+        if letter not in self.word:
+            self.mask &= ~self.group.letters[code]
+            return
+        # Revealed positions must hold the letter, and every other position must not
+        mask = self.mask
+        for i, ch in enumerate(self.word):
+            column = self.group.positions[i][code]
+            mask &= column if ch == letter else ~column
+        self.mask = mask
+
+    def guess(self, letter):
+        letter = letter.lower()
+        if len(letter) == 1 and letter_bit(letter) and letter not in self.guessed:
+            self.guessed.append(letter)
+            if self._current():
+                self._narrow(letter)
+        return self.count
+
+    @property
+    def count(self):
+        if not self._current():
+            self._start()
+        return self.mask.bit_count()
+
+
+get_candidate_index = bank_cache(CandidateIndex)
@@ -0,0 +1,173 @@
+import mmap
+import struct
+
+# Compiled word bank layout (little endian):
+#   header   magic, version, number of difficulty names, number of entries
+#   names    the distinct difficulty strings, each a u16 length + UTF-8 bytes
+#   records  one fixed-width record per entry: string table offset, word and
+#            hint byte lengths, difficulty name index (NO_DIFFICULTY if absent)
+#   strings  every word and then its hint, each UTF-8 encoded and NUL terminated
+#
+# WordBank edits and indexes its entries, so it copies a compiled snapshot into
+# dicts just as it does words.json (see load). What it gains is a file half the
+# size and one decode and split of the string table in place of a JSON parse.
+# Only readers that want a column or a few entries, such as the simulator's
+# workers, use CompiledBank directly and share the mapped pages.
+MAGIC = b"WGBK"
+VERSION = 1
+COMPILED_SUFFIX = ".wgb"
+HEADER = struct.Struct("<4sHHQ")
+NAME_LENGTH = struct.Struct("<H")
+RECORD = struct.Struct("<QIIB3x")
+CODE_OFFSET = 16
+NO_DIFFICULTY = 0xFF
+SEPARATOR = b"\0"
+
+
+class CompiledFormatError(ValueError):
+    pass
+
+
+def dump(entries, f):
+    # Writes to a binary file object; only word, hint and difficulty are kept
+    names = {}
+    records = bytearray()
+    strings = []
+    offset = 0
+    for entry in entries:
+        word = str(entry['word']).encode('utf-8')
+        hint = str(entry.get('hint', "")).encode('utf-8')
+        if SEPARATOR in word or SEPARATOR in hint:
+            raise CompiledFormatError(f"NUL character in entry {entry['word']!r}")
+        difficulty = entry.get('difficulty')
+        if difficulty is None:
+            code = NO_DIFFICULTY
+        else:
+            code = names.setdefault(str(difficulty), len(names))
+            if code >= NO_DIFFICULTY:
+                raise CompiledFormatError("too many distinct difficulty names")
+        records += RECORD.pack(offset, len(word), len(hint), code)
+        strings.append(word)
+        strings.append(hint)
+        offset += len(word) + len(hint) + 2
+    f.write(HEADER.pack(MAGIC, VERSION, len(names), len(records) // RECORD.size))
+    for name in names:
+        data = name.encode('utf-8')
+        f.write(NAME_LENGTH.pack(len(data)) + data)
+    f.write(records)
+    if strings:
+        f.write(SEPARATOR.join(strings) + SEPARATOR)
+
+
+class CompiledBank:
+    # Read-only, memory-mapped view of a compiled bank. Nothing is decoded until
+    # it is asked for, and processes mapping the same file share its pages.
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            size = f.seek(0, 2)
+            if size < HEADER.size:
+                raise CompiledFormatError(f"{path} is too short to be a compiled bank")
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._map)
+        magic, version, name_count, self.count = HEADER.unpack_from(self._view, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise CompiledFormatError(f"{path} is not a version {VERSION} compiled bank")
+        pos = HEADER.size
+        self.difficulties = []
+        for _ in range(name_count):
+            (length,) = NAME_LENGTH.unpack_from(self._view, pos)
+            pos += NAME_LENGTH.size
+            self.difficulties.append(str(self._view[pos:pos + length], 'utf-8'))
+            pos += length
+        self._records = pos
+        self._strings = pos + self.count * RECORD.size
+        if self._strings > size:
+            self.close()
+            raise CompiledFormatError(f"{path} is truncated")
+
+    def __len__(self):
+        return self.count
+
+    def _record(self, i):
+        if not 0 <= i < self.count:
+            raise IndexError("compiled bank index out of range")
+        return RECORD.unpack_from(self._view, self._records + i * RECORD.size)
+
+    def word_bytes(self, i):
+        # Zero-copy: a memoryview straight into the mapped file
+        offset, word_len, _, _ = self._record(i)
+        start = self._strings + offset
+        return self._view[start:start + word_len]
+
+    def word(self, i):
+        return str(self.word_bytes(i), 'utf-8')
+
+    def hint(self, i):
+        offset, word_len, hint_len, _ = self._record(i)
+        start = self._strings + offset + word_len + 1
+        return str(self._view[start:start + hint_len], 'utf-8')
+
+    def difficulty(self, i):
+        code = self._record(i)[3]
+        return None if code == NO_DIFFICULTY else self.difficulties[code]
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self.count
+        offset, word_len, hint_len, code = self._record(i)
+        return self._entry(offset, word_len, hint_len, code)
+
+    def __iter__(self):
+        return iter(self.entries())
+
+    def _entry(self, offset, word_len, hint_len, code):
+        start = self._strings + offset
+        entry = {"word": str(self._view[start:start + word_len], 'utf-8'),
+                 "hint": str(self._view[start + word_len + 1:start + word_len + 1 + hint_len], 'utf-8')}
+        if code != NO_DIFFICULTY:
+            entry["difficulty"] = self.difficulties[code]
+        return entry
+
+    def _columns(self):
+        # The whole string table is decoded and split in one go rather than per entry
+        parts = str(self._view[self._strings:], 'utf-8').split("\0")
+        codes = bytes(self._view[self._records + CODE_OFFSET:self._strings:RECORD.size])
+        return parts[0:2 * self.count:2], parts[1:2 * self.count:2], codes
+
+    def words(self):
+        return self._columns()[0]
+
+    def entries(self):
+        # Every entry as a dict; the difficulty strings are shared, not copied per entry
+        words, hints, codes = self._columns()
+        names = self.difficulties + [None] * (256 - len(self.difficulties))
+        result = [{"word": word, "hint": hint, "difficulty": names[code]}
+                  for word, hint, code in zip(words, hints, codes)]
+        if NO_DIFFICULTY in codes:
+            for i, code in enumerate(codes):
+                if code == NO_DIFFICULTY:
+                    del result[i]["difficulty"]
+        return result
+
+    def close(self):
+        if self._map is None:
+            return
+        try:
+            self._view.release()
+            self._map.close()
+        except BufferError:
+            # A caller still holds a word_bytes() view; the mapping goes when that does
+            return
+        self._map = None
+
+
+def load(path):
+    # Every entry as a dict, with the mapping closed again: a full copy, not a view
+    bank = CompiledBank(path)
+    try:
+        return bank.entries()
+    finally:
+        bank.close()
@@ -0,0 +1,165 @@
+import random
+
+MAX_ATTEMPTS = 7
+ROUND_SECONDS = 60
+
+# Outcomes of a single hangman guess
+INVALID = "invalid"
+REPEATED = "repeated"
+HIT = "hit"
+MISS = "miss"
+WON = "won"
+LOST = "lost"
+
+PLAYING = "playing"
+
+EASY_POINTS = 10
+OTHER_POINTS = 20
+EASY_HINT_PENALTY = 5
+
+
+def letter_bit(letter):
+    i = ord(letter) - 97
+    return 1 << i if 0 <= i < 26 else 0
+
+
+def letter_mask(text):
+    mask = 0
+    for ch in text.lower():
+        mask |= letter_bit(ch)
+    return mask
+
+
+class HangmanState:
+    __slots__ = ("word", "target", "guessed", "attempts_left", "status")
+
+    def __init__(self, word, attempts=MAX_ATTEMPTS):
+        self.word = word
+        self.target = letter_mask(word)
+        self.guessed = 0
+        self.attempts_left = attempts
+        self.status = PLAYING
+
+    def guess(self, letter):
+        letter = letter.lower()
+        bit = letter_bit(letter) if len(letter) == 1 else 0
+        if not bit:
+            return INVALID
+        return self.guess_bit(bit)
+
+    def guess_bit(self, bit):
+        if self.guessed & bit:
+            return REPEATED
+        self.guessed |= bit
+        if self.target & bit:
+            # Won once every letter of the word has been guessed
+            if not self.target & ~self.guessed:
+                self.status = WON
+                return WON
+            return HIT
+        self.attempts_left -= 1
+        if self.attempts_left <= 0:
+            self.status = LOST
+            return LOST
+        return MISS
+
+    def timeout(self):
+        if self.status == PLAYING:
+            self.status = LOST
+
+    def revealed(self, ch):
+        bit = letter_bit(ch.lower())
+        return not bit or bool(self.guessed & bit)
+
+    def pattern(self):
+        return ' '.join(ch if self.revealed(ch) else '_' for ch in self.word)
+
+    @property
+    def wrong_letters(self):
+        return self.guessed & ~self.target
+
+
+def play_hangman(target, order, attempts=MAX_ATTEMPTS):
+    # Plays a whole game against a fixed guess order of letter bits; returns (won, guesses)
+    guessed = 0
+    guesses = 0
+    for bit in order:
+        if guessed & bit:
+            continue
+        guessed |= bit
+        guesses += 1
+        if target & bit:
+            if not target & ~guessed:
+                return True, guesses
+        else:
+            attempts -= 1
+            if attempts <= 0:
+                return False, guesses
+    return False, guesses
+
+
+def points_for(difficulty):
+    return EASY_POINTS if str(difficulty).lower() == "easy" else OTHER_POINTS
+
+
+def hint_penalty(difficulty):
+    return EASY_HINT_PENALTY if str(difficulty).lower() == "easy" else 0
+
+
+def scramble(word, rng=random):
+    # One shuffle, then at most one swap: no retry loop, and None when the
+    # word has no ordering that differs from itself (e.g. "aaa")
+    lowered = word.lower()
+    if len(set(lowered)) < 2:
+        return None
+    letters = list(word)
+    rng.shuffle(letters)
+    if ''.join(letters).lower() == lowered:
+        i = rng.randrange(len(letters))
+        j = next(j for j in range(len(letters)) if letters[j].lower() != letters[i].lower())
+        letters[i], letters[j] = letters[j], letters[i]
+    return ''.join(letters)
+
+
+class ScrambleRound:
+    __slots__ = ("word", "hint", "difficulty", "scrambled", "solved", "hint_used")
+
+    def __init__(self, entry, rng=random):
+        self.word = entry["word"]
+        self.hint = entry["hint"]
+        self.difficulty = entry["difficulty"]
+        self.scrambled = scramble(self.word, rng) or self.word
+        self.solved = False
+        self.hint_used = False
+
+    def check(self, guess):
+        if self.solved:
+            # A round is won once; later guesses score nothing
+            return False
+        correct = guess.strip().lower() == self.word.lower()
+        if correct:
+            self.solved = True
+        return correct
+
+    def points(self):
+        return points_for(self.difficulty)
+
+    def use_hint(self):
+        self.hint_used = True
+        return hint_penalty(self.difficulty)
+
+
+class Score:
+    __slots__ = ("score", "high_score")
+
+    def __init__(self, high_score=0):
+        self.score = 0
+        self.high_score = high_score
+
+    def add(self, points):
+        # Returns True when this change set a new high score
+        self.score = max(0, self.score + points)
+        if self.score > self.high_score:
+            self.high_score = self.score
+            return True
+        return False
@@ -0,0 +1,231 @@
+import json
+import os
+from collections import deque
+from datetime import datetime
+
+from metrics import timed
+from wordbank import normalize_difficulty, word_key, write_atomic
+
+HISTORY_FILE = "history.jsonl"
+LEGACY_HISTORY_FILE = "history.json"
+STATS_SUFFIX = ".stats"
+RECENT_LIMIT = 30
+
+# Persist the rolling counters every this many appends so a restart only scans the tail
+STATS_EVERY = 50
+
+
+class HistoryLog:
+    def __init__(self, path=HISTORY_FILE, recent=RECENT_LIMIT, legacy_path=LEGACY_HISTORY_FILE, writer=None,
+                 read_only=False):
+        self.path = path
+        # Read only: a legacy file is counted in memory rather than migrated, and nothing is written
+        self.read_only = read_only
+        # Optional IOWriter; appends and checkpoints then happen on its thread
+        self.writer = writer
+        self.stats_path = path + STATS_SUFFIX
+        self.legacy_path = legacy_path
+        self.recent = deque(maxlen=recent)
+        self.word_stats = {}
+        self.difficulty_stats = {}
+        self._offset = 0
+        self._file = None
+        self._unsaved = 0
+        self.load()
+
+    @timed("history_load")
+    def load(self):
+        legacy = not os.path.exists(self.path) and self.legacy_path and os.path.exists(self.legacy_path)
+        if legacy and not self.read_only:
+            self._migrate_legacy()
+        self.recent.clear()
+        self.word_stats = {}
+        self.difficulty_stats = {}
+        self._offset = 0
+        if legacy and self.read_only:
+            records = self._read_legacy()
+            for record in records:
+                try:
+                    self._count(record)
+                except (KeyError, TypeError):
+                    continue
+            self.recent.extend(records[-self.recent.maxlen:])
+            return
+        self._load_stats()
+        if os.path.exists(self.path):
+            self._scan_from(self._offset)
+            self.recent.extend(self._read_tail())
+
+    def _read_legacy(self):
+        try:
+            with open(self.legacy_path, 'r') as f:
+                records = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return []
+        return records if isinstance(records, list) else []
+
+    def _migrate_legacy(self):
+        records = self._read_legacy()
+        if not records:
+            return
+        with open(self.path, 'a') as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+
+    def _load_stats(self):
+        try:
+            with open(self.stats_path, 'r') as f:
+                stats = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return
+        offset = stats.get("offset", 0)
+        if not self._line_start(offset):
+            # The log was replaced behind our back; rebuild the counters from scratch
+            return
+        self._offset = stats["offset"]
+        # Checkpoints written before words were case-folded may hold a word under several spellings
+        self.word_stats = {}
+        for word, (won, played) in stats.get("words", {}).items():
+            counts = self.word_stats.setdefault(word_key(word), [0, 0])
+            counts[0] += won
+            counts[1] += played
+        self.difficulty_stats = stats.get("difficulties", {})
+
+    def _line_start(self, offset):
+        # A checkpoint offset must fall just after a newline inside the log
+        if not offset:
+            return True
+        try:
+            with open(self.path, 'rb') as f:
+                f.seek(offset - 1)
+                return f.read(1) == b"\n"
+        except OSError:
+            return False
+
+    def _scan_from(self, offset, end=None):
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n") or (end is not None and offset + len(line) > end):
+                    break
+                offset += len(line)
+                try:
+                    self._count(json.loads(line))
+                except (json.JSONDecodeError, KeyError):
+                    continue
+        self._offset = offset
+
+    def _read_tail(self):
+        limit = self.recent.maxlen
+        with open(self.path, 'rb') as f:
+            pos = f.seek(0, os.SEEK_END)
+            data = b""
+            while pos > 0 and data.count(b"\n") <= limit:
+                step = min(4096, pos)
+                pos -= step
+                f.seek(pos)
+                data = f.read(step) + data
+        records = []
+        for line in data.splitlines()[-limit:]:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+        return records
+
+    def _count(self, record):
+        won = 1 if record["result"] == "Correct" else 0
+        # Keyed like the bank, so "Byzantine" and "byzantine" are one word
+        stats = self.word_stats.setdefault(word_key(record["word"]), [0, 0])
+        stats[0] += won
+        stats[1] += 1
+        difficulty = record.get("difficulty")
+        if difficulty:
+            stats = self.difficulty_stats.setdefault(normalize_difficulty(difficulty), [0, 0])
+            stats[0] += won
+            stats[1] += 1
+
+    @timed("history_append")
+    def append(self, word, guess, correct, difficulty=None, player=None, elapsed=None):
+        if self.read_only:
+            raise ValueError("history log was opened read only")
+        record = {
+            "word": word,
+            "guess": guess,
+            "result": "Correct" if correct else "Wrong",
+            "time": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        }
+        if difficulty:
+            record["difficulty"] = difficulty
+        if player:
+            record["player"] = player
+        if elapsed is not None:
+            # Seconds into the round when the guess was made
+            record["elapsed"] = round(elapsed, 2)
+        if self.writer is None:
+            self._write_records([record])
+        else:
+            self.writer.batch(("history", self.path), self._write_records, record)
+        self.recent.append(record)
+        self._unsaved += 1
+        if self._unsaved >= STATS_EVERY:
+            self.save_stats()
+        return record
+
+    @timed("history_write")
+    def _write_records(self, records):
+        # Other processes (the game server) append to the same log, so the counters
+        # and offset are advanced here from where the write actually landed: lines
+        # written by others since our last write are counted first, then ours
+        data = "".join(json.dumps(record) + "\n" for record in records).encode()
+        if self._file is None:
+            self._file = open(self.path, 'ab')
+            if not self._line_start(self._file.tell()):
+                # A line torn by a crash; ours must not be glued onto it
+                data = b"\n" + data
+        self._file.write(data)
+        self._file.flush()
+        end = self._file.tell()
+        if end - len(data) > self._offset:
+            self._scan_from(self._offset, end - len(data))
+        for record in records:
+            self._count(record)
+        self._offset = end
+
+    def save_stats(self):
+        if self.writer is None:
+            self._save_stats()
+        else:
+            # Queued behind the appends, so the counters match the offset when serialized
+            self.writer.submit(("history-stats", self.stats_path), self._save_stats)
+        self._unsaved = 0
+
+    def _save_stats(self):
+        stats = json.dumps({"offset": self._offset, "words": self.word_stats, "difficulties": self.difficulty_stats})
+        write_atomic(self.stats_path, lambda f: f.write(stats))
+
+    def win_rate(self, word):
+        return _rate(self.word_stats.get(word_key(word)))
+
+    def difficulty_win_rate(self, difficulty):
+        return _rate(self.difficulty_stats.get(normalize_difficulty(difficulty)))
+
+    def close(self):
+        if self._unsaved:
+            self.save_stats()
+        if self.writer is None:
+            self._close_file()
+        else:
+            self.writer.submit(("history-close", self.path), self._close_file)
+            self.writer.flush()
+
+    def _close_file(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def _rate(stats):
+    if not stats or not stats[1]:
+        return None
+    return stats[0] / stats[1]
@@ -0,0 +1,210 @@
+import atexit
+import sys
+import threading
+import time
+from collections import deque
+
+from metrics import percentiles
+
+# Latency samples kept for metrics()
+SAMPLES = 1000
+
+
+class Job:
+    __slots__ = ("key", "fn", "args", "items", "callbacks", "submitted")
+
+    def __init__(self, key, fn, args, items, callbacks, submitted):
+        self.key = key
+        self.fn = fn
+        self.args = args
+        self.items = items
+        self.callbacks = callbacks
+        self.submitted = submitted
+
+
+class IOWriter:
+    # A single background thread for every file write. Jobs run in the order they
+    # were submitted. Resubmitting a key that hasn't started yet replaces it, so only
+    # the latest contents get written; batch jobs keep collecting items until they
+    # start, so a burst of appends to one file becomes a single write.
+
+    def __init__(self, name="io-writer"):
+        self._cond = threading.Condition()
+        self._jobs = deque()
+        self._pending = {}
+        self._completed = deque()
+        self._running = False
+        self._closed = False
+        # Called on the submitting thread whenever work is queued, so a UI can
+        # start delivering callbacks (see deliver_on)
+        self.wakeup = None
+        # Called as on_error(key, error) for failed jobs that have no callback
+        self.on_error = None
+        self.submitted = 0
+        self.written = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.max_depth = 0
+        self._latency = deque(maxlen=SAMPLES)
+        self._service = deque(maxlen=SAMPLES)
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    @property
+    def depth(self):
+        return len(self._jobs)
+
+    @property
+    def busy(self):
+        return bool(self._jobs or self._running or self._completed)
+
+    def submit(self, key, fn, *args, callback=None):
+        # Runs fn(*args); replaces a queued job with the same key
+        with self._cond:
+            job = self._pending.pop(key, None)
+            if job is not None:
+                self._jobs.remove(job)
+                self.coalesced += 1
+                job.fn, job.args = fn, args
+            else:
+                job = Job(key, fn, args, None, [], time.perf_counter())
+            self._pending[key] = job
+            self._enqueue(job, callback)
+        self._wake()
+
+    def batch(self, key, fn, item, *args, callback=None):
+        # Runs fn(items, *args); joins the last queued job if it is a batch for the same key.
+        # Only the last job is joined so nothing is ever written ahead of earlier jobs.
+        with self._cond:
+            job = self._jobs[-1] if self._jobs else None
+            if job is not None and job.key == key and job.items is not None:
+                job.items.append(item)
+                self.coalesced += 1
+                if callback is not None:
+                    job.callbacks.append(callback)
+                self.submitted += 1
+            else:
+                self._enqueue(Job(key, fn, args, [item], [], time.perf_counter()), callback)
+        self._wake()
+
+    def post(self, callback, result=None):
+        # For a running job to hand something to the UI thread before it finishes,
+        # e.g. progress: callback(result, None) runs at the next deliver(). The job
+        # keeps the writer busy, so a deliver_on pump is already polling.
+        with self._cond:
+            self._completed.append((Job(None, None, (), None, [callback], time.perf_counter()), result, None))
+
+    def _enqueue(self, job, callback):
+        if self._closed:
+            raise RuntimeError("IOWriter is closed")
+        if callback is not None:
+            job.callbacks.append(callback)
+        self._jobs.append(job)
+        self.submitted += 1
+        self.max_depth = max(self.max_depth, len(self._jobs))
+        self._cond.notify_all()
+
+    def _wake(self):
+        # Jobs queued by a running job need no wakeup (and the UI's timers mustn't be
+        # touched from this thread): the writer stays busy until they are done
+        if self.wakeup is not None and threading.current_thread() is not self._thread:
+            self.wakeup()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._jobs and not self._closed:
+                    self._cond.wait()
+                if not self._jobs:
+                    return
+                job = self._jobs.popleft()
+                if self._pending.get(job.key) is job:
+                    del self._pending[job.key]
+                self._running = True
+            started = time.perf_counter()
+            result = error = None
+            try:
+                if job.items is None:
+                    result = job.fn(*job.args)
+                else:
+                    result = job.fn(job.items, *job.args)
+            except Exception as e:
+                error = e
+            finished = time.perf_counter()
+            with self._cond:
+                self._running = False
+                self.written += 1
+                self.errors += error is not None
+                self._latency.append(finished - job.submitted)
+                self._service.append(finished - started)
+                self._completed.append((job, result, error))
+                self._cond.notify_all()
+
+    def deliver(self):
+        # Runs callbacks for finished jobs on the calling (UI) thread
+        with self._cond:
+            done = list(self._completed)
+            self._completed.clear()
+        for job, result, error in done:
+            for callback in job.callbacks:
+                callback(result, error)
+            if error is not None and not job.callbacks:
+                if self.on_error is not None:
+                    self.on_error(job.key, error)
+                else:
+                    print(f"Write failed for {job.key}: {error}", file=sys.stderr)
+        return len(done)
+
+    def flush(self, timeout=None):
+        with self._cond:
+            idle = self._cond.wait_for(lambda: not self._jobs and not self._running, timeout)
+        self.deliver()
+        return idle
+
+    def close(self):
+        self.flush()
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+
+    def metrics(self):
+        with self._cond:
+            return {
+                "depth": len(self._jobs),
+                "max_depth": self.max_depth,
+                "submitted": self.submitted,
+                "written": self.written,
+                "coalesced": self.coalesced,
+                "errors": self.errors,
+                # From submission to finished, and time spent actually writing
+                "latency_ms": percentiles(self._latency, (0.5, 0.95)),
+                "service_ms": percentiles(self._service, (0.5, 0.95)),
+            }
+
+
+def deliver_on(writer, wheel, interval=0.05):
+    # Polls for finished jobs from a UI's timer wheel, only while the writer has work
+    def pump():
+        writer.deliver()
+        if not writer.busy:
+            wheel.cancel_owner(writer)
+
+    def wakeup():
+        if writer not in wheel.owners:
+            wheel.every(interval, pump, owner=writer)
+
+    writer.wakeup = wakeup
+    return writer
+
+
+_writer = None
+
+
+def get_writer():
+    global _writer
+    if _writer is None:
+        _writer = IOWriter()
+        # Whatever is still queued at exit gets written
+        atexit.register(_writer.close)
+    return _writer
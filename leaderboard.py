@@ -0,0 +1,261 @@
+import atexit
+import getpass
+import json
+import os
+import secrets
+import sqlite3
+import threading
+from datetime import datetime
+
+from iowriter import get_writer
+from metrics import timed
+from wordbank import normalize_difficulty
+
+LEADERBOARD_FILE = "leaderboard.db"
+LEGACY_SCORE_FILE = "score.json"
+TOP_K = 10
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id TEXT PRIMARY KEY,
+    player TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    difficulty TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    time TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_by_score ON runs (score DESC);
+CREATE INDEX IF NOT EXISTS runs_by_mode ON runs (mode, score DESC);
+CREATE INDEX IF NOT EXISTS runs_by_mode_difficulty ON runs (mode, difficulty, score DESC);
+CREATE INDEX IF NOT EXISTS runs_by_player ON runs (player, mode, score DESC);
+CREATE TABLE IF NOT EXISTS results (
+    player TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    difficulty TEXT NOT NULL,
+    wins INTEGER NOT NULL,
+    losses INTEGER NOT NULL,
+    PRIMARY KEY (player, mode, difficulty)
+);
+CREATE TABLE IF NOT EXISTS reviews (
+    player TEXT NOT NULL,
+    word TEXT NOT NULL,
+    box INTEGER NOT NULL,
+    misses INTEGER NOT NULL,
+    plays INTEGER NOT NULL,
+    seen REAL NOT NULL,
+    PRIMARY KEY (player, word)
+);
+"""
+
+# A run only ever keeps its best score, so replays and out-of-order batches are harmless
+UPSERT_RUN = """
+INSERT INTO runs VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (id) DO UPDATE SET score = excluded.score, time = excluded.time
+WHERE excluded.score > runs.score
+"""
+
+# Counters are incremented inside SQLite, so two processes never lose each other's updates
+UPSERT_RESULT = """
+INSERT INTO results VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (player, mode, difficulty) DO UPDATE SET
+    wins = wins + excluded.wins, losses = losses + excluded.losses
+"""
+
+# A word's review state is whatever the player's scheduler last computed
+UPSERT_REVIEW = """
+INSERT INTO reviews VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (player, word) DO UPDATE SET
+    box = excluded.box, misses = excluded.misses, plays = excluded.plays, seen = excluded.seen
+"""
+
+
+def default_player():
+    name = os.environ.get("WORDGUESS_PLAYER")
+    if name:
+        return name
+    try:
+        return getpass.getuser()
+    except (KeyError, OSError):
+        return "player"
+
+
+def _tier(difficulty):
+    return normalize_difficulty(difficulty) or ""
+
+
+def _now():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+class Leaderboard:
+    # Reads run on the calling thread against its own connection; writes are queued
+    # on the shared IOWriter and committed in batches there, so the UI never waits on disk
+
+    def __init__(self, path=LEADERBOARD_FILE, player=None, legacy_path=LEGACY_SCORE_FILE, writer=None):
+        self.path = path
+        self.player = player or default_player()
+        self.writer = writer or get_writer()
+        self._key = ("leaderboard", os.path.abspath(path))
+        self._local = threading.local()
+        self._closed = False
+        db = self._db()
+        with db:
+            db.executescript(SCHEMA)
+        if legacy_path:
+            self._migrate_legacy(db, legacy_path)
+
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=10)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    def _db(self):
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = self._local.db = self._connect()
+        return db
+
+    def _migrate_legacy(self, db, legacy_path):
+        try:
+            with open(legacy_path, 'r') as f:
+                high_score = int(json.load(f).get("high_score", 0))
+        except (OSError, ValueError, AttributeError):
+            return
+        if high_score > 0:
+            with db:
+                db.execute("INSERT OR IGNORE INTO runs VALUES (?, ?, ?, ?, ?, ?)",
+                           (legacy_path, self.player, "scramble", "", high_score, _now()))
+
+    # Writes
+    def start_run(self, mode, difficulty=None, player=None):
+        return (secrets.token_hex(8), player or self.player, mode, _tier(difficulty))
+
+    def record_score(self, run, score):
+        self.writer.batch(self._key, self._commit, ("score", run, score, _now()))
+
+    def record_result(self, mode, difficulty, won, player=None):
+        self.writer.batch(self._key, self._commit, ("result", (player or self.player, mode, _tier(difficulty)), won))
+
+    def record_review(self, word, review, player=None):
+        # review is (box, misses, plays, seen), as kept by the word scheduler
+        self.writer.batch(self._key, self._commit, ("review", (player or self.player, word), tuple(review)))
+
+    @timed("leaderboard_commit")
+    def _commit(self, items):
+        # Runs on the writer thread: a run's scores collapse to its best and result
+        # counters are summed, then the whole batch is one transaction
+        runs = {}
+        results = {}
+        reviews = {}
+        for item in items:
+            if item[0] == "score":
+                _, run, score, when = item
+                best = runs.get(run[0])
+                if best is None or score > best[4]:
+                    runs[run[0]] = run + (score, when)
+            elif item[0] == "review":
+                _, key, review = item
+                reviews[key] = key + review
+            else:
+                _, key, won = item
+                counts = results.setdefault(key, [0, 0])
+                counts[0 if won else 1] += 1
+        with self._db() as db:
+            db.executemany(UPSERT_RUN, runs.values())
+            db.executemany(UPSERT_RESULT, (key + tuple(counts) for key, counts in results.items()))
+            db.executemany(UPSERT_REVIEW, reviews.values())
+
+    def _close_db(self):
+        db = getattr(self._local, "db", None)
+        if db is not None:
+            db.close()
+            self._local.db = None
+
+    def flush(self, timeout=None):
+        return self.writer.flush(timeout)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        # The writer thread's connection is closed on that thread, after the last batch
+        self.writer.submit(self._key + ("close",), self._close_db)
+        self.writer.flush()
+        self._close_db()
+
+    # Reads, served from the indexes
+    def top(self, k=TOP_K, mode=None, difficulty=None, player=None):
+        where, args = _filters(mode=mode, difficulty=difficulty, player=player)
+        rows = self._db().execute(
+            f"SELECT player, mode, difficulty, score, time FROM runs{where} ORDER BY score DESC LIMIT ?",
+            args + [k])
+        return [{"player": p, "mode": m, "difficulty": d or None, "score": s, "time": t}
+                for p, m, d, s, t in rows]
+
+    def high_score(self, mode=None, difficulty=None, player=None):
+        best = self.top(1, mode, difficulty, player)
+        return best[0]["score"] if best else 0
+
+    def results(self, mode=None, player=None):
+        where, args = _filters(mode=mode, player=player)
+        rows = self._db().execute(
+            f"SELECT difficulty, sum(wins), sum(losses) FROM results{where} GROUP BY difficulty", args)
+        return {d or None: (wins, losses) for d, wins, losses in rows}
+
+    def totals(self, mode=None, player=None):
+        results = self.results(mode, player).values()
+        return sum(w for w, _ in results), sum(l for _, l in results)
+
+    def reviews(self, player=None):
+        rows = self._db().execute("SELECT word, box, misses, plays, seen FROM reviews WHERE player = ?",
+                                  (player or self.player,))
+        return {word: [box, misses, plays, seen] for word, box, misses, plays, seen in rows}
+
+
+def _filters(**columns):
+    clauses, args = [], []
+    for column, value in columns.items():
+        if value is not None:
+            clauses.append(f"{column} = ?")
+            args.append(_tier(value) if column == "difficulty" else value)
+    return (" WHERE " + " AND ".join(clauses) if clauses else ""), args
+
+
+_leaderboards = {}
+
+
+def get_leaderboard(path=LEADERBOARD_FILE):
+    key = os.path.abspath(path)
+    board = _leaderboards.get(key)
+    if board is None:
+        board = _leaderboards[key] = Leaderboard(path)
+        # Pending writes still reach the file if a front end exits without closing it
+        atexit.register(board.close)
+    return board
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Show the word guess leaderboard")
+    parser.add_argument("--db", default=LEADERBOARD_FILE)
+    parser.add_argument("--mode", choices=["hangman", "scramble"])
+    parser.add_argument("--difficulty")
+    parser.add_argument("--player")
+    parser.add_argument("-k", type=int, default=TOP_K)
+    args = parser.parse_args(argv)
+
+    board = Leaderboard(args.db, legacy_path=None)
+    rows = board.top(args.k, args.mode, args.difficulty, args.player)
+    if not rows:
+        print("No scores yet.")
+    for rank, row in enumerate(rows, 1):
+        print(f"{rank:>3}. {row['score']:>6}  {row['player']:<16} {row['mode']:<9} "
+              f"{row['difficulty'] or '-':<7} {row['time']}")
+    wins, losses = board.totals(args.mode, args.player)
+    print(f"Results: {wins} wins, {losses} losses")
+    board.close()
+
+
+if __name__ == "__main__":
+    main()
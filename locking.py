@@ -0,0 +1,88 @@
+import os
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+LOCK_SUFFIX = ".lock"
+
+
+class FileLock:
+    # Advisory lock shared by every process using the same file. Re-entrant within
+    # a process: a nested acquire only counts, and a shared request made while the
+    # exclusive lock is held is already satisfied. Callers serialize their own
+    # threads; the lock is per process, not per thread.
+
+    def __init__(self, path):
+        self.path = path + LOCK_SUFFIX
+        self._fd = None
+        self._depth = 0
+        self._exclusive = False
+
+    def acquire(self, exclusive=True, wait=True):
+        # With wait=False, returns False instead of blocking when another process holds it
+        if self._depth:
+            if exclusive and not self._exclusive:
+                raise RuntimeError(f"can't upgrade a shared lock on {self.path}")
+            self._depth += 1
+            return True
+        if self._fd is None:
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o666)
+        if fcntl is not None:
+            mode = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+            try:
+                fcntl.flock(self._fd, mode if wait else mode | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return False
+        else:
+            # Windows has no shared locks here, so readers take the exclusive one too
+            os.lseek(self._fd, 0, os.SEEK_SET)
+            while True:
+                try:
+                    msvcrt.locking(self._fd, msvcrt.LK_LOCK if wait else msvcrt.LK_NBLCK, 1)
+                    break
+                except OSError:
+                    if not wait:
+                        return False
+                    # LK_LOCK gives up after about ten seconds
+        self._depth = 1
+        self._exclusive = exclusive
+        return True
+
+    def release(self):
+        self._depth -= 1
+        if self._depth:
+            return
+        if fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        else:
+            os.lseek(self._fd, 0, os.SEEK_SET)
+            msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+
+    def shared(self):
+        return _Held(self, False)
+
+    def exclusive(self):
+        return _Held(self, True)
+
+    def close(self):
+        if self._fd is not None and not self._depth:
+            os.close(self._fd)
+            self._fd = None
+
+
+class _Held:
+    __slots__ = ("lock", "exclusive")
+
+    def __init__(self, lock, exclusive):
+        self.lock = lock
+        self.exclusive = exclusive
+
+    def __enter__(self):
+        self.lock.acquire(self.exclusive)
+        return self.lock
+
+    def __exit__(self, *exc):
+        self.lock.release()
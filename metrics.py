@@ -0,0 +1,227 @@
+import atexit
+import bisect
+import functools
+import json
+import os
+import sys
+import threading
+import time
+
+# Opt-in: with WORDGUESS_METRICS unset every decorator below returns the function
+# untouched, so instrumented code runs exactly as fast as before.
+#   WORDGUESS_METRICS=1                 record
+#   WORDGUESS_METRICS_FILE=out.json     dump on exit (.prom/.txt for Prometheus text)
+#   WORDGUESS_METRICS_PORT=9108         serve /metrics and /metrics.json on 127.0.0.1
+ENABLED = os.environ.get("WORDGUESS_METRICS", "") not in ("", "0")
+PREFIX = "wordguess_"
+
+# Histogram bucket upper bounds, in seconds
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class Histogram:
+    __slots__ = ("counts", "count", "sum", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q):
+        # Upper bound of the bucket holding the q-th observation
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(BUCKETS, self.counts):
+            seen += n
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.counters = {}
+        # name -> function returning a (possibly nested) dict of numbers, read at dump time
+        self.collectors = {}
+
+    def observe(self, name, seconds):
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.observe(seconds)
+
+    def inc(self, name, n=1, labels=()):
+        key = (name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + n
+
+    def gauges(self):
+        values = {}
+        for name, collect in list(self.collectors.items()):
+            try:
+                _flatten(name, collect(), values)
+            except Exception as e:
+                print(f"metrics collector {name} failed: {e}", file=sys.stderr)
+        return values
+
+    def to_json(self):
+        with self.lock:
+            histograms = {name: {"count": h.count, "sum": h.sum, "max": h.max,
+                                 "p50": h.quantile(0.5), "p95": h.quantile(0.95), "p99": h.quantile(0.99),
+                                 "buckets": dict(zip([str(b) for b in BUCKETS] + ["+Inf"], h.counts))}
+                          for name, h in self.histograms.items()}
+            counters = {_label_name(name, labels): n for (name, labels), n in self.counters.items()}
+        return {"histograms": histograms, "counters": counters, "gauges": self.gauges()}
+
+    def to_prometheus(self):
+        lines = []
+        with self.lock:
+            for name, h in sorted(self.histograms.items()):
+                metric = f"{PREFIX}{name}_seconds"
+                lines.append(f"# TYPE {metric} histogram")
+                cumulative = 0
+                for bound, n in zip(BUCKETS, h.counts):
+                    cumulative += n
+                    lines.append(f'{metric}_bucket{{le="{bound}"}} {cumulative}')
+                lines.append(f'{metric}_bucket{{le="+Inf"}} {h.count}')
+                lines.append(f"{metric}_sum {h.sum}")
+                lines.append(f"{metric}_count {h.count}")
+            typed = set()
+            for (name, labels), n in sorted(self.counters.items()):
+                metric = f"{PREFIX}{name}_total"
+                if metric not in typed:
+                    typed.add(metric)
+                    lines.append(f"# TYPE {metric} counter")
+                label_text = ",".join(f'{k}="{v}"' for k, v in labels)
+                lines.append(f"{metric}{{{label_text}}} {n}" if labels else f"{metric} {n}")
+        for name, value in sorted(self.gauges().items()):
+            lines.append(f"# TYPE {PREFIX}{name} gauge")
+            lines.append(f"{PREFIX}{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _flatten(prefix, values, out):
+    for key, value in values.items():
+        name = f"{prefix}_{key}"
+        if isinstance(value, dict):
+            _flatten(name, value, out)
+        elif isinstance(value, (int, float)):
+            out[name] = value
+
+
+def percentiles(samples, quantiles=(0.5, 0.9, 0.99)):
+    # Nearest-rank quantiles and the max of durations in seconds, as milliseconds
+    samples = sorted(samples)
+    if not samples:
+        return {}
+    pick = lambda q: round(samples[min(len(samples) - 1, int(q * len(samples)))] * 1000, 3)
+    result = {f"p{round(q * 100)}": pick(q) for q in quantiles}
+    result["max"] = round(samples[-1] * 1000, 3)
+    return result
+
+
+def format_percentiles(samples):
+    return "  ".join(f"{name} {value:.3f}" for name, value in percentiles(samples).items())
+
+
+def _label_name(name, labels):
+    if not labels:
+        return name
+    return name + "{" + ",".join(f"{k}={v}" for k, v in labels) + "}"
+
+
+registry = Registry()
+
+
+def timed(name):
+    # Records how long each call takes under `name`; a no-op unless enabled
+    def decorate(fn):
+        if not ENABLED:
+            return fn
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                registry.observe(name, time.perf_counter() - started)
+        return wrapper
+    return decorate
+
+
+def count(name, n=1, **labels):
+    if ENABLED:
+        registry.inc(name, n, tuple(sorted(labels.items())))
+
+
+def collect(name, fn):
+    if ENABLED:
+        registry.collectors[name] = fn
+
+
+def dump(path):
+    if path.endswith((".prom", ".txt")):
+        text = registry.to_prometheus()
+    else:
+        text = json.dumps(registry.to_json(), indent=2)
+    with open(path, 'w') as f:
+        f.write(text)
+
+
+def serve(port, host="127.0.0.1"):
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/metrics":
+                body, kind = registry.to_prometheus(), "text/plain; version=0.0.4"
+            elif self.path == "/metrics.json":
+                body, kind = json.dumps(registry.to_json()), "application/json"
+            else:
+                self.send_error(404)
+                return
+            data = body.encode()
+            self.send_response(200)
+            self.send_header("Content-Type", kind)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+_started = False
+
+
+def start():
+    # Called once by each entry point; sets up the exit dump and the endpoint if asked for
+    global _started
+    if not ENABLED or _started:
+        return
+    _started = True
+    path = os.environ.get("WORDGUESS_METRICS_FILE")
+    if path:
+        atexit.register(dump, path)
+    port = os.environ.get("WORDGUESS_METRICS_PORT")
+    if port:
+        server = serve(int(port))
+        print(f"Metrics on http://127.0.0.1:{server.server_address[1]}/metrics", file=sys.stderr)
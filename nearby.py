@@ -0,0 +1,154 @@
+from functools import lru_cache
+
+from wordbank import bank_cache, word_key
+
+
+def _pattern(word):
+    # Bit i of peq[ch] is set where word[i] == ch
+    peq = {}
+    for i, ch in enumerate(word):
+        peq[ch] = peq.get(ch, 0) | (1 << i)
+    return peq
+
+
+def _distance(peq, length, other):
+    # Myers' bit-parallel Levenshtein: one column of the edit matrix per character
+    # of other, held as the +1/-1 vertical deltas in two ints
+    if not length:
+        return len(other)
+    mask = (1 << length) - 1
+    last = 1 << (length - 1)
+    pv = mask
+    mv = 0
+    score = length
+    for ch in other:
+        eq = peq.get(ch, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | ~(xh | pv)
+        mh = pv & xh
+        if ph & last:
+            score += 1
+        elif mh & last:
+            score -= 1
+        ph = (ph << 1) | 1
+        pv = ((mh << 1) | ~(xv | ph)) & mask
+        mv = ph & xv
+    return score
+
+
+def distance(a, b):
+    a = word_key(a)
+    return _distance(_pattern(a), len(a), word_key(b))
+
+
+@lru_cache(maxsize=None)
+def _pieces(length, parts):
+    # (start, size) of each piece when a word of this length is cut into parts
+    pieces = []
+    start = 0
+    for j in range(parts):
+        size = (length - start) // (parts - j)
+        pieces.append((start, size))
+        start += size
+    return tuple(pieces)
+
+
+class NearbyIndex:
+    # Bank words within k edits of a guess. Each word is cut into k + 1 pieces; k
+    # edits leave at least one piece untouched, so every match shares a piece with
+    # the guess at nearly the same offset. Only words found that way get a full
+    # edit distance check. A table per k is built on first use and then kept up to
+    # date from bank changes.
+
+    def __init__(self, bank):
+        self.bank = bank
+        self.tables = {}
+        bank.listeners.append(self.on_bank_change)
+
+    def _add(self, table, k, key):
+        pieces = table.get(len(key))
+        if pieces is None:
+            pieces = table[len(key)] = [{} for _ in range(k + 1)]
+        for buckets, (start, size) in zip(pieces, _pieces(len(key), k + 1)):
+            buckets.setdefault(key[start:start + size], []).append(key)
+
+    def _remove(self, table, k, key):
+        pieces = table.get(len(key))
+        if pieces is None:
+            return
+        for buckets, (start, size) in zip(pieces, _pieces(len(key), k + 1)):
+            piece = key[start:start + size]
+            bucket = buckets.get(piece)
+            if bucket is not None and key in bucket:
+                bucket.remove(key)
+                if not bucket:
+                    del buckets[piece]
+
+    def _table(self, k):
+        table = self.tables.get(k)
+        if table is None:
+            table = {}
+            by_length = {}
+            for key in self.bank.by_word:
+                by_length.setdefault(len(key), []).append(key)
+            for length, keys in by_length.items():
+                pieces = table[length] = []
+                for start, size in _pieces(length, k + 1):
+                    buckets = {}
+                    for key in keys:
+                        buckets.setdefault(key[start:start + size], []).append(key)
+                    pieces.append(buckets)
+            self.tables[k] = table
+        return table
+
+    def on_bank_change(self, kind, old, new):
+        if kind == "reload":
+            self.tables.clear()
+            return
+        for k, table in self.tables.items():
+            if old is not None:
+                self._remove(table, k, word_key(old['word']))
+            if new is not None:
+                self._add(table, k, word_key(new['word']))
+
+    def build(self, k=1):
+        # The scramble loader builds the k=1 table, which the first wrong guess would otherwise wait for
+        self._table(k)
+
+    def near(self, word, k=1, limit=None):
+        # Bank words (as spelled in the bank) within k edits, closest first
+        table = self._table(k)
+        key = word_key(word)
+        length = len(key)
+        peq = _pattern(key)
+        seen = set()
+        found = []
+        for other in range(max(length - k, 0), length + k + 1):
+            pieces = table.get(other)
+            if pieces is None:
+                continue
+            # Each insertion or deletion before a piece moves it by one; the length
+            # difference fixes the net move, leaving (k - |diff|) // 2 to spare
+            diff = length - other
+            spare = (k - abs(diff)) // 2
+            shifts = range(min(diff, 0) - spare, max(diff, 0) + spare + 1)
+            for buckets, (start, size) in zip(pieces, _pieces(other, k + 1)):
+                for shift in shifts:
+                    at = start + shift
+                    if at < 0 or at + size > length:
+                        continue
+                    for candidate in buckets.get(key[at:at + size], ()):
+                        if candidate not in seen:
+                            seen.add(candidate)
+                            d = _distance(peq, length, candidate)
+                            if d <= k:
+                                found.append((d, candidate))
+        found.sort()
+        if limit is not None:
+            found = found[:limit]
+        by_word = self.bank.by_word
+        return [by_word[candidate]['word'] for _, candidate in found if candidate in by_word]
+
+
+get_nearby_index = bank_cache(NearbyIndex)
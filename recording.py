@@ -0,0 +1,165 @@
+import os
+import random
+import struct
+import time
+
+from wordbank import DIFFICULTIES, normalize_difficulty
+
+# Opt-in: with WORDGUESS_RECORD set to a directory, each front end run writes its
+# session there as one recording, to be played back by replay.py.
+#
+# Session recording layout (little endian), appended to as the session is played:
+#   header   magic, version, mode (MODES index), seed of the session's scramble rng,
+#            start time (Unix seconds)
+#   events   kind, milliseconds since the start, then a payload by kind:
+#              WORD     u16 length + UTF-8; defines the next word id
+#              ROUND    u32 word id, difficulty (DIFFICULTIES index, NO_DIFFICULTY if none)
+#              GUESS    u8 length + UTF-8, as typed
+#              HINT, TIMEOUT   nothing
+MAGIC = b"WGSR"
+VERSION = 1
+RECORDING_SUFFIX = ".wgr"
+MODES = ("hangman", "scramble")
+HEADER = struct.Struct("<4sHB5xQd")
+EVENT = struct.Struct("<BI")
+WORD_LENGTH = struct.Struct("<H")
+ROUND_ID = struct.Struct("<IB")
+NO_DIFFICULTY = 0xFF
+WORD, ROUND, GUESS, HINT, TIMEOUT = range(5)
+
+
+class RecordingFormatError(ValueError):
+    pass
+
+
+class SessionRecorder:
+    # Writes are queued on the IOWriter when one is given, like the history log
+
+    def __init__(self, path, mode, seed=None, writer=None, clock=time.monotonic):
+        self.path = path
+        self.mode = mode
+        self.seed = random.getrandbits(63) if seed is None else seed
+        self.writer = writer
+        self.clock = clock
+        self.word_ids = {}
+        self._started = clock()
+        self._file = None
+        self._emit(HEADER.pack(MAGIC, VERSION, MODES.index(mode), self.seed, time.time()))
+
+    def _emit(self, data):
+        if self.writer is None:
+            self._write([data])
+        else:
+            self.writer.batch(("recording", self.path), self._write, data)
+
+    def _write(self, chunks):
+        if self._file is None:
+            self._file = open(self.path, 'ab')
+        self._file.write(b"".join(chunks))
+        self._file.flush()
+
+    def _event(self, kind, payload=b""):
+        ms = min(int((self.clock() - self._started) * 1000), 0xFFFFFFFF)
+        return EVENT.pack(kind, ms) + payload
+
+    def round(self, word, difficulty=None):
+        data = b""
+        word_id = self.word_ids.get(word)
+        if word_id is None:
+            word_id = self.word_ids[word] = len(self.word_ids)
+            encoded = word.encode('utf-8')[:0xFFFF]
+            data = self._event(WORD, WORD_LENGTH.pack(len(encoded)) + encoded)
+        tier = normalize_difficulty(difficulty)
+        code = DIFFICULTIES.index(tier) if tier in DIFFICULTIES else NO_DIFFICULTY
+        self._emit(data + self._event(ROUND, ROUND_ID.pack(word_id, code)))
+
+    def guess(self, text):
+        encoded = text.encode('utf-8')[:0xFF]
+        self._emit(self._event(GUESS, bytes([len(encoded)]) + encoded))
+
+    def hint(self):
+        self._emit(self._event(HINT))
+
+    def timeout(self):
+        self._emit(self._event(TIMEOUT))
+
+    def close(self):
+        if self.writer is None:
+            self._close_file()
+        else:
+            self.writer.submit(("recording-close", self.path), self._close_file)
+
+    def _close_file(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class Recording:
+    # A recording read back: events are (seconds since the start, kind, value),
+    # value being (word, difficulty) for ROUND, the text for GUESS, else None
+
+    def __init__(self, path, mode, seed, started, events):
+        self.path = path
+        self.mode = mode
+        self.seed = seed
+        self.started = started
+        self.events = events
+
+    @property
+    def duration(self):
+        return self.events[-1][0] if self.events else 0.0
+
+
+def read(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+    if len(data) < HEADER.size:
+        raise RecordingFormatError(f"{path} is too short to be a session recording")
+    magic, version, mode, seed, started = HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION or mode >= len(MODES):
+        raise RecordingFormatError(f"{path} is not a version {VERSION} session recording")
+    words = []
+    events = []
+    pos = HEADER.size
+    try:
+        while pos < len(data):
+            kind, ms = EVENT.unpack_from(data, pos)
+            pos += EVENT.size
+            value = None
+            if kind == WORD:
+                (length,) = WORD_LENGTH.unpack_from(data, pos)
+                pos += WORD_LENGTH.size
+                if pos + length > len(data):
+                    break
+                words.append(str(data[pos:pos + length], 'utf-8'))
+                pos += length
+                continue
+            if kind == ROUND:
+                word_id, code = ROUND_ID.unpack_from(data, pos)
+                pos += ROUND_ID.size
+                value = (words[word_id], None if code == NO_DIFFICULTY else DIFFICULTIES[code].capitalize())
+            elif kind == GUESS:
+                length = data[pos]
+                pos += 1
+                if pos + length > len(data):
+                    break
+                value = str(data[pos:pos + length], 'utf-8', 'replace')
+                pos += length
+            elif kind not in (HINT, TIMEOUT):
+                raise RecordingFormatError(f"{path}: unknown event kind {kind}")
+            events.append((ms / 1000, kind, value))
+    except (struct.error, IndexError):
+        # The session was still being written, or was cut off; keep what is whole
+        pass
+    return Recording(path, MODES[mode], seed, started, events)
+
+
+def start(mode, writer=None):
+    # A recorder for this run when WORDGUESS_RECORD names a directory, else None
+    directory = os.environ.get("WORDGUESS_RECORD")
+    if not directory:
+        return None
+    os.makedirs(directory, exist_ok=True)
+    name = f"{mode}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}{RECORDING_SUFFIX}"
+    return SessionRecorder(os.path.join(directory, name), mode, writer=writer)
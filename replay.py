@@ -0,0 +1,290 @@
+import argparse
+import heapq
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+from anagram import get_anagram_index
+from candidates import get_candidate_index
+from engine import HangmanState, ScrambleRound, Score, INVALID, REPEATED, PLAYING, WON, LOST, MAX_ATTEMPTS
+from history import HistoryLog
+from iowriter import IOWriter
+from leaderboard import Leaderboard
+from metrics import format_percentiles
+from nearby import distance, get_nearby_index
+from recording import ROUND, GUESS, HINT, TIMEOUT, RECORDING_SUFFIX, RecordingFormatError, read
+from scheduler import get_scheduler
+from wordbank import JSON_FILE, get_bank
+
+# Event kinds and the flow method that handles each
+EVENT_NAMES = {ROUND: "round", GUESS: "guess", HINT: "hint", TIMEOUT: "timeout"}
+
+
+class Backend:
+    # What a front end process holds: the bank and its indexes, the scheduler, the
+    # history log and the leaderboard, with every write on one IOWriter thread.
+    # Replays write their history and leaderboard under workdir, never the real ones.
+
+    def __init__(self, bank_path, workdir):
+        self.writer = IOWriter()
+        self.bank = get_bank(bank_path)
+        self.scheduler = get_scheduler(self.bank)
+        self.anagrams = get_anagram_index(self.bank)
+        self.nearby = get_nearby_index(self.bank)
+        self.nearby.build()
+        self.candidates = get_candidate_index(self.bank)
+        self.candidates.build()
+        self.history = HistoryLog(os.path.join(workdir, "history.jsonl"), legacy_path=None, writer=self.writer)
+        self.leaderboard = Leaderboard(os.path.join(workdir, "leaderboard.db"), legacy_path=None, writer=self.writer)
+        self.scheduler.store = self.leaderboard
+
+    def entry(self, word, difficulty):
+        # The recorded word is played even if the bank no longer has it
+        return self.bank.find(word) or {"word": word, "hint": "", "difficulty": difficulty}
+
+    def close(self):
+        self.history.close()
+        self.leaderboard.close()
+        self.writer.close()
+
+
+class ScrambleFlow:
+    # WordGameScreen's callbacks (next_word, check_answer, show_hint, time_up) without the widgets
+
+    def __init__(self, backend, player, seed):
+        self.backend = backend
+        self.player = player
+        self.rng = random.Random(seed)
+        self.score = Score()
+        self.run = backend.leaderboard.start_run("scramble", player=player)
+        self.game = None
+        self.finished = True
+        self.started = 0.0
+
+    def round(self, now, word, difficulty):
+        backend = self.backend
+        if not self.finished:
+            backend.scheduler.record(self.game.word, False, self.player)
+        # The screen draws a word every round; the recorded one is what gets played
+        backend.scheduler.draw(accept=lambda entry: backend.anagrams.is_scrambleable(entry['word']),
+                               player=self.player)
+        self.game = ScrambleRound(backend.entry(word, difficulty), self.rng)
+        self.finished = False
+        self.started = now
+
+    def guess(self, now, text):
+        if self.game is None or self.finished:
+            return
+        backend = self.backend
+        guess = text.strip().lower()
+        correct = self.game.check(guess)
+        if correct:
+            self.finished = True
+            self.score.add(self.game.points())
+            backend.leaderboard.record_score(self.run, self.score.score)
+            backend.leaderboard.record_result("scramble", self.game.difficulty, True, self.player)
+            backend.scheduler.record(self.game.word, True, self.player)
+        elif not backend.anagrams.is_other_anagram(guess, self.game.word) and distance(guess, self.game.word) != 1:
+            backend.nearby.near(guess, limit=1)
+        backend.history.append(self.game.word, guess, correct, self.game.difficulty, self.player, now - self.started)
+
+    def hint(self, now):
+        if self.game is not None:
+            self.score.add(-self.game.use_hint())
+
+    def timeout(self, now):
+        if self.finished:
+            return
+        self.finished = True
+        self.backend.leaderboard.record_result("scramble", self.game.difficulty, False, self.player)
+        self.backend.scheduler.record(self.game.word, False, self.player)
+
+
+class HangmanFlow:
+    # WordGuessGame's callbacks (start_game, make_guess, time_up) without the widgets
+
+    def __init__(self, backend, player, seed):
+        self.backend = backend
+        self.player = player
+        self.score = Score()
+        self.run = backend.leaderboard.start_run("hangman", player=player)
+        self.game = None
+        self.candidates = None
+        self.difficulty = None
+
+    def round(self, now, word, difficulty):
+        backend = self.backend
+        backend.scheduler.draw(difficulty, player=self.player)
+        self.difficulty = difficulty
+        self.game = HangmanState(backend.entry(word, difficulty)['word'], MAX_ATTEMPTS)
+        self.candidates = backend.candidates.track(self.game.word)
+        self.candidates.count
+
+    def guess(self, now, text):
+        if self.game is None or self.game.status != PLAYING:
+            return
+        guess = text.lower()
+        result = self.game.guess(guess)
+        if result in (INVALID, REPEATED):
+            return
+        self.candidates.guess(guess)
+        if result in (WON, LOST):
+            self._finish(result == WON)
+
+    def hint(self, now):
+        pass
+
+    def timeout(self, now):
+        if self.game is not None and self.game.status == PLAYING:
+            self.game.timeout()
+            self._finish(False)
+
+    def _finish(self, win):
+        backend = self.backend
+        if win:
+            self.score.add(self.game.attempts_left)
+            backend.leaderboard.record_score(self.run, self.score.score)
+        backend.leaderboard.record_result("hangman", self.difficulty, win, self.player)
+        backend.scheduler.record(self.game.word, win, self.player)
+
+
+FLOWS = {"hangman": HangmanFlow, "scramble": ScrambleFlow}
+
+
+class ReplayReport:
+    def __init__(self):
+        self.latencies = {kind: [] for kind in EVENT_NAMES}
+        # How late events ran against the N x schedule; only paced replays have any
+        self.lag = []
+        self.elapsed = 0.0
+
+    @property
+    def events(self):
+        return sum(len(samples) for samples in self.latencies.values())
+
+
+def replay(recordings, backend, players, speed=1.0, spread=0.0, seed=0):
+    # Virtual player i plays recordings[i % len(recordings)], starting at a random
+    # point in the first spread recorded seconds. Events from every player are run
+    # in time order on this thread, as a front end's callbacks are; speed 0 runs
+    # them back to back.
+    rng = random.Random(seed)
+    report = ReplayReport()
+    queue = []
+    for i in range(players):
+        recording = recordings[i % len(recordings)]
+        if not recording.events:
+            continue
+        flow = FLOWS[recording.mode](backend, f"replay-{i}", recording.seed)
+        offset = rng.uniform(0, spread) if spread else 0.0
+        queue.append((offset + recording.events[0][0], i, 0, offset, flow, recording))
+    heapq.heapify(queue)
+    started = time.perf_counter()
+    while queue:
+        at, i, n, offset, flow, recording = heapq.heappop(queue)
+        if speed:
+            wait = started + at / speed - time.perf_counter()
+            if wait > 0:
+                time.sleep(wait)
+            else:
+                report.lag.append(-wait)
+        _, kind, value = recording.events[n]
+        handler = getattr(flow, EVENT_NAMES[kind])
+        begin = time.perf_counter()
+        if kind == ROUND:
+            handler(at, *value)
+        elif kind == GUESS:
+            handler(at, value)
+        else:
+            handler(at)
+        report.latencies[kind].append(time.perf_counter() - begin)
+        if n + 1 < len(recording.events):
+            heapq.heappush(queue, (offset + recording.events[n + 1][0], i, n + 1, offset, flow, recording))
+    report.elapsed = time.perf_counter() - started
+    return report
+
+
+def _io_counters():
+    # Linux only: bytes moved through read/write calls and what reached the disk,
+    # for the whole process, the writer thread included
+    try:
+        with open("/proc/self/io") as f:
+            return {name: int(value) for name, value in (line.split(":") for line in f)}
+    except (OSError, ValueError):
+        return None
+
+
+def _megabytes(n):
+    return f"{n / (1 << 20):.2f} MB"
+
+
+def _recording_paths(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.endswith(RECORDING_SUFFIX):
+                    yield os.path.join(path, name)
+        else:
+            yield path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay recorded play sessions as many concurrent virtual players")
+    parser.add_argument("recordings", nargs="+", help="recording files, or directories of them")
+    parser.add_argument("--bank", default=JSON_FILE)
+    parser.add_argument("--players", type=int, default=100)
+    parser.add_argument("--speed", type=float, default=1.0, help="N x recorded speed; 0 for as fast as possible")
+    parser.add_argument("--spread", type=float, default=60.0,
+                        help="start players at random over this many recorded seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", help="keep the replay's history and leaderboard here (default: a temp dir)")
+    args = parser.parse_args(argv)
+
+    recordings = []
+    for path in _recording_paths(args.recordings):
+        try:
+            recordings.append(read(path))
+        except (OSError, RecordingFormatError) as e:
+            print(f"Skipping {path}: {e}", file=sys.stderr)
+    if not recordings:
+        sys.exit("No recordings to replay.")
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="wordguess-replay-")
+    os.makedirs(workdir, exist_ok=True)
+    try:
+        backend = Backend(args.bank, workdir)
+        io_before = _io_counters()
+        report = replay(recordings, backend, args.players, args.speed, args.spread, args.seed)
+        # Everything queued has been written once the backend is closed
+        backend.close()
+        io_after = _io_counters()
+        files = {name: os.path.getsize(os.path.join(workdir, name)) for name in sorted(os.listdir(workdir))}
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    if not report.events:
+        print("Nothing to replay.")
+        return
+    pace = f"{args.speed:g}x" if args.speed else "full speed"
+    print(f"{len(recordings)} recordings as {args.players} players at {pace}: {report.events} events "
+          f"({len(report.latencies[ROUND])} rounds, {len(report.latencies[GUESS])} guesses) in {report.elapsed:.2f}s "
+          f"({report.events / report.elapsed:,.0f} events/sec)")
+    for kind, name in EVENT_NAMES.items():
+        if report.latencies[kind]:
+            print(f"  {name:<8} ms: {format_percentiles(report.latencies[kind])}")
+    if report.lag:
+        print(f"  behind schedule on {len(report.lag)} events, ms: {format_percentiles(report.lag)}")
+    if io_before is not None and io_after is not None:
+        delta = {name: io_after[name] - io_before.get(name, 0) for name in io_after}
+        print(f"file I/O: wrote {_megabytes(delta.get('wchar', 0))} in {delta.get('syscw', 0)} calls, "
+              f"read {_megabytes(delta.get('rchar', 0))} in {delta.get('syscr', 0)} calls; "
+              f"disk {_megabytes(delta.get('write_bytes', 0))} written")
+    print("files: " + ", ".join(f"{name} {_megabytes(size)}" for name, size in files.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+import os
+import random
+import time
+
+from wordbank import bank_cache, normalize_difficulty, word_key
+
+# Spaced repetition: a word comes back BASE_INTERVAL * GROWTH ** box seconds after
+# the player last saw it, divided by one plus their misses on it. A win moves it up
+# a box, a miss sends it back to the first.
+BASE_INTERVAL = 60
+GROWTH = 3
+MAX_BOX = 10
+# Words a player hasn't seen yet fall due at random over this many seconds from when
+# their queue is built, so they mix with words coming back for review
+NEW_SPREAD = 600
+
+
+class ShuffleBag:
+    def __init__(self, rng):
+        self.rng = rng
+        self.members = set()
+        self.bag = []
+        self.pos = {}
+        self.last = None
+
+    def __len__(self):
+        return len(self.members)
+
+    def refill(self):
+        self.bag = list(self.members)
+        self.rng.shuffle(self.bag)
+        # Don't hand out the same word twice in a row across a cycle boundary
+        if len(self.bag) > 1 and self.bag[-1] == self.last:
+            self.bag[0], self.bag[-1] = self.bag[-1], self.bag[0]
+        self.pos = {key: i for i, key in enumerate(self.bag)}
+
+    def draw(self):
+        if not self.bag:
+            self.refill()
+            if not self.bag:
+                return None
+        key = self.bag.pop()
+        del self.pos[key]
+        self.last = key
+        return key
+
+    def add(self, key):
+        if key in self.members:
+            return
+        self.members.add(key)
+        # Drop the new word into a random slot of the current cycle
+        i = self.rng.randint(0, len(self.bag))
+        self.bag.append(key)
+        self.pos[key] = len(self.bag) - 1
+        self._swap(i, len(self.bag) - 1)
+
+    def remove(self, key):
+        self.members.discard(key)
+        i = self.pos.pop(key, None)
+        if i is None:
+            return
+        last = self.bag.pop()
+        if i < len(self.bag):
+            self.bag[i] = last
+            self.pos[last] = i
+
+    def _swap(self, i, j):
+        if i == j:
+            return
+        a, b = self.bag[i], self.bag[j]
+        self.bag[i], self.bag[j] = b, a
+        self.pos[b], self.pos[a] = i, j
+
+
+class IndexedHeap:
+    # Binary min-heap of keys by priority. Every key's slot is tracked, so changing
+    # or removing one priority is O(log n) instead of a rebuild.
+
+    def __init__(self, priorities=None):
+        self.priority = dict(priorities or ())
+        # A sorted list is already a valid heap
+        self.heap = sorted(self.priority, key=self.priority.__getitem__)
+        self.pos = {key: i for i, key in enumerate(self.heap)}
+
+    def __len__(self):
+        return len(self.heap)
+
+    def __contains__(self, key):
+        return key in self.pos
+
+    def peek(self):
+        return self.heap[0] if self.heap else None
+
+    def push(self, key, priority):
+        if key in self.pos:
+            old = self.priority[key]
+            self.priority[key] = priority
+            if priority < old:
+                self._up(self.pos[key])
+            else:
+                self._down(self.pos[key])
+            return
+        self.priority[key] = priority
+        self.heap.append(key)
+        self._up(len(self.heap) - 1)
+
+    def remove(self, key):
+        i = self.pos.pop(key, None)
+        if i is None:
+            return None
+        priority = self.priority.pop(key)
+        last = self.heap.pop()
+        if i < len(self.heap):
+            self.heap[i] = last
+            self.pos[last] = i
+            self._up(i)
+            self._down(self.pos[last])
+        return priority
+
+    def _up(self, i):
+        heap, pos, priority = self.heap, self.pos, self.priority
+        key = heap[i]
+        value = priority[key]
+        while i:
+            parent = (i - 1) >> 1
+            if priority[heap[parent]] <= value:
+                break
+            heap[i] = heap[parent]
+            pos[heap[i]] = i
+            i = parent
+        heap[i] = key
+        pos[key] = i
+
+    def _down(self, i):
+        heap, pos, priority = self.heap, self.pos, self.priority
+        n = len(heap)
+        key = heap[i]
+        value = priority[key]
+        while True:
+            child = 2 * i + 1
+            if child >= n:
+                break
+            if child + 1 < n and priority[heap[child + 1]] < priority[heap[child]]:
+                child += 1
+            if priority[heap[child]] >= value:
+                break
+            heap[i] = heap[child]
+            pos[heap[i]] = i
+            i = child
+        heap[i] = key
+        pos[key] = i
+
+
+class PlayerSchedule:
+    # One player's review state and a queue per difficulty tier, ordered by when
+    # each word is next due. Only the word just played is re-queued after a round.
+
+    def __init__(self, scheduler, player, reviews):
+        self.scheduler = scheduler
+        self.player = player
+        # word key -> [box, misses, plays, seen]
+        self.reviews = reviews
+        self.fresh = {}
+        self.queues = {}
+
+    def due(self, key):
+        review = self.reviews.get(key)
+        if review is None:
+            due = self.fresh.get(key)
+            if due is None:
+                due = self.fresh[key] = time.time() + self.scheduler.rng.random() * NEW_SPREAD
+            return due
+        box, misses, _, seen = review
+        return seen + BASE_INTERVAL * GROWTH ** box / (1 + misses)
+
+    def _queue(self, tier):
+        queue = self.queues.get(tier)
+        if queue is None:
+            keys = (word_key(entry['word']) for entry in self.scheduler.bank.words(tier))
+            queue = self.queues[tier] = IndexedHeap({key: self.due(key) for key in keys})
+        return queue
+
+    def build(self, tiers=(None,)):
+        # The named tiers' queues (None is the whole bank); draw() makes a missing one itself
+        for tier in tiers:
+            self._queue(None if tier is None else normalize_difficulty(tier))
+
+    def draw(self, tier, accept=None):
+        queue = self._queue(tier)
+        skipped = []
+        entry = None
+        while queue:
+            key = queue.peek()
+            found = self.scheduler.bank.find(key)
+            if found is None:
+                self.remove(key)
+            elif accept is None or accept(found):
+                entry = found
+                break
+            else:
+                # Rejected for this draw only
+                skipped.append((key, queue.remove(key)))
+        for key, due in skipped:
+            queue.push(key, due)
+        if entry is not None:
+            self.seen(key)
+        return entry
+
+    def seen(self, key):
+        # Drawn but not finished yet: don't hand it out again until it is due
+        review = self.reviews.setdefault(key, [0, 0, 0, 0.0])
+        review[3] = time.time()
+        self.fresh.pop(key, None)
+        self._requeue(key)
+
+    def record(self, word, won):
+        key = word_key(word)
+        review = self.reviews.setdefault(key, [0, 0, 0, 0.0])
+        if won:
+            review[0] = min(review[0] + 1, MAX_BOX)
+        else:
+            review[0] = 0
+            review[1] += 1
+        review[2] += 1
+        review[3] = time.time()
+        self.fresh.pop(key, None)
+        self._requeue(key)
+        store = self.scheduler.store
+        if store is not None:
+            store.record_review(key, review, self.player)
+
+    def _requeue(self, key):
+        due = self.due(key)
+        for queue in self.queues.values():
+            if key in queue:
+                queue.push(key, due)
+
+    def add(self, entry):
+        key = word_key(entry['word'])
+        for tier in (None, normalize_difficulty(entry.get('difficulty'))):
+            queue = self.queues.get(tier)
+            if queue is not None:
+                queue.push(key, self.due(key))
+
+    def remove(self, key):
+        for queue in self.queues.values():
+            queue.remove(key)
+
+
+class WordScheduler:
+    # Without a player, words come from shuffle bags: every word once per cycle.
+    # With one, from that player's spaced repetition queue, kept in store (a
+    # Leaderboard) between sessions when one is set.
+
+    def __init__(self, bank, seed=None, store=None):
+        self.bank = bank
+        self.rng = random.Random(seed)
+        self.store = store
+        self.bags = {}
+        self.players = {}
+        bank.listeners.append(self.on_bank_change)
+
+    def schedule(self, player):
+        schedule = self.players.get(player)
+        if schedule is None:
+            reviews = self.store.reviews(player) if self.store is not None else {}
+            schedule = self.players[player] = PlayerSchedule(self, player, reviews)
+        return schedule
+
+    def _bag(self, tier):
+        bag = self.bags.get(tier)
+        if bag is None:
+            bag = self.bags[tier] = ShuffleBag(self.rng)
+            for entry in self.bank.words(tier):
+                bag.members.add(word_key(entry['word']))
+        return bag
+
+    def draw(self, difficulty=None, accept=None, player=None):
+        tier = None if difficulty is None else normalize_difficulty(difficulty)
+        if player is not None:
+            return self.schedule(player).draw(tier, accept)
+        bag = self._bag(tier)
+        # Keys can outlive their entry if the bank was edited elsewhere, and callers
+        # may reject some words; either way give up after one pass over the bag
+        for _ in range(len(bag) + 1):
+            key = bag.draw()
+            if key is None:
+                return None
+            entry = self.bank.find(key)
+            if entry is None:
+                bag.remove(key)
+            elif accept is None or accept(entry):
+                return entry
+        return None
+
+    def record(self, word, won, player=None):
+        if player is not None:
+            self.schedule(player).record(word, won)
+
+    def on_bank_change(self, kind, old, new):
+        if kind == "reload":
+            self.bags.clear()
+            for schedule in self.players.values():
+                schedule.queues.clear()
+            return
+        if (old is not None and new is not None and word_key(old['word']) == word_key(new['word'])
+                and normalize_difficulty(old.get('difficulty')) == normalize_difficulty(new.get('difficulty'))):
+            return
+        if old is not None:
+            self._update(old, ShuffleBag.remove)
+            for schedule in self.players.values():
+                schedule.remove(word_key(old['word']))
+        if new is not None:
+            self._update(new, ShuffleBag.add)
+            for schedule in self.players.values():
+                schedule.add(new)
+
+    def _update(self, entry, method):
+        key = word_key(entry['word'])
+        for tier in (None, normalize_difficulty(entry.get('difficulty'))):
+            bag = self.bags.get(tier)
+            if bag is not None:
+                method(bag, key)
+
+
+get_scheduler = bank_cache(lambda bank: WordScheduler(bank, os.environ.get("WORDGUESS_SEED")))
@@ -0,0 +1,167 @@
+from bisect import bisect_left
+
+from wordbank import bank_cache, word_key
+
+GRAM = 3
+SEARCH_LIMIT = 200
+# Keys added or removed since the sorted list was last merged are kept aside until
+# there are this many (or 1/MERGE_RATIO of the bank), so an edit never moves the big list
+MERGE_AT = 4096
+MERGE_RATIO = 64
+
+
+def _grams(text):
+    return {text[i:i + GRAM] for i in range(len(text) - GRAM + 1)}
+
+
+class SearchIndex:
+    # Prefix search over words via a sorted key list, substring search over
+    # words and hints via a trigram index; both kept up to date from bank events.
+    # Edits to the key list go to a small delta (added keys) and a set of removed
+    # keys, which the prefix walk merges in on the fly
+
+    def __init__(self, bank):
+        self.bank = bank
+        self.texts = {}
+        self.grams = {}
+        self.keys = []
+        self._added = []
+        self._added_sorted = True
+        self._removed = set()
+        self._dirty = True
+        bank.listeners.append(self.on_bank_change)
+
+    def _rebuild(self):
+        self.texts = {}
+        self.grams = {}
+        for entry in self.bank.entries:
+            self._add(entry)
+        self.keys = sorted(self.texts)
+        self._added = []
+        self._added_sorted = True
+        self._removed = set()
+        self._dirty = False
+
+    def _add(self, entry):
+        key = word_key(entry['word'])
+        if key in self.texts:
+            self._remove(key)
+        text = f"{key}\n{str(entry.get('hint', '')).casefold()}"
+        self.texts[key] = text
+        for gram in _grams(text):
+            self.grams.setdefault(gram, set()).add(key)
+        if key in self._removed:
+            # Still in the sorted list
+            self._removed.discard(key)
+        else:
+            self._added.append(key)
+            self._added_sorted = False
+
+    def _remove(self, key):
+        text = self.texts.pop(key, None)
+        if text is None:
+            return
+        for gram in _grams(text):
+            postings = self.grams.get(gram)
+            if postings is not None:
+                postings.discard(key)
+                if not postings:
+                    del self.grams[gram]
+        i = bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            self._removed.add(key)
+        else:
+            self._added.remove(key)
+
+    def on_bank_change(self, kind, old, new):
+        if kind == "reload":
+            self._dirty = True
+            return
+        if self._dirty:
+            return
+        if old is not None:
+            self._remove(word_key(old['word']))
+        if new is not None:
+            self._add(new)
+
+    def build(self):
+        # Called from the managers' load jobs; otherwise the first keystroke pays for it
+        if self._dirty:
+            self._rebuild()
+
+    def matches(self, entry, query):
+        # Whether search(query) would find entry, limit aside; for patching a result list
+        query = query.strip().casefold()
+        key = word_key(entry['word'])
+        if key.startswith(query):
+            return True
+        return len(query) >= GRAM and query in f"{key}\n{str(entry.get('hint', '')).casefold()}"
+
+    def search(self, query, limit=SEARCH_LIMIT):
+        query = query.strip().casefold()
+        if not query:
+            return None
+        self.build()
+        found = self._prefix(query, limit)
+        if len(query) >= GRAM and len(found) < limit:
+            seen = set(found)
+            for key in self._substring(query):
+                if key not in seen:
+                    found.append(key)
+                    if len(found) >= limit:
+                        break
+        entries = []
+        for key in found:
+            entry = self.bank.find(key)
+            if entry is not None:
+                entries.append(entry)
+        return entries
+
+    def _merge(self):
+        # One linear pass once the delta is big enough; a bulk import is merged once
+        if len(self._added) + len(self._removed) > max(MERGE_AT, len(self.keys) // MERGE_RATIO):
+            removed = self._removed
+            self.keys = [key for key in self.keys if key not in removed] if removed else self.keys
+            self.keys.extend(self._added)
+            self.keys.sort()
+            self._added = []
+            self._removed = set()
+        elif not self._added_sorted:
+            self._added.sort()
+        self._added_sorted = True
+
+    def _prefix(self, query, limit):
+        self._merge()
+        keys, added, removed = self.keys, self._added, self._removed
+        found = []
+        i = bisect_left(keys, query)
+        j = bisect_left(added, query)
+        while len(found) < limit:
+            # Walks both sorted lists in step, skipping removed keys
+            if i < len(keys) and keys[i].startswith(query) and (j >= len(added) or keys[i] < added[j]):
+                if keys[i] not in removed:
+                    found.append(keys[i])
+                i += 1
+            elif j < len(added) and added[j].startswith(query):
+                found.append(added[j])
+                j += 1
+            else:
+                break
+        return found
+
+    def _substring(self, query):
+        postings = []
+        for gram in _grams(query):
+            keys = self.grams.get(gram)
+            if not keys:
+                return
+            postings.append(keys)
+        postings.sort(key=len)
+        smallest, rest = postings[0], postings[1:]
+        # Walk the rarest trigram's postings and stop as soon as the caller has enough
+        for key in smallest:
+            if all(key in keys for keys in rest) and query in self.texts[key]:
+                yield key
+
+
+get_search_index = bank_cache(SearchIndex)
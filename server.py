@@ -0,0 +1,349 @@
+import argparse
+import asyncio
+import json
+import secrets
+import time
+
+import metrics
+from anagram import get_anagram_index
+from engine import HangmanState, ScrambleRound, Score, PLAYING, WON, LOST, ROUND_SECONDS
+from history import HistoryLog, HISTORY_FILE
+from iowriter import get_writer, deliver_on
+from leaderboard import Leaderboard, LEADERBOARD_FILE
+from nearby import distance, get_nearby_index
+from scheduler import get_scheduler
+from timerwheel import TimerWheel
+from wordbank import JSON_FILE, get_bank, refresh_on
+
+HOST = "127.0.0.1"
+PORT = 8765
+MODES = ("hangman", "scramble")
+
+# Finished or abandoned sessions are dropped after this long without a request
+IDLE_SECONDS = 300
+
+
+class Session:
+    __slots__ = ("id", "mode", "player", "game", "score", "timer", "idle")
+
+    def __init__(self, session_id, mode, game, player=None):
+        self.id = session_id
+        self.mode = mode
+        # Named players get words from their own review queue; anonymous ones from the shuffle bags
+        self.player = player
+        self.game = game
+        self.score = Score()
+        self.timer = None
+        self.idle = None
+
+
+class GameServer:
+    def __init__(self, bank_path=JSON_FILE, history_path=HISTORY_FILE, tick=0.05, leaderboard_path=None):
+        self.wheel = TimerWheel(tick)
+        # History appends and leaderboard commits are written off the event loop
+        self.writer = deliver_on(get_writer(), self.wheel)
+        self.bank = get_bank(bank_path)
+        # Words added or edited by the managers reach new rounds; a locked bank is skipped
+        refresh_on(self.bank, self.wheel)
+        self.scheduler = get_scheduler(self.bank)
+        # Players' review state is kept here between runs of the server when set
+        self.leaderboard = Leaderboard(leaderboard_path, legacy_path=None, writer=self.writer) \
+            if leaderboard_path else None
+        if self.leaderboard is not None:
+            self.scheduler.store = self.leaderboard
+        self.anagrams = get_anagram_index(self.bank)
+        self.nearby = get_nearby_index(self.bank)
+        self.nearby.build()
+        self.history = HistoryLog(history_path, legacy_path=None, writer=self.writer) if history_path else None
+        self.sessions = {}
+        # Set to a list to record how long each request spends in the server
+        self.timings = None
+        self.handlers = {
+            "new": self.op_new,
+            "guess": self.op_guess,
+            "hint": self.op_hint,
+            "state": self.op_state,
+            "end": self.op_end,
+        }
+        metrics.collect("server", lambda: {"sessions": len(self.sessions)})
+
+    # Session lifecycle
+    def _touch(self, session):
+        if session.idle is not None:
+            session.idle.cancel()
+        session.idle = self.wheel.schedule(IDLE_SECONDS, self._expire, session.id)
+
+    def _expire(self, session_id):
+        session = self.sessions.pop(session_id, None)
+        if session is not None and session.timer is not None:
+            session.timer.cancel()
+
+    def _time_up(self, session):
+        if session.mode == "hangman":
+            session.game.timeout()
+        self.scheduler.record(session.game.word, False, session.player)
+
+    def _start_round(self, session, difficulty):
+        if session.mode == "hangman":
+            entry = self.scheduler.draw(difficulty, player=session.player)
+            session.game = entry and HangmanState(entry['word'])
+        else:
+            entry = self.scheduler.draw(difficulty, accept=lambda e: self.anagrams.is_scrambleable(e['word']),
+                                        player=session.player)
+            session.game = entry and ScrambleRound(entry)
+        if session.game is None:
+            return False
+        if session.timer is not None:
+            session.timer.cancel()
+        session.timer = self.wheel.schedule(ROUND_SECONDS, self._time_up, session)
+        return True
+
+    def _state(self, session):
+        game = session.game
+        state = {"session": session.id, "mode": session.mode, "score": session.score.score,
+                 "time_left": round(self.wheel.remaining(session.timer), 1)}
+        if session.mode == "hangman":
+            state.update(pattern=game.pattern(), attempts_left=game.attempts_left, status=game.status)
+            if game.status != PLAYING:
+                state["word"] = game.word
+        else:
+            state.update(scrambled=game.scrambled, solved=game.solved)
+            if state["time_left"] <= 0 and not game.solved:
+                state["word"] = game.word
+        return state
+
+    def _session(self, request):
+        session = self.sessions.get(request.get("session"))
+        if session is None:
+            raise LookupError("unknown session")
+        self._touch(session)
+        return session
+
+    # Operations
+    def op_new(self, request):
+        mode = request.get("mode", "scramble")
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {', '.join(MODES)}")
+        player = request.get("player")
+        session = Session(secrets.token_hex(8), mode, None, player and str(player))
+        if not self._start_round(session, request.get("difficulty")):
+            raise LookupError("no words for that difficulty")
+        self.sessions[session.id] = session
+        self._touch(session)
+        return self._state(session)
+
+    def op_guess(self, request):
+        session = self._session(request)
+        guess = str(request.get("guess", ""))
+        if self.wheel.remaining(session.timer) <= 0:
+            return dict(self._state(session), result="time_up")
+        extra = {}
+        if session.mode == "hangman":
+            if session.game.status != PLAYING:
+                return dict(self._state(session), result="finished")
+            result = session.game.guess(guess)
+            if result == WON:
+                session.score.add(session.game.attempts_left)
+        else:
+            if session.game.solved:
+                return dict(self._state(session), result="finished")
+            correct = session.game.check(guess)
+            if correct:
+                session.score.add(session.game.points())
+                result = "correct"
+            elif self.anagrams.is_other_anagram(guess, session.game.word):
+                result = "other_anagram"
+            elif distance(guess, session.game.word) == 1:
+                result = "close"
+            else:
+                result = "wrong"
+                suggestion = self.nearby.near(guess, limit=1)
+                if suggestion:
+                    extra["did_you_mean"] = suggestion[0]
+            if self.history is not None:
+                self.history.append(session.game.word, guess.strip().lower(), correct, session.game.difficulty,
+                                    session.player, ROUND_SECONDS - self.wheel.remaining(session.timer))
+        if result in (WON, LOST, "correct"):
+            session.timer.cancel()
+            self.scheduler.record(session.game.word, result != LOST, session.player)
+        return dict(self._state(session), result=result, **extra)
+
+    def op_hint(self, request):
+        session = self._session(request)
+        if session.mode != "scramble":
+            raise ValueError("hints are only available in scramble mode")
+        if session.game.solved or self.wheel.remaining(session.timer) <= 0:
+            return dict(self._state(session), result="finished")
+        penalty = session.game.use_hint()
+        session.score.add(-penalty)
+        return dict(self._state(session), hint=session.game.hint, penalty=penalty)
+
+    def op_state(self, request):
+        session = self._session(request)
+        if request.get("next"):
+            game = session.game
+            unfinished = game.status == PLAYING if session.mode == "hangman" else not game.solved
+            if unfinished and self.wheel.remaining(session.timer) > 0:
+                # Skipped before time ran out; the scheduler treats it as a miss (as the app does)
+                self.scheduler.record(game.word, False, session.player)
+            if not self._start_round(session, request.get("difficulty")):
+                raise LookupError("no words for that difficulty")
+        return self._state(session)
+
+    def op_end(self, request):
+        session = self._session(request)
+        self._expire(session.id)
+        session.idle.cancel()
+        return {"session": session.id, "score": session.score.score}
+
+    @metrics.timed("server_request")
+    def handle(self, request):
+        handler = self.handlers.get(request.get("op"))
+        metrics.count("server_requests", op=request.get("op") if handler else "unknown")
+        if handler is None:
+            return {"ok": False, "error": f"unknown op '{request.get('op')}'"}
+        try:
+            response = handler(request)
+        except (LookupError, ValueError) as e:
+            return {"ok": False, "error": str(e)}
+        response["ok"] = True
+        return response
+
+    # Networking
+    async def serve_client(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                started = time.perf_counter()
+                try:
+                    request = json.loads(line)
+                except json.JSONDecodeError:
+                    response = {"ok": False, "error": "invalid JSON"}
+                else:
+                    response = self.handle(request) if isinstance(request, dict) else \
+                        {"ok": False, "error": "request must be an object"}
+                    if isinstance(request, dict) and "id" in request:
+                        response["id"] = request["id"]
+                writer.write(json.dumps(response).encode() + b"\n")
+                if self.timings is not None:
+                    self.timings.append(time.perf_counter() - started)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def run_timers(self):
+        # The single timer driver for every session on this server
+        while True:
+            await asyncio.sleep(self.wheel.tick)
+            self.wheel.advance()
+
+    async def start(self, host=HOST, port=PORT):
+        self._timer_task = asyncio.create_task(self.run_timers())
+        return await asyncio.start_server(self.serve_client, host, port, limit=1 << 16)
+
+    def close(self):
+        self._timer_task.cancel()
+        if self.history is not None:
+            self.history.close()
+        if self.leaderboard is not None:
+            self.leaderboard.close()
+
+
+class GameClient:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def connect(cls, host=HOST, port=PORT):
+        return cls(*await asyncio.open_connection(host, port))
+
+    async def request(self, op, **fields):
+        self.writer.write(json.dumps(dict(fields, op=op)).encode() + b"\n")
+        await self.writer.drain()
+        return json.loads(await self.reader.readline())
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+async def _bench_client(client, mode, count, latencies):
+    async def timed(op, **fields):
+        started = time.perf_counter()
+        response = await client.request(op, **fields)
+        latencies.append(time.perf_counter() - started)
+        return response
+
+    # Open every session first so the guesses are measured with all of them live
+    sessions = [(await timed("new", mode=mode))["session"] for _ in range(count)]
+    for letter in "etaoinshr":
+        for session in sessions:
+            await timed("guess", session=session, guess=letter)
+    for session in sessions:
+        await client.request("end", session=session)
+
+
+async def bench(sessions, connections, mode, host, port, history_path):
+    server = GameServer(history_path=history_path)
+    server.timings = []
+    listener = await server.start(host, port)
+    port = listener.sockets[0].getsockname()[1]
+    clients = [await GameClient.connect(host, port) for _ in range(connections)]
+    latencies = []
+    per_client = max(1, sessions // connections)
+    started = time.perf_counter()
+    await asyncio.gather(*(_bench_client(c, mode, per_client, latencies) for c in clients))
+    elapsed = time.perf_counter() - started
+    live = len(server.sessions)
+    for client in clients:
+        await client.close()
+    listener.close()
+    await listener.wait_closed()
+    server.close()
+
+    print(f"{per_client * connections} sessions over {connections} connections, "
+          f"{len(latencies)} requests in {elapsed:.2f}s ({len(latencies) / elapsed:,.0f} req/sec), {live} left open")
+    # Round trips include the clients, which share this process and event loop
+    print(f"round trip ms:  {metrics.format_percentiles(latencies)}")
+    print(f"server time ms: {metrics.format_percentiles(server.timings)}")
+
+
+async def serve(host, port, bank_path):
+    server = GameServer(bank_path, leaderboard_path=LEADERBOARD_FILE)
+    listener = await server.start(host, port)
+    print(f"Word guess server listening on {host}:{port}")
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        server.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Multi-player word guess server (JSON lines over TCP)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve_cmd = commands.add_parser("serve", help="run the game server")
+    serve_cmd.add_argument("--host", default=HOST)
+    serve_cmd.add_argument("--port", type=int, default=PORT)
+    serve_cmd.add_argument("--bank", default=JSON_FILE)
+    bench_cmd = commands.add_parser("bench", help="load-test an in-process server with local clients")
+    bench_cmd.add_argument("--sessions", type=int, default=10000)
+    bench_cmd.add_argument("--connections", type=int, default=200)
+    bench_cmd.add_argument("--mode", choices=MODES, default="hangman")
+    bench_cmd.add_argument("--history", default=None, help="also append scramble guesses to this log")
+    args = parser.parse_args(argv)
+
+    metrics.start()
+    if args.command == "serve":
+        asyncio.run(serve(args.host, args.port, args.bank))
+    else:
+        asyncio.run(bench(args.sessions, args.connections, args.mode, HOST, 0, args.history))
+
+
+if __name__ == "__main__":
+    main()
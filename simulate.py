@@ -0,0 +1,266 @@
+import argparse
+import csv
+import math
+import os
+import random
+import re
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from anagram import signature
+from compiledbank import CompiledBank, COMPILED_SUFFIX
+from engine import HangmanState, MAX_ATTEMPTS, WON, LOST, letter_bit, letter_mask, play_hangman
+from wordbank import JSON_FILE, current_snapshot, get_bank, journal_pending, normalize_difficulty
+
+ENGLISH_ORDER = "etaoinshrdlcumwfgypbvkjxqz"
+ENGLISH_BITS = [letter_bit(ch) for ch in ENGLISH_ORDER]
+
+# Candidate pools per word length are sampled down to this size so the adaptive
+# strategies stay bounded on banks with hundreds of thousands of words per length
+MAX_POOL = 2000
+SHARED_STATE = 64
+MEMO_LIMIT = 500000
+
+HANGMAN_STRATEGIES = {}
+SCRAMBLE_STRATEGIES = {}
+
+
+def hangman_strategy(name):
+    def register(fn):
+        HANGMAN_STRATEGIES[name] = fn
+        return fn
+    return register
+
+
+def scramble_strategy(name):
+    def register(fn):
+        SCRAMBLE_STRATEGIES[name] = fn
+        return fn
+    return register
+
+
+def _unguessed(guessed):
+    return [ch for ch in ENGLISH_ORDER if not guessed & letter_bit(ch)]
+
+
+@hangman_strategy("frequency")
+def frequency_guess(candidates, guessed):
+    counts = Counter(ch for word in candidates for ch in set(word))
+    best = None
+    for ch in _unguessed(guessed):
+        if counts[ch] and (best is None or counts[ch] > counts[best]):
+            best = ch
+    return best
+
+
+@hangman_strategy("static")
+def static_guess(candidates, guessed):
+    # Plain English letter frequency, ignoring the bank; solved with the engine's fast path
+    return None
+
+
+@hangman_strategy("entropy")
+def entropy_guess(candidates, guessed):
+    total = len(candidates)
+    best, best_score = None, -1.0
+    for ch in _unguessed(guessed):
+        # Partition candidates by where the letter would be revealed
+        buckets = Counter(tuple(i for i, c in enumerate(word) if c == ch) for word in candidates)
+        if len(buckets) == 1 and () in buckets:
+            continue
+        score = -sum(n / total * math.log2(n / total) for n in buckets.values())
+        if score > best_score:
+            best, best_score = ch, score
+    return best
+
+
+class HangmanSolver:
+    def __init__(self, words, strategy="frequency", max_pool=MAX_POOL, seed=0):
+        self.choose = HANGMAN_STRATEGIES[strategy]
+        self.static = strategy == "static"
+        rng = random.Random(seed)
+        pools = {}
+        for word in words:
+            pools.setdefault(len(word), []).append(word.lower())
+        self.pools = {n: (rng.sample(pool, max_pool) if len(pool) > max_pool else pool)
+                      for n, pool in pools.items()}
+        # Members of the pools that were sampled down, to tell which words were left out
+        self.sampled = {n: set(self.pools[n]) for n, pool in pools.items() if len(pool) > max_pool}
+        self.memo = {}
+
+    def next_letter(self, pattern, guessed, candidates, target=None):
+        # Every game that reaches the same revealed pattern makes the same choice.
+        # Big candidate lists belong to early states shared by many games, so they
+        # are memoized too; small ones are narrowed from the game's last superset.
+        # target is the game's word when sampling left it out of the pool: it joins
+        # every small list, so the choice never loses track of the answer (one word
+        # more barely moves the choice on a big list)
+        key = (pattern, guessed)
+        found = self.memo.get(key)
+        if found is not None and (found[1] is not None or target is None):
+            return found[0], found[1] or candidates
+        letters = ''.join(ch for ch in ENGLISH_ORDER if guessed & letter_bit(ch))
+        hidden = f"[^{letters}]" if letters else "."
+        rx = re.compile(''.join(hidden if ch == '_' else re.escape(ch) for ch in pattern))
+        candidates = [word for word in candidates if rx.fullmatch(word)]
+        if found is None:
+            letter = (self.choose(candidates, guessed) if candidates else None) or _unguessed(guessed)[0]
+            if len(self.memo) >= MEMO_LIMIT:
+                self.memo.clear()
+            found = self.memo[key] = (letter, candidates if len(candidates) > SHARED_STATE else None)
+        if target is not None and found[1] is None:
+            return self.choose(candidates + [target], guessed) or _unguessed(guessed)[0], candidates
+        return found[0], found[1] or candidates
+
+    def play(self, word):
+        word = word.lower()
+        if self.static:
+            return play_hangman(letter_mask(word), ENGLISH_BITS)
+        game = HangmanState(word)
+        candidates = self.pools.get(len(word), ())
+        sampled = self.sampled.get(len(word))
+        target = word if sampled is not None and word not in sampled else None
+        guesses = 0
+        while True:
+            pattern = ''.join(ch if game.revealed(ch) else '_' for ch in word)
+            letter, candidates = self.next_letter(pattern, game.guessed, candidates, target)
+            result = game.guess(letter)
+            guesses += 1
+            if result == WON:
+                return True, guesses
+            if result == LOST:
+                return False, guesses
+
+
+@scramble_strategy("bank-order")
+def bank_order(candidates, rng):
+    return candidates
+
+
+@scramble_strategy("random")
+def random_order(candidates, rng):
+    candidates = list(candidates)
+    rng.shuffle(candidates)
+    return candidates
+
+
+class ScrambleSolver:
+    # The player knows the letters, so the candidates are the bank's anagrams of the scramble
+    def __init__(self, words, strategy="bank-order", seed=0):
+        self.order = SCRAMBLE_STRATEGIES[strategy]
+        self.rng = random.Random(seed)
+        self.anagrams = {}
+        for word in words:
+            self.anagrams.setdefault(signature(word), []).append(word.lower())
+
+    def play(self, word, attempts=MAX_ATTEMPTS):
+        word = word.lower()
+        order = self.order(self.anagrams.get(signature(word), [word]), self.rng)
+        for guesses, candidate in enumerate(order[:attempts], 1):
+            if candidate == word:
+                return True, guesses
+        return False, min(attempts, len(order))
+
+
+_solver = None
+
+
+def _bank_words(path):
+    # Workers only need the words. A compiled snapshot with nothing journaled on top
+    # is read from the mapped file, whose pages every worker shares, instead of
+    # each one loading and indexing the whole bank
+    snapshot = current_snapshot(path)
+    if snapshot.endswith(COMPILED_SUFFIX) and not journal_pending(path):
+        view = CompiledBank(snapshot)
+        try:
+            return view.words()
+        finally:
+            view.close()
+    return [entry['word'] for entry in get_bank(path).entries]
+
+
+def _init_worker(path, mode, strategy, seed):
+    global _solver
+    words = _bank_words(path)
+    if mode == "hangman":
+        _solver = HangmanSolver(words, strategy, seed=seed)
+    else:
+        _solver = ScrambleSolver(words, strategy, seed=seed)
+
+
+def _play_chunk(chunk):
+    return [(word, difficulty) + _solver.play(word) for word, difficulty in chunk]
+
+
+class Report:
+    def __init__(self):
+        self.words = {}
+        self.difficulties = {}
+        self.games = 0
+        self.elapsed = 0.0
+
+    def add(self, word, difficulty, won, guesses):
+        self.games += 1
+        for table, key in ((self.words, word), (self.difficulties, difficulty)):
+            stats = table.setdefault(key, [0, 0, 0])
+            stats[0] += 1
+            stats[1] += won
+            stats[2] += guesses
+
+
+def simulate(path=JSON_FILE, mode="hangman", strategy="frequency", workers=None, chunk_size=2000, seed=0):
+    entries = get_bank(path).entries
+    jobs = [(entry['word'], normalize_difficulty(entry.get('difficulty'))) for entry in entries]
+    chunks = [jobs[i:i + chunk_size] for i in range(0, len(jobs), chunk_size)]
+    report = Report()
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(path, mode, strategy, seed)) as pool:
+        for results in pool.map(_play_chunk, chunks):
+            for word, difficulty, won, guesses in results:
+                report.add(word, difficulty, won, guesses)
+    report.elapsed = time.perf_counter() - started
+    return report
+
+
+def _summary(stats):
+    games, wins, guesses = stats
+    return f"{games:>9} games  win rate {wins / games:6.1%}  mean guesses {guesses / games:5.2f}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play the whole word bank headlessly and report win rates")
+    parser.add_argument("--bank", default=JSON_FILE)
+    parser.add_argument("--mode", choices=["hangman", "scramble"], default="hangman")
+    parser.add_argument("--strategy", help="hangman: %s; scramble: %s" % (
+        ", ".join(sorted(HANGMAN_STRATEGIES)), ", ".join(sorted(SCRAMBLE_STRATEGIES))))
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--chunk-size", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--per-word", metavar="CSV", help="write per-word results to this file")
+    args = parser.parse_args(argv)
+
+    strategies = HANGMAN_STRATEGIES if args.mode == "hangman" else SCRAMBLE_STRATEGIES
+    strategy = args.strategy or next(iter(strategies))
+    if strategy not in strategies:
+        parser.error(f"unknown {args.mode} strategy '{strategy}'")
+
+    report = simulate(args.bank, args.mode, strategy, args.workers, args.chunk_size, args.seed)
+    print(f"{args.mode} / {strategy}: {report.games} games in {report.elapsed:.2f}s "
+          f"({report.games / report.elapsed:,.0f} games/sec)")
+    for difficulty in sorted(report.difficulties):
+        print(f"  {difficulty or '(none)':<8} {_summary(report.difficulties[difficulty])}")
+
+    if args.per_word:
+        with open(args.per_word, 'w', newline='') as f:
+            # Words can hold commas or quotes, so the rows go through the csv module
+            out = csv.writer(f)
+            out.writerow(["word", "games", "wins", "win_rate", "mean_guesses"])
+            for word, (games, wins, guesses) in report.words.items():
+                out.writerow([word, games, wins, f"{wins / games:.4f}", f"{guesses / games:.3f}"])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,27 @@
+import sys
+import time
+
+# Front ends import this first, so it is as close to launch as can be measured here
+LAUNCHED = time.perf_counter()
+
+
+class StartupTimer:
+    # Collects named milestones since launch and prints them on one line once
+    # every milestone in `until` has been reached
+
+    def __init__(self, name, until=()):
+        self.name = name
+        self.until = set(until)
+        self.marks = []
+        self.reported = False
+
+    def mark(self, label):
+        self.marks.append((label, time.perf_counter() - LAUNCHED))
+        self.until.discard(label)
+        if not self.until and not self.reported:
+            self.report()
+
+    def report(self, file=sys.stderr):
+        self.reported = True
+        marks = ", ".join(f"{label} {seconds * 1000:.0f} ms" for label, seconds in self.marks)
+        print(f"{self.name} startup: {marks}", file=file)
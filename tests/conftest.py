@@ -0,0 +1,41 @@
+import json
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from wordbank import WordBank
+
+WORDS = [
+    {"word": "lantern", "hint": "Carried light", "difficulty": "easy"},
+    {"word": "harbor", "hint": "Where ships rest", "difficulty": "medium"},
+    {"word": "quartz", "hint": "A hard mineral", "difficulty": "hard"},
+    {"word": "listen", "hint": "Pay attention to a sound", "difficulty": "easy"},
+    {"word": "silent", "hint": "Making no sound", "difficulty": "medium"},
+]
+
+
+@pytest.fixture
+def bank_path(tmp_path):
+    path = str(tmp_path / "words.json")
+    with open(path, 'w') as f:
+        json.dump(WORDS, f)
+    return path
+
+
+@pytest.fixture
+def open_bank(bank_path):
+    # Each call is a separate WordBank on the same files, as another process would have
+    banks = []
+
+    def open_bank():
+        bank = WordBank(bank_path).refresh()
+        banks.append(bank)
+        return bank
+    yield open_bank
+    for bank in banks:
+        bank.close()
@@ -0,0 +1,72 @@
+import pytest
+
+import compiledbank
+from compiledbank import CompiledBank, CompiledFormatError
+
+ENTRIES = [
+    {"word": "lantern", "hint": "Carried light", "difficulty": "easy"},
+    {"word": "café", "hint": "Serves crème brûlée", "difficulty": "medium"},
+    {"word": "quartz", "hint": "", "difficulty": "easy"},
+    {"word": "harbor", "hint": "Where ships rest"},
+]
+
+
+def _dump(tmp_path, entries, name="words.wgb"):
+    path = str(tmp_path / name)
+    with open(path, 'wb') as f:
+        compiledbank.dump(entries, f)
+    return path
+
+
+def test_dump_load_round_trip(tmp_path):
+    path = _dump(tmp_path, ENTRIES)
+    assert compiledbank.load(path) == ENTRIES
+    bank = CompiledBank(path)
+    assert len(bank) == 4
+    assert bank.difficulties == ["easy", "medium"]
+    assert bank.words() == [entry["word"] for entry in ENTRIES]
+    assert [bank[i] for i in range(len(bank))] == ENTRIES
+    assert bank[-1] == ENTRIES[-1]
+    assert bank.word(1) == "café" and bank.hint(1) == "Serves crème brûlée"
+    assert bytes(bank.word_bytes(1)) == "café".encode('utf-8')
+    assert bank.difficulty(2) == "easy" and bank.difficulty(3) is None
+    with pytest.raises(IndexError):
+        bank[4]
+    bank.close()
+    assert compiledbank.load(_dump(tmp_path, [], "empty.wgb")) == []
+
+
+def test_bad_files_are_rejected(tmp_path):
+    with pytest.raises(CompiledFormatError):
+        _dump(tmp_path, [{"word": "nul\0word", "hint": ""}], "nul.wgb")
+    short = tmp_path / "short.wgb"
+    short.write_bytes(b"WGBK")
+    with pytest.raises(CompiledFormatError):
+        CompiledBank(str(short))
+    with open(_dump(tmp_path, ENTRIES), 'rb') as f:
+        data = f.read()
+    wrong = tmp_path / "wrong.wgb"
+    wrong.write_bytes(b"JSON" + data[4:])
+    with pytest.raises(CompiledFormatError):
+        CompiledBank(str(wrong))
+    truncated = tmp_path / "truncated.wgb"
+    truncated.write_bytes(data[:compiledbank.HEADER.size + 20])
+    with pytest.raises(CompiledFormatError):
+        CompiledBank(str(truncated))
+
+
+def test_compiled_snapshot_replaces_the_json_one(open_bank, bank_path):
+    bank = open_bank()
+    bank.add({"word": "meadow", "hint": "A grassy field", "difficulty": "hard"})
+    expected = list(bank.entries)
+    # What `wordbank.py compile` and `decompile` do
+    bank.snapshot_path = bank.compiled_path
+    bank.save()
+    reopened = open_bank()
+    assert reopened.snapshot_path == bank.compiled_path
+    assert reopened.entries == expected
+    reopened.snapshot_path = bank_path
+    reopened.save()
+    reopened = open_bank()
+    assert reopened.snapshot_path == bank_path
+    assert reopened.entries == expected
@@ -0,0 +1,85 @@
+import random
+
+from engine import (HangmanState, Score, ScrambleRound, INVALID, REPEATED, HIT, MISS, WON, LOST, PLAYING,
+                    letter_mask, play_hangman, scramble)
+
+
+def test_hangman_win_scores_attempts_left():
+    game = HangmanState("Harbor", attempts=3)
+    assert game.guess("z") == MISS
+    assert game.guess("Z") == REPEATED
+    assert game.guess("zz") == INVALID
+    assert game.guess("1") == INVALID
+    assert game.pattern() == "_ _ _ _ _ _"
+    for letter in "hab":
+        assert game.guess(letter) == HIT
+    assert game.pattern() == "H a _ b _ _"
+    assert game.guess("o") == HIT
+    assert game.guess("r") == WON
+    assert game.status == WON
+    assert game.wrong_letters == letter_mask("z")
+    score = Score(high_score=1)
+    assert score.add(game.attempts_left)
+    assert score.score == score.high_score == 2
+
+
+def test_hangman_loses_when_attempts_run_out():
+    game = HangmanState("quartz", attempts=2)
+    assert game.guess("e") == MISS
+    assert game.guess("i") == LOST
+    assert game.status == LOST
+    game = HangmanState("quartz")
+    game.timeout()
+    assert game.status == LOST
+
+
+def test_play_hangman_matches_guessing_one_letter_at_a_time():
+    rng = random.Random(3)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    for word in ["lantern", "harbor", "quartz", "listen", "aaa"]:
+        order = rng.sample(letters, len(letters))
+        game = HangmanState(word)
+        guesses = 0
+        for letter in order:
+            if game.status != PLAYING:
+                break
+            game.guess(letter)
+            guesses += 1
+        won, played = play_hangman(letter_mask(word), [letter_mask(letter) for letter in order])
+        assert won == (game.status == WON)
+        assert played == guesses
+
+
+def test_scramble_differs_from_the_word():
+    rng = random.Random(5)
+    for word in ["ab", "Listen", "silent", "aab"]:
+        for _ in range(50):
+            scrambled = scramble(word, rng)
+            assert scrambled.lower() != word.lower()
+            assert sorted(scrambled) == sorted(word)
+    assert scramble("aaa") is None
+    assert scramble("AaA") is None
+
+
+def test_scramble_round_scores_once_and_charges_easy_hints():
+    easy = ScrambleRound({"word": "Listen", "hint": "Pay attention to a sound", "difficulty": "easy"}, random.Random(1))
+    assert easy.scrambled.lower() != "listen"
+    assert not easy.check("silent")
+    assert easy.check(" LISTEN ")
+    assert not easy.check("listen")
+    assert easy.points() == 10
+    assert easy.use_hint() == 5
+    assert easy.hint_used
+    hard = ScrambleRound({"word": "aaa", "hint": "", "difficulty": "Hard"})
+    assert hard.scrambled == "aaa"
+    assert hard.points() == 20
+    assert hard.use_hint() == 0
+
+
+def test_score_never_goes_below_zero():
+    score = Score(high_score=15)
+    assert not score.add(10)
+    assert not score.add(-25)
+    assert score.score == 0
+    assert score.add(20)
+    assert score.high_score == 20
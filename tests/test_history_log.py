@@ -0,0 +1,50 @@
+import json
+import os
+
+from history import HistoryLog
+
+
+def _legacy(tmp_path, records):
+    path = str(tmp_path / "history.json")
+    with open(path, 'w') as f:
+        json.dump(records, f)
+    return path
+
+
+def test_read_only_counts_legacy_records_without_migrating(tmp_path):
+    legacy = _legacy(tmp_path, [
+        {"word": "harbor", "guess": "harbor", "result": "Correct", "difficulty": "medium"},
+        {"word": "harbor", "guess": "harper", "result": "Wrong", "difficulty": "medium"},
+        {"word": "quartz", "guess": "quarts", "result": "Wrong"},
+    ])
+    path = str(tmp_path / "history.jsonl")
+    history = HistoryLog(path, legacy_path=legacy, read_only=True)
+    assert history.win_rate("harbor") == 0.5
+    assert history.win_rate("quartz") == 0.0
+    assert history.difficulty_win_rate("medium") == 0.5
+    assert len(history.recent) == 3
+    history.close()
+    assert not os.path.exists(path)
+    assert not os.path.exists(path + ".stats")
+
+
+def test_legacy_records_are_migrated_once(tmp_path):
+    legacy = _legacy(tmp_path, [{"word": "harbor", "guess": "harbor", "result": "Correct"}])
+    path = str(tmp_path / "history.jsonl")
+    history = HistoryLog(path, legacy_path=legacy)
+    history.append("harbor", "harper", False)
+    history.close()
+    reopened = HistoryLog(path, legacy_path=legacy)
+    assert reopened.win_rate("harbor") == 0.5
+    assert [record["guess"] for record in reopened.recent] == ["harbor", "harper"]
+
+
+def test_words_are_counted_case_folded(tmp_path):
+    path = str(tmp_path / "history.jsonl")
+    history = HistoryLog(path, legacy_path=None)
+    history.append("Byzantine", "byzantine", True)
+    history.append("byzantine", "bizantine", False)
+    assert history.win_rate("BYZANTINE") == 0.5
+    history.close()
+    # The checkpoint and a rescan of the log agree
+    assert HistoryLog(path, legacy_path=None).word_stats == {"byzantine": [1, 2]}
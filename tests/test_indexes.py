@@ -0,0 +1,107 @@
+import json
+import random
+
+import pytest
+
+import search
+from candidates import CandidateIndex
+from nearby import NearbyIndex, distance
+from search import GRAM, SearchIndex
+from wordbank import WordBank, word_key
+
+# A small alphabet so words have plenty of near neighbours and shared trigrams
+LETTERS = "abcdef"
+
+
+@pytest.fixture
+def banks(tmp_path):
+    rng = random.Random(7)
+    words = sorted({"".join(rng.choices(LETTERS, k=rng.randint(3, 6))) for _ in range(400)})
+    path = str(tmp_path / "words.json")
+    with open(path, 'w') as f:
+        json.dump([{"word": word, "hint": f"hint {word[::-1]}", "difficulty": "easy"} for word in words], f)
+    a, b = WordBank(path).refresh(), WordBank(path).refresh()
+    yield a, b
+    a.close()
+    b.close()
+
+
+def _edit_elsewhere(bank, rng):
+    # Adds, edits and deletes by another instance, picked up by a refresh of the first
+    for i in range(40):
+        word = "".join(rng.choices(LETTERS, k=rng.randint(3, 6)))
+        entry = bank.find(word)
+        if entry is None:
+            bank.add({"word": word, "hint": f"added {i}", "difficulty": "hard"})
+        elif i % 2:
+            bank.delete(bank.index_of(entry))
+        else:
+            bank.replace(bank.index_of(entry), {"word": word + "z", "hint": f"edited {i}", "difficulty": "medium"})
+
+
+def _queries(rng):
+    return ["".join(rng.choices(LETTERS, k=rng.randint(1, 5))) for _ in range(60)]
+
+
+@pytest.mark.parametrize("merge_at", [search.MERGE_AT, 3])
+def test_search_matches_brute_force(banks, monkeypatch, merge_at):
+    # A tiny MERGE_AT merges the delta of added and removed keys on nearly every search
+    monkeypatch.setattr(search, "MERGE_AT", merge_at)
+    a, b = banks
+    index = SearchIndex(a)
+    rng = random.Random(1)
+
+    def check():
+        for query in _queries(rng):
+            expected = {word_key(entry['word']) for entry in a.entries
+                        if word_key(entry['word']).startswith(query)
+                        or (len(query) >= GRAM and query in f"{word_key(entry['word'])}\n{entry['hint'].casefold()}")}
+            found = index.search(query, limit=len(a))
+            assert {word_key(entry['word']) for entry in found} == expected
+        assert index.search("  ") is None
+    check()
+    _edit_elsewhere(b, rng)
+    a.refresh()
+    check()
+
+
+def test_nearby_matches_brute_force(banks):
+    a, b = banks
+    index = NearbyIndex(a)
+    rng = random.Random(2)
+
+    def check():
+        for query in _queries(rng):
+            for k in (1, 2):
+                expected = {entry['word'] for entry in a.entries if distance(query, entry['word']) <= k}
+                assert set(index.near(query, k)) == expected
+    check()
+    _edit_elsewhere(b, rng)
+    a.refresh()
+    check()
+
+
+def _fits(candidate, word, guessed):
+    return len(candidate) == len(word) and all(
+        c == w if w in guessed else c not in guessed for c, w in zip(candidate, word))
+
+
+def test_candidates_match_brute_force(banks):
+    a, b = banks
+    index = CandidateIndex(a)
+    rng = random.Random(3)
+
+    def play():
+        word = rng.choice(a.entries)['word']
+        candidates = index.track(word)
+        guessed = set()
+        for letter in rng.sample(LETTERS, len(LETTERS)):
+            guessed.add(letter)
+            count = candidates.guess(letter)
+            assert count == sum(_fits(entry['word'], word, guessed) for entry in a.entries)
+    for _ in range(20):
+        play()
+    _edit_elsewhere(b, rng)
+    a.refresh()
+    for _ in range(20):
+        play()
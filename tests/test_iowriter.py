@@ -0,0 +1,82 @@
+import threading
+
+import pytest
+
+from iowriter import IOWriter
+
+
+@pytest.fixture
+def writer():
+    writer = IOWriter()
+    yield writer
+    writer.close()
+
+
+def _hold(writer):
+    # Keeps the writer thread busy until the returned event is set, so jobs queue up behind it
+    started, release = threading.Event(), threading.Event()
+
+    def block():
+        started.set()
+        release.wait(5)
+    writer.submit("hold", block)
+    assert started.wait(5)
+    return release
+
+
+def test_submit_replaces_a_queued_job_with_the_same_key(writer):
+    done = []
+    release = _hold(writer)
+    for contents in ("a", "b", "c"):
+        writer.submit("words.json", done.append, contents, callback=lambda result, error: done.append("saved"))
+    writer.submit("other", done.append, "x")
+    release.set()
+    writer.flush()
+    # One write of the latest contents, still ahead of the job queued after it; every callback runs
+    assert done == ["c", "x", "saved", "saved", "saved"]
+    assert writer.coalesced == 2
+    assert writer.written == 3
+
+
+def test_batch_joins_only_the_last_queued_job(writer):
+    batches = []
+    release = _hold(writer)
+    writer.batch("log", batches.append, 1)
+    writer.batch("log", batches.append, 2)
+    writer.submit("stats", batches.append, "stats")
+    writer.batch("log", batches.append, 3)
+    writer.batch("log", batches.append, 4)
+    release.set()
+    writer.flush()
+    # Nothing is written ahead of an earlier job
+    assert batches == [[1, 2], "stats", [3, 4]]
+    assert writer.metrics()["coalesced"] == 2
+
+
+def test_errors_go_to_the_callback_or_on_error(writer):
+    def fail():
+        raise OSError("disk full")
+    seen = []
+    writer.on_error = lambda key, error: seen.append((key, str(error)))
+    release = _hold(writer)
+    writer.submit("a", fail, callback=lambda result, error: seen.append(("callback", str(error))))
+    writer.submit("b", fail)
+    writer.submit("c", lambda: 42, callback=lambda result, error: seen.append((result, error)))
+    writer.post(lambda result, error: seen.append(("posted", result)), 7)
+    release.set()
+    writer.flush()
+    assert seen == [("posted", 7), ("callback", "disk full"), ("b", "disk full"), (42, None)]
+    assert writer.errors == 2
+    assert not writer.busy
+
+
+def test_wakeup_only_from_other_threads_and_closed_writer_refuses_jobs():
+    writer = IOWriter()
+    wakeups = []
+    writer.wakeup = lambda: wakeups.append(threading.current_thread().name)
+    writer.submit("outer", lambda: writer.submit("inner", lambda: None))
+    writer.flush()
+    assert wakeups == [threading.current_thread().name]
+    writer.close()
+    with pytest.raises(RuntimeError):
+        writer.submit("late", lambda: None)
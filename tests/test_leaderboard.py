@@ -0,0 +1,73 @@
+import json
+
+import pytest
+
+from iowriter import IOWriter
+from leaderboard import Leaderboard
+
+
+@pytest.fixture
+def writer():
+    writer = IOWriter()
+    yield writer
+    writer.close()
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "leaderboard.db")
+
+
+def test_a_run_keeps_its_best_score(db_path, writer):
+    board = Leaderboard(db_path, player="ana", legacy_path=None, writer=writer)
+    run = board.start_run("scramble", "Easy")
+    for score in (10, 30, 20):
+        board.record_score(run, score)
+    board.flush()
+    # A later, separate batch with a lower score doesn't replace the best either
+    board.record_score(run, 5)
+    other = board.start_run("hangman", "hard", player="bo")
+    board.record_score(other, 7)
+    board.flush()
+    assert [(row["player"], row["score"], row["difficulty"]) for row in board.top()] == [
+        ("ana", 30, "easy"), ("bo", 7, "hard")]
+    assert board.high_score("scramble", "EASY") == 30
+    assert board.high_score("hangman", player="ana") == 0
+    board.close()
+
+
+def test_results_and_reviews_from_two_boards_add_up(db_path, writer):
+    a = Leaderboard(db_path, player="ana", legacy_path=None, writer=writer)
+    # As another process would, with its own writer thread and connection
+    b = Leaderboard(db_path, player="ana", legacy_path=None, writer=IOWriter())
+    for won in (True, True, False):
+        a.record_result("hangman", "easy", won)
+    b.record_result("hangman", "easy", False)
+    b.record_result("hangman", "hard", True)
+    a.record_review("harbor", [1, 0, 1, 5.0])
+    a.record_review("harbor", [2, 0, 2, 9.0])
+    a.flush()
+    b.flush()
+    assert a.results("hangman") == {"easy": (2, 2), "hard": (1, 0)}
+    assert b.totals(player="ana") == (3, 2)
+    assert b.totals(player="bo") == (0, 0)
+    assert b.reviews() == {"harbor": [2, 0, 2, 9.0]}
+    a.close()
+    b.close()
+    b.writer.close()
+
+
+def test_legacy_high_score_is_migrated_once(db_path, writer, tmp_path):
+    legacy = tmp_path / "score.json"
+    legacy.write_text(json.dumps({"high_score": 40}))
+    for _ in range(2):
+        board = Leaderboard(db_path, player="ana", legacy_path=str(legacy), writer=writer)
+        assert [(row["mode"], row["score"]) for row in board.top()] == [("scramble", 40)]
+        board.close()
+    legacy.write_text("not json")
+    board = Leaderboard(str(tmp_path / "other.db"), legacy_path=str(legacy), writer=writer)
+    assert board.top() == []
+    board.close()
+    board = Leaderboard(str(tmp_path / "missing.db"), legacy_path=str(tmp_path / "missing.json"), writer=writer)
+    assert board.top() == []
+    board.close()
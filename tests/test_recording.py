@@ -0,0 +1,67 @@
+import pytest
+
+import recording
+from iowriter import IOWriter
+from recording import GUESS, HINT, ROUND, TIMEOUT, RecordingFormatError, SessionRecorder
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 50.0
+
+    def __call__(self):
+        return self.now
+
+
+def _play(recorder, clock):
+    recorder.round("harbor", "Medium")
+    clock.now += 1.5
+    recorder.guess("harper")
+    recorder.hint()
+    recorder.round("quartz")
+    clock.now += 0.25
+    recorder.timeout()
+    # A word seen before is written once and then referred to by id
+    recorder.round("harbor", "easy")
+    recorder.guess("a" * 300)
+    recorder.guess("é" * 200)
+    recorder.close()
+
+
+@pytest.mark.parametrize("use_writer", [False, True])
+def test_encode_decode_round_trip(tmp_path, use_writer):
+    path = str(tmp_path / "session.wgr")
+    clock = FakeClock()
+    writer = IOWriter() if use_writer else None
+    _play(SessionRecorder(path, "scramble", seed=99, writer=writer, clock=clock), clock)
+    if writer is not None:
+        writer.close()
+    session = recording.read(path)
+    assert (session.mode, session.seed) == ("scramble", 99)
+    assert session.events[:6] == [
+        (0.0, ROUND, ("harbor", "Medium")),
+        (1.5, GUESS, "harper"),
+        (1.5, HINT, None),
+        (1.5, ROUND, ("quartz", None)),
+        (1.75, TIMEOUT, None),
+        (1.75, ROUND, ("harbor", "Easy")),
+    ]
+    # A GUESS keeps at most 255 bytes; a character cut in half reads back as U+FFFD
+    assert session.events[6] == (1.75, GUESS, "a" * 255)
+    assert session.events[7] == (1.75, GUESS, "é" * 127 + "\ufffd")
+    assert session.duration == 1.75
+
+
+def test_cut_off_recordings_keep_whole_events(tmp_path):
+    path = tmp_path / "session.wgr"
+    clock = FakeClock()
+    _play(SessionRecorder(str(path), "hangman", seed=1, clock=clock), clock)
+    data = path.read_bytes()
+    path.write_bytes(data[:-10])
+    assert len(recording.read(str(path)).events) == 7
+    path.write_bytes(b"WGSR")
+    with pytest.raises(RecordingFormatError):
+        recording.read(str(path))
+    path.write_bytes(b"XXXX" + data[4:])
+    with pytest.raises(RecordingFormatError):
+        recording.read(str(path))
@@ -0,0 +1,90 @@
+import random
+
+import scheduler
+from scheduler import IndexedHeap, ShuffleBag, WordScheduler
+from wordbank import word_key
+
+
+def test_shuffle_bag_hands_out_every_key_once_per_cycle():
+    bag = ShuffleBag(random.Random(2))
+    bag.members.update(range(20))
+    last = None
+    for _ in range(10):
+        cycle = [bag.draw() for _ in range(20)]
+        assert sorted(cycle) == list(range(20))
+        assert cycle[0] != last
+        last = cycle[-1]
+
+
+def test_shuffle_bag_add_and_remove_mid_cycle():
+    rng = random.Random(4)
+    bag = ShuffleBag(rng)
+    bag.members.update("abcdef")
+    drawn = [bag.draw(), bag.draw()]
+    gone = min(set("abcdef") - set(drawn))
+    bag.remove(gone)
+    bag.add("g")
+    bag.add("g")
+    bag.remove("zzz")
+    rest = []
+    while bag.bag:
+        rest.append(bag.draw())
+    assert len(bag) == 6
+    assert sorted(drawn + rest) == sorted(set("abcdefg") - {gone})
+    assert all(bag.pos[key] == i for i, key in enumerate(bag.bag))
+    assert bag.draw() is not None
+    empty = ShuffleBag(rng)
+    assert empty.draw() is None
+
+
+def test_scheduler_bags_follow_bank_edits(open_bank):
+    bank = open_bank()
+    scheduler = WordScheduler(bank, seed=1)
+    assert {word_key(scheduler.draw()['word']) for _ in range(len(bank))} == {word_key(e['word']) for e in bank.entries}
+    assert scheduler.draw("Easy")['difficulty'] == "easy"
+    bank.add({"word": "meadow", "hint": "A grassy field", "difficulty": "hard"})
+    bank.delete(bank.index_of(bank.find("quartz")))
+    drawn = {scheduler.draw("hard")['word'] for _ in range(3)}
+    assert drawn == {"meadow"}
+    assert scheduler.draw(accept=lambda entry: False) is None
+
+
+def test_indexed_heap_matches_a_sorted_dict():
+    rng = random.Random(6)
+    expected = {key: rng.random() for key in range(50)}
+    heap = IndexedHeap(expected)
+    for _ in range(500):
+        key = rng.randrange(80)
+        if rng.random() < 0.3:
+            assert heap.remove(key) == expected.pop(key, None)
+        else:
+            expected[key] = rng.random()
+            heap.push(key, expected[key])
+        assert len(heap) == len(expected)
+        assert all(heap.pos[key] == i for i, key in enumerate(heap.heap))
+        if expected:
+            assert expected[heap.peek()] == min(expected.values())
+    while heap:
+        key = heap.peek()
+        assert min(expected.values()) == expected.pop(key) == heap.remove(key)
+    assert heap.peek() is None and not expected
+
+
+def test_player_schedule_brings_missed_words_back_first(open_bank, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(scheduler.time, "time", lambda: now[0])
+    bank = open_bank()
+    words = WordScheduler(bank, seed=3)
+    first = words.draw(player="ana")
+    # Drawing a word marks it seen, so it isn't due again straight away
+    assert words.schedule("ana").reviews[word_key(first['word'])] == [0, 0, 0, now[0]]
+    for entry in bank.entries:
+        words.record(entry['word'], entry['word'] != "quartz", player="ana")
+    # A miss is due again in BASE_INTERVAL / 2, a first win in BASE_INTERVAL * GROWTH
+    now[0] += scheduler.BASE_INTERVAL
+    assert words.draw(player="ana")['word'] == "quartz"
+    assert words.schedule("ana").reviews["quartz"][:3] == [0, 1, 1]
+    assert words.schedule("ana").reviews["harbor"][:3] == [1, 0, 1]
+    # Another player's queue is separate
+    assert words.draw(player="bo") is not None
+    assert words.schedule("bo").reviews.keys() != words.schedule("ana").reviews.keys()
@@ -0,0 +1,196 @@
+import threading
+
+import pytest
+
+import wordbank
+from locking import FileLock
+from wordbank import ConflictError
+
+
+def _contents(bank):
+    return sorted((entry['word'], entry['hint'], entry['difficulty']) for entry in bank.entries)
+
+
+def _entry(word, hint="A hint", difficulty="easy"):
+    return {"word": word, "hint": hint, "difficulty": difficulty}
+
+
+def test_changes_reach_the_other_instance(open_bank):
+    a, b = open_bank(), open_bank()
+    a.add(_entry("meadow"))
+    a.replace(a.index_of(a.find("harbor")), _entry("harbour", "Where ships rest", "medium"))
+    a.delete(a.index_of(a.find("quartz")))
+    b.refresh()
+    assert _contents(b) == _contents(a)
+    assert b.version == a.version == 3
+
+
+def test_stale_edit_raises_conflict(open_bank):
+    a, b = open_bank(), open_bank()
+    a.replace(a.index_of(a.find("harbor")), _entry("harbor", "Changed by a", "medium"))
+    with pytest.raises(ConflictError):
+        b.replace(b.index_of(b.find("harbor")), _entry("harbor", "Changed by b", "medium"))
+    # The failed attempt caught b up, so trying again succeeds
+    b.replace(b.index_of(b.find("harbor")), _entry("harbor", "Changed by b", "medium"))
+    a.refresh()
+    assert a.find("harbor")['hint'] == "Changed by b"
+
+
+def test_stale_delete_and_duplicate_add_raise_conflict(open_bank):
+    a, b = open_bank(), open_bank()
+    a.delete(a.index_of(a.find("quartz")))
+    a.add(_entry("meadow"))
+    with pytest.raises(ConflictError):
+        b.delete(b.index_of(b.find("quartz")))
+    with pytest.raises(ConflictError):
+        b.add(_entry("Meadow"))
+    assert _contents(b) == _contents(a)
+
+
+def test_compaction_while_the_other_instance_is_behind(open_bank):
+    a, b = open_bank(), open_bank()
+    for i in range(5):
+        a.add(_entry(f"word{i}"))
+    a.compact(wait=True)
+    # The five adds now live only in the new snapshot
+    assert b.find("word0") is None
+    b.refresh()
+    assert _contents(b) == _contents(a)
+    b.add(_entry("after"))
+    a.refresh()
+    assert _contents(a) == _contents(b) == _contents(open_bank())
+
+
+def test_stale_compaction_is_discarded(open_bank):
+    a, b = open_bank(), open_bank()
+    for i in range(5):
+        a.add(_entry(f"word{i}"))
+    a.compact(wait=True)
+    # b compacts what it has, which is older than the snapshot a just wrote
+    b.compact(wait=True)
+    assert _contents(open_bank()) == _contents(a)
+    assert _contents(b) == _contents(a)
+
+
+def test_compaction_keeps_changes_made_while_it_ran(open_bank):
+    a, b = open_bank(), open_bank()
+    a.add(_entry("meadow"))
+    # What a.compact() captures, then another process writes before the swap
+    args = (list(a.entries), a.version, a.snapshot_path, a._generation, a._offset)
+    b.add(_entry("orchard"))
+    a._compact(*args)
+    assert a.find("orchard") is not None
+    assert _contents(open_bank()) == _contents(a)
+    assert wordbank.journal_pending(a.path)
+    b.refresh()
+    assert _contents(b) == _contents(a)
+
+
+def test_torn_journal_line_is_ignored_then_cut_off(open_bank, bank_path):
+    a, b = open_bank(), open_bank()
+    size = len(b)
+    a.add(_entry("meadow"))
+    with open(bank_path + wordbank.JOURNAL_SUFFIX, 'ab') as f:
+        f.write(b'{"op": "add", "entry": {"word": "tor')
+    b.refresh()
+    assert b.find("meadow") is not None
+    assert len(b) == size + 1
+    # The next writer truncates the torn line before appending
+    b.add(_entry("orchard"))
+    a.refresh()
+    assert _contents(a) == _contents(b) == _contents(open_bank())
+
+
+def test_reload_after_crash_between_snapshot_rename_and_journal_rewrite(open_bank, monkeypatch):
+    a, b = open_bank(), open_bank()
+    a.add(_entry("meadow"))
+    a.replace(a.index_of(a.find("harbor")), _entry("harbour", "Where ships rest", "medium"))
+    a.delete(a.index_of(a.find("meadow")))
+    a.add(_entry("harbor", "Back again", "hard"))
+    expected = _contents(a)
+
+    def crash(*args, **kwargs):
+        raise OSError("crashed before the journal was rewritten")
+    monkeypatch.setattr(wordbank, "write_atomic", crash)
+    with pytest.raises(OSError):
+        a._compact(list(a.entries), a.version, a.snapshot_path, a._generation, a._offset)
+    monkeypatch.undo()
+
+    # The new snapshot already holds every operation the old journal replays on top of it
+    assert _contents(open_bank()) == expected
+    b.refresh()
+    assert _contents(b) == expected
+    b.add(_entry("orchard"))
+    b.compact(wait=True)
+    assert _contents(open_bank()) == _contents(b)
+
+
+def test_background_changes_reach_listeners_on_the_main_thread(open_bank):
+    a, b = open_bank(), open_bank()
+    seen = []
+    a.listeners.append(lambda kind, old, new: seen.append((kind, threading.current_thread() is threading.main_thread())))
+    b.add(_entry("meadow"))
+    # Runs on the compactor thread, which catches up on b's add
+    a.compact(wait=True)
+    assert a.find("meadow") is not None
+    assert seen == []
+    a.refresh()
+    assert seen == [("add", True)]
+
+
+def test_poll_skips_a_bank_locked_elsewhere(open_bank, bank_path):
+    a, b = open_bank(), open_bank()
+    b.add(_entry("meadow"))
+    # A second handle on the lock file conflicts like another process would
+    other = FileLock(bank_path)
+    other.acquire()
+    try:
+        a.refresh(wait=False)
+        assert a.find("meadow") is None
+    finally:
+        other.release()
+        other.close()
+    a.refresh(wait=False)
+    assert a.find("meadow") is not None
+
+
+def test_file_lock_is_reentrant(bank_path):
+    mine, other = FileLock(bank_path), FileLock(bank_path)
+    with mine.exclusive():
+        with mine.shared():
+            assert not other.acquire(False, wait=False)
+    assert other.acquire(False, wait=False)
+    other.release()
+    mine.close()
+    other.close()
+
+
+def test_bulk_import_in_batches(open_bank, monkeypatch):
+    monkeypatch.setattr(wordbank, "IMPORT_BATCH", 3)
+    a, b = open_bank(), open_bank()
+    rows = [{"word": f"w{i % 7}", "hint": "h", "difficulty": "easy"} for i in range(10)]
+    rows += [{"word": "", "hint": "h", "difficulty": "easy"}, {"word": "LANTERN", "hint": "h", "difficulty": "easy"}]
+    result = a.bulk_import(rows)
+    assert (result.rows, result.added, result.duplicates, result.invalid) == (12, 7, 4, 1)
+    b.refresh()
+    assert _contents(b) == _contents(a)
+
+
+def test_positions_follow_edits_and_replay(open_bank):
+    a, b = open_bank(), open_bank()
+    for i in range(30):
+        a.add(_entry(f"word{i}", difficulty=("easy", "medium", "hard")[i % 3]))
+    for i in range(0, 30, 3):
+        a.delete(a.index_of(a.find(f"word{i}")))
+    for i in range(1, 30, 3):
+        a.replace(a.index_of(a.find(f"word{i}")), _entry(f"word{i}x", difficulty="hard"))
+    a.replace_many([(a.index_of(a.find(f"word{i}")), _entry(f"word{i}", "Batched", "easy")) for i in range(2, 30, 3)])
+    b.refresh()
+    for bank in (a, b):
+        assert [bank.index_of(entry) for entry in bank.entries] == list(range(len(bank)))
+        assert bank.index_of(dict(bank.entries[0])) is None
+        for difficulty, members in bank.by_difficulty.items():
+            assert sorted(map(id, members)) == sorted(id(e) for e in bank.entries if e['difficulty'] == difficulty)
+        for length, members in bank.by_length.items():
+            assert sorted(map(id, members)) == sorted(id(e) for e in bank.entries if len(e['word']) == length)
+    assert _contents(a) == _contents(b)
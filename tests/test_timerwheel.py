@@ -0,0 +1,82 @@
+from timerwheel import TimerWheel, drive
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def _driven():
+    clock = FakeClock()
+    wheel = TimerWheel(tick=0.05, slots=16, clock=clock)
+    armed = []
+    drive(wheel, lambda delay, fn: armed.append((clock.now + delay, fn)))
+    return clock, wheel, armed
+
+
+def _run_next(clock, armed):
+    armed.sort(key=lambda call: call[0])
+    at, fn = armed.pop(0)
+    clock.now = max(clock.now, at)
+    fn()
+
+
+def test_idle_wheel_arms_nothing():
+    clock, wheel, armed = _driven()
+    assert wheel.next_due() is None
+    assert armed == []
+
+
+def test_one_callback_per_deadline_not_per_tick():
+    clock, wheel, armed = _driven()
+    fired = []
+    wheel.schedule(3.0, fired.append, "late")
+    assert len(armed) == 1
+    _run_next(clock, armed)
+    assert fired == ["late"]
+    assert clock.now >= 103.0
+    # Fired and idle again: nothing is left armed
+    assert armed == []
+
+
+def test_earlier_timer_rearms_and_supersedes_the_later_callback():
+    clock, wheel, armed = _driven()
+    fired = []
+    wheel.schedule(3.0, fired.append, "late")
+    wheel.schedule(0.2, fired.append, "soon")
+    wheel.schedule(1.0, fired.append, "later than soon")
+    assert len(armed) == 2
+    calls = 0
+    while armed:
+        _run_next(clock, armed)
+        calls += 1
+    assert fired == ["soon", "later than soon", "late"]
+    # The first callback armed for the 3s timer was superseded and did nothing
+    assert calls == 4
+
+
+def test_far_timer_beyond_one_turn_of_the_wheel():
+    clock, wheel, armed = _driven()
+    fired = []
+    # 16 slots of 0.05s: this one wraps the wheel many times
+    wheel.schedule(10.0, fired.append, "far")
+    assert abs(wheel.next_due() - 110.0) < wheel.tick
+    while armed:
+        _run_next(clock, armed)
+    assert fired == ["far"]
+
+
+def test_repeating_timer_stays_armed_until_cancelled():
+    clock, wheel, armed = _driven()
+    fired = []
+    timer = wheel.every(0.5, fired.append, "tick")
+    for _ in range(3):
+        _run_next(clock, armed)
+    assert fired == ["tick"] * 3
+    timer.cancel()
+    _run_next(clock, armed)
+    assert fired == ["tick"] * 3
+    assert armed == []
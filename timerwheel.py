@@ -0,0 +1,168 @@
+import math
+import time
+
+from metrics import timed
+
+
+class Timer:
+    __slots__ = ("deadline", "tick", "callback", "args", "cancelled", "interval", "owner")
+
+    def __init__(self, deadline, tick, callback, args, interval=None, owner=None):
+        self.deadline = deadline
+        self.tick = tick
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+        self.interval = interval
+        self.owner = owner
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class TimerWheel:
+    # Hashed timing wheel: scheduling and cancelling are O(1), and one periodic
+    # advance() call fires everything that is due, however many timers are pending.
+    # Timers can be grouped by owner (a screen, a session) and cancelled together.
+
+    def __init__(self, tick=0.05, slots=512, clock=time.monotonic):
+        self.tick = tick
+        self.clock = clock
+        self.slots = [[] for _ in range(slots)]
+        self.current = int(clock() / tick)
+        self.pending = 0
+        self.owners = {}
+        # Called with a new timer's due time, so a driver can fire earlier than it planned
+        self.wakeup = None
+
+    def __len__(self):
+        return self.pending
+
+    def _place(self, timer):
+        # Round up so a timer never fires before its deadline
+        timer.tick = max(self.current + 1, math.ceil(timer.deadline / self.tick - 1e-9))
+        self.slots[timer.tick % len(self.slots)].append(timer)
+        self.pending += 1
+
+    def schedule(self, delay, callback, *args, owner=None, interval=None):
+        timer = Timer(self.clock() + max(0.0, delay), 0, callback, args, interval, owner)
+        if owner is not None:
+            self.owners.setdefault(owner, set()).add(timer)
+        self._place(timer)
+        if self.wakeup is not None:
+            self.wakeup(timer.tick * self.tick)
+        return timer
+
+    def every(self, interval, callback, *args, owner=None):
+        return self.schedule(interval, callback, *args, owner=owner, interval=interval)
+
+    def next_due(self):
+        # The clock time advance() next fires a timer at, or None while idle; a
+        # cancelled timer can make this early but never late
+        if not self.pending:
+            return None
+        count = len(self.slots)
+        for tick in range(self.current + 1, self.current + count + 1):
+            for timer in self.slots[tick % count]:
+                if timer.tick == tick and not timer.cancelled:
+                    return tick * self.tick
+        # Nothing within one turn of the wheel: fall back to the earliest timer anywhere
+        ticks = [timer.tick for slot in self.slots for timer in slot if not timer.cancelled]
+        return min(ticks) * self.tick if ticks else None
+
+    def remaining(self, timer):
+        return max(0.0, timer.deadline - self.clock())
+
+    def cancel_owner(self, owner):
+        timers = self.owners.pop(owner, ())
+        for timer in timers:
+            timer.cancelled = True
+        return len(timers)
+
+    def _retire(self, timer):
+        self.pending -= 1
+        if timer.owner is not None:
+            timers = self.owners.get(timer.owner)
+            if timers is not None:
+                timers.discard(timer)
+                if not timers:
+                    del self.owners[timer.owner]
+
+    @timed("timer_advance")
+    def advance(self, now=None):
+        now = self.clock() if now is None else now
+        target = int(now / self.tick)
+        if target <= self.current:
+            return 0
+        # After a long stall every slot is visited once rather than once per missed tick
+        start = max(self.current + 1, target - len(self.slots) + 1)
+        due = []
+        for tick in range(start, target + 1):
+            slot = self.slots[tick % len(self.slots)]
+            if not slot:
+                continue
+            keep = []
+            for timer in slot:
+                if timer.cancelled:
+                    self._retire(timer)
+                elif timer.tick <= target:
+                    due.append(timer)
+                else:
+                    keep.append(timer)
+            slot[:] = keep
+        self.current = target
+        due.sort(key=lambda timer: timer.deadline)
+        fired = 0
+        for timer in due:
+            if timer.cancelled:
+                self._retire(timer)
+                continue
+            timer.callback(*timer.args)
+            fired += 1
+            if timer.interval and not timer.cancelled:
+                # Repeat from the deadline, not from now, so repeating timers don't drift
+                self.pending -= 1
+                timer.deadline += timer.interval
+                if timer.deadline <= now:
+                    timer.deadline += (now - timer.deadline) // timer.interval * timer.interval + timer.interval
+                self._place(timer)
+            else:
+                timer.cancelled = True
+                self._retire(timer)
+        return fired
+
+
+def drive(wheel, call_later):
+    # Runs the wheel from a toolkit's one-shot "call later" primitive: a single
+    # callback armed for the next due timer, and none at all while the wheel is idle
+    state = {"due": None, "armed": 0}
+
+    def pump(armed):
+        if armed != state["armed"]:
+            # Superseded by a callback armed for an earlier timer
+            return
+        state["due"] = None
+        wheel.advance()
+        wakeup(wheel.next_due())
+
+    def wakeup(due):
+        if due is None or (state["due"] is not None and state["due"] <= due):
+            return
+        state["due"] = due
+        state["armed"] += 1
+        armed = state["armed"]
+        call_later(max(0.0, due - wheel.clock()), lambda: pump(armed))
+
+    wheel.wakeup = wakeup
+    wakeup(wheel.next_due())
+    return wheel
+
+
+def tk_driver(master, wheel):
+    # Rounded up: a callback that comes in early only has to be re-armed
+    return drive(wheel, lambda delay, fn: master.after(math.ceil(delay * 1000), fn))
+
+
+def kivy_driver(wheel):
+    from kivy.clock import Clock
+    return drive(wheel, lambda delay, fn: Clock.schedule_once(lambda dt: fn(), delay))
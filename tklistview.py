@@ -0,0 +1,117 @@
+import tkinter as tk
+
+
+class WindowedListbox(tk.Frame):
+    # A Listbox that only ever holds the visible rows of a (possibly huge) sequence
+
+    def __init__(self, master, items=(), format_item=str, height=10, width=50, **kwargs):
+        super().__init__(master, **kwargs)
+        self.items = items
+        self.format_item = format_item
+        self.height = height
+        self.offset = 0
+        self.selected = None
+
+        self.listbox = tk.Listbox(self, height=height, width=width, exportselection=False)
+        self.scrollbar = tk.Scrollbar(self, orient=tk.VERTICAL, command=self.yview)
+        self.listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        self.listbox.bind("<<ListboxSelect>>", self._on_select, add="+")
+        self.listbox.bind("<MouseWheel>", lambda e: self.scroll(-1 if e.delta > 0 else 1))
+        self.listbox.bind("<Button-4>", lambda e: self.scroll(-1))
+        self.listbox.bind("<Button-5>", lambda e: self.scroll(1))
+        self.listbox.bind("<Prior>", lambda e: self.scroll(-self.height))
+        self.listbox.bind("<Next>", lambda e: self.scroll(self.height))
+        self.listbox.bind("<Up>", lambda e: self.step(-1))
+        self.listbox.bind("<Down>", lambda e: self.step(1))
+
+    def bind_select(self, callback):
+        self.listbox.bind("<<ListboxSelect>>", callback, add="+")
+
+    def set_items(self, items, keep_position=False):
+        # keep_position is for redrawing updated items: the scroll offset stays, and so
+        # does the selection if the same item is still on that row
+        if keep_position:
+            old = self.selected
+            if old is not None and not (old < len(items) and old < len(self.items) and items[old] is self.items[old]):
+                self.selected = None
+        else:
+            self.offset = 0
+            self.selected = None
+        self.items = items
+        self.refresh()
+
+    def refresh(self):
+        self.offset = max(0, min(self.offset, len(self.items) - self.height))
+        if self.selected is not None and self.selected >= len(self.items):
+            self.selected = None
+        self.listbox.delete(0, tk.END)
+        for item in self.items[self.offset:self.offset + self.height]:
+            self.listbox.insert(tk.END, self.format_item(item))
+        if self.selected is not None and self.offset <= self.selected < self.offset + self.height:
+            self.listbox.selection_set(self.selected - self.offset)
+        self._update_scrollbar()
+
+    def refresh_row(self, index):
+        row = index - self.offset
+        if 0 <= row < self.listbox.size():
+            self.listbox.delete(row)
+            self.listbox.insert(row, self.format_item(self.items[index]))
+            if index == self.selected:
+                self.listbox.selection_set(row)
+
+    def _update_scrollbar(self):
+        total = len(self.items)
+        if total <= self.height:
+            self.scrollbar.set(0.0, 1.0)
+        else:
+            self.scrollbar.set(self.offset / total, (self.offset + self.height) / total)
+
+    def yview(self, *args):
+        if args[0] == "moveto":
+            self.offset = int(float(args[1]) * len(self.items))
+            self.refresh()
+        elif args[0] == "scroll":
+            amount = int(args[1])
+            self.scroll(amount * self.height if args[2] == "pages" else amount)
+
+    def scroll(self, rows):
+        self.offset += rows
+        self.refresh()
+        return "break"
+
+    def step(self, rows):
+        # Moves the selection, scrolling the window along when it goes past the first or
+        # last visible row; the Listbox alone would stop there
+        if not self.items:
+            return "break"
+        index = self.offset if self.selected is None else self.selected + rows
+        index = max(0, min(index, len(self.items) - 1))
+        self.selected = index
+        if index < self.offset or index >= self.offset + self.height:
+            self.offset = index if index < self.offset else index - self.height + 1
+            self.refresh()
+        else:
+            self.listbox.selection_clear(0, tk.END)
+            self.listbox.selection_set(index - self.offset)
+        self.listbox.activate(index - self.offset)
+        self.listbox.event_generate("<<ListboxSelect>>")
+        return "break"
+
+    def see(self, index):
+        if not self.offset <= index < self.offset + self.height:
+            self.offset = index - self.height // 2
+            self.refresh()
+
+    def _on_select(self, event):
+        selection = self.listbox.curselection()
+        if selection:
+            self.selected = self.offset + selection[0]
+
+    def curselection(self):
+        return () if self.selected is None else (self.selected,)
+
+    def selection_clear(self):
+        self.selected = None
+        self.listbox.selection_clear(0, tk.END)
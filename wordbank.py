@@ -0,0 +1,796 @@
+import csv
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+import compiledbank
+from locking import FileLock
+from metrics import timed
+
+JSON_FILE = "words.json"
+JOURNAL_SUFFIX = ".journal"
+DIFFICULTIES = ["easy", "medium", "hard"]
+
+# Fold the journal into the snapshot once it holds this many operations, or
+# 1/COMPACT_RATIO of the bank if that is more: a compaction rewrites the whole
+# snapshot, so a big bank waits for proportionally more edits
+COMPACT_AFTER = 500
+COMPACT_RATIO = 4
+
+# First line of a compacted journal: the sequence number the snapshot is complete up to
+BASE_OP = "base"
+
+# Rows a bulk import writes per hold of the exclusive lock
+IMPORT_BATCH = 2000
+
+
+def normalize_difficulty(value):
+    return str(value or "").strip().lower()
+
+
+def word_key(word):
+    return str(word).strip().casefold()
+
+
+def _file_stamp(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def _fsync_dir(path):
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def compiled_path(path):
+    return os.path.splitext(path)[0] + compiledbank.COMPILED_SUFFIX
+
+
+def current_snapshot(path):
+    # A compiled snapshot next to the JSON file is used instead of it whenever
+    # it is the newer of the two
+    compiled = compiled_path(path)
+    compiled_stamp = _file_stamp(compiled)
+    if compiled_stamp is not None:
+        plain_stamp = _file_stamp(path)
+        if plain_stamp is None or compiled_stamp[0] >= plain_stamp[0]:
+            return compiled
+    return path
+
+
+def write_atomic(path, write, binary=False):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb' if binary else 'w') as f:
+        write(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    _fsync_dir(path)
+
+
+def journal_pending(path):
+    # True when the journal holds operations that aren't in the snapshot yet
+    try:
+        with open(path + JOURNAL_SUFFIX, 'rb') as f:
+            first = f.readline()
+            more = f.read(1)
+    except FileNotFoundError:
+        return False
+    if not first or more:
+        return bool(first)
+    try:
+        return json.loads(first).get("op") != BASE_OP
+    except (ValueError, AttributeError):
+        return True
+
+
+def _fsync_file(path):
+    with open(path, 'rb') as f:
+        os.fsync(f.fileno())
+
+
+def _journal_generation(path, stamp):
+    # Identifies one journal file: its inode and the base sequence number in its header.
+    # Compaction replaces the journal, so a changed generation means the offset is stale.
+    if stamp is None:
+        return None
+    base = 0
+    try:
+        with open(path, 'rb') as f:
+            line = f.readline()
+        if line.endswith(b"\n"):
+            op = json.loads(line)
+            if op.get("op") == BASE_OP:
+                base = op.get("seq", 0)
+    except (OSError, ValueError):
+        pass
+    return stamp[2], base
+
+
+class ConflictError(Exception):
+    # Another process changed the word first; refresh and try again
+    pass
+
+
+class WordBank:
+    # Safe to share between processes. Every change is appended to the journal
+    # under an exclusive lock with the next sequence number, after catching up on
+    # what other processes appended, so edits are compare-and-swap against the
+    # latest version of the word. Readers follow the journal by byte offset and
+    # apply only the new operations.
+
+    def __init__(self, path=JSON_FILE):
+        self.path = path
+        self.journal_path = path + JOURNAL_SUFFIX
+        # Where the snapshot was last loaded from: path, or its compiled sibling
+        self.compiled_path = compiled_path(path)
+        self.snapshot_path = path
+        self.entries = []
+        self.by_word = {}
+        self.by_difficulty = {}
+        self.by_length = {}
+        # id(entry) -> its index in entries, and in its by_difficulty and by_length
+        # lists, so finding or removing an entry never scans a list
+        self._positions = {}
+        self._difficulty_positions = {}
+        self._length_positions = {}
+        # Sequence number of the last operation applied, and of the last one to
+        # touch each word (0 for words unchanged since the snapshot)
+        self.version = 0
+        self.versions = {}
+        self.file_lock = FileLock(path)
+        self._stamp = None
+        # Which journal file is being followed (see _journal_generation) and how far
+        self._generation = None
+        self._offset = 0
+        self._journal_ops = 0
+        self._lock = threading.RLock()
+        self._compactor = None
+        # Optional IOWriter (iowriter.py); when set, journal fsyncs and compaction
+        # run on its thread and edits return without waiting for the disk
+        self.writer = None
+        # Called as listener(kind, old_entry, new_entry) with kind one of
+        # "add", "edit", "delete" or "reload" (old/new are None for a reload),
+        # always on the main thread (see _notify_all)
+        self.listeners = []
+        # Changes caught up on another thread, waiting for the main thread
+        self._deferred = deque()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def _file_stamp(self):
+        return (_file_stamp(self.path), _file_stamp(self.compiled_path), _file_stamp(self.journal_path))
+
+    def refresh(self, wait=True):
+        # Cheap when nothing changed on disk: three stat calls and no lock. With
+        # wait=False (a UI's poll) a bank that another thread or process has locked,
+        # say for an import, is left as it is until the next call.
+        events = []
+        if self._lock.acquire(wait):
+            try:
+                if self._file_stamp() != self._stamp and self.file_lock.acquire(False, wait):
+                    try:
+                        events = self._sync()
+                    finally:
+                        self.file_lock.release()
+            finally:
+                self._lock.release()
+        self._notify_all(events)
+        return self
+
+    def _notify(self, kind, old=None, new=None):
+        for listener in list(self.listeners):
+            listener(kind, old, new)
+
+    def _notify_all(self, events):
+        # Listeners update widgets and the game's indexes, which only the main thread
+        # touches. Changes found on any other thread (a compaction, a load or import
+        # on the I/O thread) wait for the main thread's next refresh() or edit; with
+        # a writer, that refresh is also handed to the UI thread straight away.
+        if threading.current_thread() is not threading.main_thread():
+            if events and self.listeners:
+                self._deferred.extend(events)
+                if self.writer is not None:
+                    self.writer.post(lambda result, error: self._notify_all([]))
+            return
+        while self._deferred:
+            self._notify(*self._deferred.popleft())
+        for kind, old, new in events:
+            self._notify(kind, old, new)
+
+    def _sync(self):
+        # Catches up with the files; needs the file lock. Returns the changes to notify.
+        stamp = self._file_stamp()
+        if stamp == self._stamp:
+            return []
+        generation = _journal_generation(self.journal_path, stamp[2])
+        if self._stamp is None or generation is None:
+            return self._reload(stamp, generation)
+        if generation != self._generation:
+            # Compacted by another process: the new snapshot holds everything up to the
+            # journal's base, which we already have if we are at least that far along
+            if generation[1] > self.version:
+                return self._reload(stamp, generation)
+            self._generation = generation
+            self._offset = 0
+            self._journal_ops = 0
+            self.snapshot_path = current_snapshot(self.path)
+        elif stamp[:2] != self._stamp[:2] or stamp[2][1] < self._offset:
+            # The snapshot was rewritten, or the journal shrank, without a compaction
+            return self._reload(stamp, generation)
+        self._stamp = stamp
+        return self._replay_journal()
+
+    def _reload(self, stamp, generation):
+        self._stamp = stamp
+        self._rebuild(self._read())
+        self.version = 0
+        self.versions.clear()
+        self._generation = generation
+        self._offset = 0
+        self._journal_ops = 0
+        self._replay_journal()
+        return [("reload", None, None)]
+
+    @timed("bank_read_snapshot")
+    def _read(self):
+        self.snapshot_path = current_snapshot(self.path)
+        if self.snapshot_path == self.compiled_path:
+            try:
+                return compiledbank.load(self.compiled_path)
+            except (OSError, compiledbank.CompiledFormatError):
+                self.snapshot_path = self.path
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path, 'r') as f:
+            try:
+                data = json.load(f)
+            except json.JSONDecodeError:
+                return []
+        return data if isinstance(data, list) else []
+
+    @timed("bank_replay_journal")
+    def _replay_journal(self):
+        # Applies the operations appended since the last call; ones at or below
+        # self.version are already in memory and are only skipped over
+        changes = []
+        try:
+            with open(self.journal_path, 'rb') as f:
+                f.seek(self._offset)
+                data = f.read()
+        except FileNotFoundError:
+            return changes
+        # Anything after the last newline is an append still in progress (or torn by a crash)
+        end = data.rfind(b"\n") + 1
+        pos = 0
+        while pos < end:
+            next_pos = data.index(b"\n", pos) + 1
+            try:
+                op = json.loads(data[pos:next_pos])
+            except json.JSONDecodeError:
+                break
+            pos = next_pos
+            seq = op.get("seq") or self.version + 1
+            if op.get("op") == BASE_OP:
+                self.version = max(self.version, seq)
+                continue
+            self._journal_ops += 1
+            if seq <= self.version:
+                continue
+            change = self._apply(op)
+            self.version = seq
+            if change is not None:
+                changes.append(change)
+                kind, old, new = change
+                if old is not None:
+                    self.versions.pop(word_key(old['word']), None)
+                if new is not None:
+                    self.versions[word_key(new['word'])] = seq
+        self._offset += pos
+        return changes
+
+    def _apply(self, op):
+        # Operations are keyed by word so replaying them on a snapshot that already
+        # contains them (a crash during compaction) leaves the bank unchanged
+        kind = op.get("op")
+        if kind == "add":
+            old = self._put(op["entry"])
+            return ("add" if old is None else "edit"), old, op["entry"]
+        elif kind == "edit":
+            old = self.by_word.get(word_key(op["word"]))
+            if old is None:
+                return "edit", self._put(op["entry"]), op["entry"]
+            existing = self.by_word.get(word_key(op["entry"]['word']))
+            if existing is not None and existing is not old:
+                self._discard(self.index_of(existing))
+            self._replace(self.index_of(old), op["entry"])
+            return "edit", existing or old, op["entry"]
+        elif kind == "delete":
+            old = self.by_word.get(word_key(op["word"]))
+            if old is not None:
+                self._discard(self.index_of(old))
+                return "delete", old, None
+        return None
+
+    def _put(self, entry):
+        existing = self.by_word.get(word_key(entry['word']))
+        if existing is not None:
+            self._replace(self.index_of(existing), entry)
+        else:
+            self._insert(entry)
+        return existing
+
+    def index_of(self, entry):
+        i = self._positions.get(id(entry))
+        # An id can be reused by an entry that was never in the bank
+        if i is not None and self.entries[i] is entry:
+            return i
+        return None
+
+    def _rebuild(self, entries):
+        # Clear in place so callers holding on to bank.entries stay in sync
+        del self.entries[:]
+        self.by_word.clear()
+        self.by_difficulty.clear()
+        self.by_length.clear()
+        self.entries.extend(entries)
+        # Indexed a column at a time rather than through _insert; this is most of a cold load
+        self.by_word.update({str(entry['word']).strip().casefold(): entry for entry in self.entries})
+        self._positions = {id(entry): i for i, entry in enumerate(self.entries)}
+        groups = {}
+        for entry in self.entries:
+            groups.setdefault(entry.get('difficulty'), []).append(entry)
+        for difficulty, members in groups.items():
+            self.by_difficulty.setdefault(normalize_difficulty(difficulty), []).extend(members)
+        for entry in self.entries:
+            self.by_length.setdefault(len(entry['word']), []).append(entry)
+        self._difficulty_positions = {id(entry): i for members in self.by_difficulty.values()
+                                      for i, entry in enumerate(members)}
+        self._length_positions = {id(entry): i for members in self.by_length.values()
+                                  for i, entry in enumerate(members)}
+
+    def _insert(self, entry):
+        _append(self.entries, self._positions, entry)
+        self._index(entry)
+
+    def _replace(self, index, entry):
+        # entry takes over the old entry's place, so an edit doesn't move it in the list
+        old = self.entries[index]
+        self._unindex(old)
+        del self._positions[id(old)]
+        self.entries[index] = entry
+        self._positions[id(entry)] = index
+        self._index(entry)
+        return old
+
+    def _discard(self, index):
+        # The last entry moves into the gap: O(1), at the cost of the bank's order
+        entry = self.entries[index]
+        _swap_remove(self.entries, self._positions, entry)
+        self._unindex(entry)
+        return entry
+
+    def _index(self, entry):
+        self.by_word[word_key(entry['word'])] = entry
+        _append(self.by_difficulty.setdefault(normalize_difficulty(entry.get('difficulty')), []),
+                self._difficulty_positions, entry)
+        _append(self.by_length.setdefault(len(entry['word']), []), self._length_positions, entry)
+
+    def _unindex(self, entry):
+        key = word_key(entry['word'])
+        if self.by_word.get(key) is entry:
+            del self.by_word[key]
+        _swap_remove(self.by_difficulty[normalize_difficulty(entry.get('difficulty'))],
+                     self._difficulty_positions, entry)
+        _swap_remove(self.by_length[len(entry['word'])], self._length_positions, entry)
+
+    def words(self, difficulty=None):
+        if difficulty is None:
+            return self.entries
+        return self.by_difficulty.get(normalize_difficulty(difficulty), [])
+
+    def find(self, word):
+        return self.by_word.get(word_key(word))
+
+    def __contains__(self, word):
+        return word_key(word) in self.by_word
+
+    def version_of(self, word):
+        return self.versions.get(word_key(word), 0)
+
+    def _write(self, change):
+        # Runs change(events) with the exclusive lock held, after catching up with
+        # other processes; every change, theirs and ours, is notified once the lock is released
+        events = []
+        try:
+            with self._lock, self.file_lock.exclusive():
+                events.extend(self._sync())
+                return change(events)
+        finally:
+            self._notify_all(events)
+
+    def _check(self, old, version):
+        # Compare-and-swap: old must still be the current record for its word, at the version we saw
+        key = word_key(old['word'])
+        if self.by_word.get(key) is not old or self.versions.get(key, 0) != version:
+            raise ConflictError(f"'{old['word']}' was changed by someone else")
+
+    def _locate(self, index, entry):
+        # Changes caught up from other processes may have moved the entry
+        if index < len(self.entries) and self.entries[index] is entry:
+            return index
+        return self.index_of(entry)
+
+    def _check_new(self, entry, old=None):
+        existing = self.by_word.get(word_key(entry['word']))
+        if existing is not None and existing is not old:
+            raise ConflictError(f"'{entry['word']}' is already in the bank")
+
+    def add(self, entry):
+        def change(events):
+            self._check_new(entry)
+            self._insert(entry)
+            self._log({"op": "add", "entry": entry})
+            events.append(("add", None, entry))
+        self._write(change)
+
+    def replace(self, index, entry):
+        old = self.entries[index]
+        version = self.version_of(old['word'])
+
+        def change(events):
+            self._check(old, version)
+            self._check_new(entry, old)
+            self._replace(self._locate(index, old), entry)
+            self._log({"op": "edit", "word": old['word'], "entry": entry})
+            events.append(("edit", old, entry))
+        self._write(change)
+
+    def delete(self, index):
+        old = self.entries[index]
+        version = self.version_of(old['word'])
+
+        def change(events):
+            self._check(old, version)
+            self._discard(self._locate(index, old))
+            self._log({"op": "delete", "word": old['word']})
+            events.append(("delete", old, None))
+            return old
+        return self._write(change)
+
+    def replace_many(self, updates):
+        # Batched in-place edits: one journal write for the lot.
+        # All or nothing: if any of the words changed elsewhere, nothing is written.
+        updates = [(self.entries[index], self.version_of(self.entries[index]['word']), entry)
+                   for index, entry in updates]
+
+        def change(events):
+            if not updates:
+                return 0
+            for old, version, new in updates:
+                self._check(old, version)
+                self._check_new(new, old)
+            for old, _, new in updates:
+                self._replace(self.index_of(old), new)
+            self._log_many([{"op": "edit", "word": old['word'], "entry": new} for old, _, new in updates])
+            events.extend(("edit", old, new) for old, _, new in updates)
+            return len(updates)
+        return self._write(change)
+
+    def bulk_import(self, rows, progress=None, progress_every=100000):
+        # Rows are read and cleaned without the lock and written IMPORT_BATCH at a
+        # time, so other processes wait for one batch rather than the whole file.
+        # The bank is compacted once, at the end.
+        result = ImportResult()
+        batch = []
+
+        def change(events):
+            ops = []
+            for entry in batch:
+                if word_key(entry['word']) in self.by_word:
+                    result.duplicates += 1
+                else:
+                    self._insert(entry)
+                    ops.append({"op": "add", "entry": entry})
+                    result.added += 1
+                    events.append(("add", None, entry))
+            if ops:
+                self._log_many(ops, compact=False)
+
+        for row in rows:
+            result.rows += 1
+            entry = _clean_row(row)
+            if entry is None:
+                result.invalid += 1
+            else:
+                batch.append(entry)
+                if len(batch) >= IMPORT_BATCH:
+                    self._write(change)
+                    batch.clear()
+            if progress and result.rows % progress_every == 0:
+                progress(result)
+        if batch:
+            self._write(change)
+        if self._compact_due():
+            self.compact()
+        result.finish()
+        if progress:
+            progress(result)
+        return result
+
+    # Journal
+    def _log(self, op):
+        self._log_many([op])
+
+    def _log_many(self, ops, compact=True):
+        # Called with the exclusive lock held and the bank caught up, so the next
+        # sequence numbers are ours
+        for op in ops:
+            self.version += 1
+            op["seq"] = self.version
+            if op["op"] != "add":
+                self.versions.pop(word_key(op["word"]), None)
+            if op["op"] != "delete":
+                self.versions[word_key(op["entry"]['word'])] = self.version
+        self._write_journal(ops)
+        self._journal_ops += len(ops)
+        if compact and self._compact_due():
+            self.compact()
+
+    def _compact_due(self):
+        return self._journal_ops >= max(COMPACT_AFTER, len(self.entries) // COMPACT_RATIO)
+
+    @timed("journal_write")
+    def _write_journal(self, ops):
+        # Written straight away so other processes see it as soon as the lock is released;
+        # only the fsync waits for the writer thread when there is one
+        with open(self.journal_path, 'ab') as f:
+            if f.tell() > self._offset:
+                # Left by a writer that crashed mid-append; nobody else holds the lock
+                f.truncate(self._offset)
+                f.seek(self._offset)
+            for start in range(0, len(ops), 10000):
+                f.write("".join(json.dumps(op) + "\n" for op in ops[start:start + 10000]).encode())
+            f.flush()
+            self._offset = f.tell()
+            if self.writer is None:
+                os.fsync(f.fileno())
+        if self.writer is not None:
+            self.writer.submit(("journal-sync", self.journal_path), _fsync_file, self.journal_path)
+        self._stamp = self._file_stamp()
+        if self._generation is None or self._generation[0] != self._stamp[2][2]:
+            self._generation = _journal_generation(self.journal_path, self._stamp[2])
+
+    def compact(self, wait=False):
+        with self._lock:
+            snapshot = list(self.entries)
+            # Where the journal stood at `version`, so the trim can keep just the bytes after it
+            args = (snapshot, self.version, self.snapshot_path, self._generation, self._offset)
+            self._journal_ops = 0
+            if self.writer is not None:
+                # A compaction still waiting in the queue is replaced by this newer one
+                self.writer.submit(("compact", self.path), self._compact, *args)
+            elif self._compactor is None or not self._compactor.is_alive():
+                self._compactor = threading.Thread(target=self._compact, args=args, name="wordbank-compact")
+                self._compactor.start()
+            compactor = self._compactor
+        if wait:
+            if self.writer is not None:
+                self.writer.flush()
+            elif compactor is not None:
+                compactor.join()
+
+    @timed("bank_compact")
+    def _compact(self, snapshot, version, target, generation_then=None, offset_then=0):
+        # The snapshot is written without holding any lock; only swapping it in and
+        # trimming the journal down to what came after `version` happen under the lock
+        # Unique per thread: two banks in one process may compact the same file
+        tmp_path = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb' if target == self.compiled_path else 'w') as f:
+            if target == self.compiled_path:
+                compiledbank.dump(snapshot, f)
+            else:
+                json.dump(snapshot, f, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        events = []
+        try:
+            with self._lock, self.file_lock.exclusive():
+                events = self._sync()
+                generation = _journal_generation(self.journal_path, _file_stamp(self.journal_path))
+                if (generation is not None and generation[1] > version) or ("reload", None, None) in events:
+                    # Another process compacted a later state meanwhile, or the files were
+                    # replaced outright; either way this snapshot is out of date
+                    os.remove(tmp_path)
+                    return
+                os.replace(tmp_path, target)
+                _fsync_dir(target)
+                tail = b""
+                if generation is not None and generation == generation_then:
+                    # Still the journal the snapshot was taken from: everything after it
+                    # is what was appended past offset_then, with no parsing under the lock
+                    with open(self.journal_path, 'rb') as f:
+                        f.seek(offset_then)
+                        tail = f.read(self._offset - offset_then)
+                elif generation is not None:
+                    with open(self.journal_path, 'rb') as f:
+                        lines = []
+                        for line in f.read(self._offset).splitlines(keepends=True):
+                            try:
+                                op = json.loads(line)
+                            except json.JSONDecodeError:
+                                break
+                            if op.get("op") != BASE_OP and op.get("seq", 0) > version:
+                                lines.append(line)
+                        tail = b"".join(lines)
+                header = json.dumps({"op": BASE_OP, "seq": version}).encode() + b"\n"
+                write_atomic(self.journal_path, lambda f: f.write(header + tail), binary=True)
+                self.snapshot_path = target
+                self._stamp = self._file_stamp()
+                self._generation = _journal_generation(self.journal_path, self._stamp[2])
+                self._offset = self._stamp[2][1]
+                self._journal_ops = tail.count(b"\n")
+        finally:
+            self._notify_all(events)
+
+    def save(self):
+        self.compact(wait=True)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.flush()
+        if self._compactor is not None:
+            self._compactor.join()
+        with self._lock:
+            self.file_lock.close()
+
+
+class ImportResult:
+    def __init__(self):
+        self.rows = 0
+        self.added = 0
+        self.duplicates = 0
+        self.invalid = 0
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    def finish(self):
+        self.elapsed = time.perf_counter() - self.started
+
+    @property
+    def rate(self):
+        elapsed = self.elapsed or (time.perf_counter() - self.started)
+        return self.rows / elapsed if elapsed > 0 else 0.0
+
+    def __str__(self):
+        return (f"{self.rows} rows, {self.added} added, {self.duplicates} duplicates, "
+                f"{self.invalid} invalid ({self.rate:,.0f} rows/sec)")
+
+
+def bank_cache(factory):
+    # get(bank) makes factory(bank) once per bank and hands back the same one after;
+    # for the indexes and schedulers that follow a shared bank's events
+    made = {}
+
+    def get(bank):
+        value = made.get(bank)
+        if value is None:
+            value = made[bank] = factory(bank)
+        return value
+    return get
+
+
+def refresh_on(bank, wheel, interval=1.0):
+    # Polls for changes made by other processes from a UI's timer wheel; a poll
+    # that finds nothing new costs three stat calls. A locked bank (an import in
+    # another process) is skipped rather than waited for, and tried again next time.
+    if bank not in wheel.owners:
+        wheel.every(interval, bank.refresh, False, owner=bank)
+    return bank
+
+
+def _clean_row(row):
+    word = str(row.get('word') or "").strip().lower()
+    hint = str(row.get('hint') or "").strip()
+    difficulty = normalize_difficulty(row.get('difficulty'))
+    if not word or not hint or not difficulty:
+        return None
+    return {"word": word, "hint": hint, "difficulty": difficulty}
+
+
+def iter_import_rows(path):
+    # Streams rows so files with millions of lines never sit in memory at once
+    if path.lower().endswith(('.jsonl', '.ndjson')):
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError:
+                    yield {}
+                    continue
+                yield row if isinstance(row, dict) else {}
+    else:
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header is None:
+                return
+            fields = [h.strip().lower() for h in header]
+            if 'word' not in fields:
+                # Headerless file: columns are word, hint, difficulty
+                fields = ['word', 'hint', 'difficulty']
+                yield dict(zip(fields, header))
+            for values in reader:
+                yield dict(zip(fields, values))
+
+
+def _append(items, positions, entry):
+    positions[id(entry)] = len(items)
+    items.append(entry)
+
+
+def _swap_remove(items, positions, entry):
+    i = positions.pop(id(entry))
+    last = items.pop()
+    if last is not entry:
+        items[i] = last
+        positions[id(last)] = i
+
+
+_banks = {}
+
+
+def get_bank(path=JSON_FILE):
+    key = os.path.abspath(path)
+    bank = _banks.get(key)
+    if bank is None:
+        bank = _banks[key] = WordBank(path)
+    return bank.refresh()
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Word bank maintenance")
+    parser.add_argument("--bank", default=JSON_FILE, help="word bank file (default: %(default)s)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    import_cmd = commands.add_parser("import", help="bulk import words from a CSV or JSONL file")
+    import_cmd.add_argument("file")
+    commands.add_parser("compile", help="write the bank as a compiled snapshot that loaders pick up instead")
+    commands.add_parser("decompile", help="write the bank back out as plain JSON")
+    args = parser.parse_args(argv)
+
+    bank = get_bank(args.bank)
+    if args.command == "import":
+        result = bank.bulk_import(iter_import_rows(args.file),
+                                  progress=lambda r: print(r, file=sys.stderr))
+        bank.close()
+        print(f"Imported {args.file}: {result}")
+    elif args.command in ("compile", "decompile"):
+        # Folds the journal in as well, so the new snapshot is complete on its own
+        snapshot_path = bank.compiled_path if args.command == "compile" else bank.path
+        bank.snapshot_path = snapshot_path
+        bank.save()
+        bank.close()
+        print(f"Wrote {len(bank)} words to {snapshot_path}")
+
+
+if __name__ == "__main__":
+    main()
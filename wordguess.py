@@ -1,18 +1,54 @@
+from startup import StartupTimer
+
+startup = StartupTimer("wordguess", until=("first frame", "data loaded"))
+
+import math
 import tkinter as tk
 from tkinter import ttk, messagebox
-import random
-import json
-
-def load_words(filepath='words.json'):
-    with open(filepath, 'r') as f:
-        return json.load(f)
+from wordbank import DIFFICULTIES, get_bank
+from engine import HangmanState, Score, INVALID, REPEATED, WON, LOST, MAX_ATTEMPTS, ROUND_SECONDS
+from timerwheel import TimerWheel, tk_driver
+from iowriter import get_writer, deliver_on
+import metrics
+import recording
+from metrics import timed
+
+startup.mark("imports")
+
+# Timer owners: everything tied to the widgets on screen, and the round clock
+SCREEN = "screen"
+ROUND = "round"
+
+@timed("game_load")
+def load_game_data():
+    # Runs on the I/O thread while the first screen is already showing
+    from leaderboard import get_leaderboard
+    from scheduler import get_scheduler
+    from candidates import get_candidate_index
+    bank = get_bank()
+    candidates = get_candidate_index(bank)
+    candidates.build()
+    leaderboard = get_leaderboard()
+    scheduler = get_scheduler(bank)
+    # Words are picked from this player's review queue, saved with the leaderboard
+    scheduler.store = leaderboard
+    # The player picks a difficulty per game, so every tier's queue is built here
+    scheduler.schedule(leaderboard.player).build(DIFFICULTIES)
+    wins, losses = leaderboard.totals("hangman", leaderboard.player)
+    return bank, scheduler, candidates, leaderboard, wins, losses, leaderboard.high_score("hangman")
 
 class WordGuessGame:
     def __init__(self, master):
         self.master = master
         self.master.title("Word Guessing Game")
         self.master.geometry("550x450")
-        self.words_data = load_words()
+        self.bank = None
+        self.words_data = []
+        self.scheduler = None
+        self.candidate_index = None
+        self.candidates = None
+        self.leaderboard = None
+        self.recorder = recording.start("hangman", get_writer())
 
         # Dark mode colors
         self.bg_color = "#1e1e1e"
@@ -24,11 +60,33 @@ class WordGuessGame:
         # Stats and control
         self.wins = 0
         self.losses = 0
+        self.score = Score()
+        self.run = None
         self.difficulty = None
-        self.timer_seconds = 60
-        self.timer_id = None
+        self.timer_seconds = ROUND_SECONDS
+        self.round_timer = None
+        self.summary_label = None
+        self.timers = tk_driver(self.master, TimerWheel(tick=0.01))
+        # Loading and leaderboard writes happen on a background thread; failures are reported here
+        writer = deliver_on(get_writer(), self.timers)
+        writer.on_error = lambda key, error: messagebox.showerror("Save Failed", str(error))
+        metrics.collect("io_writer", writer.metrics)
+        writer.submit(("load", "game"), load_game_data, callback=self.on_loaded)
 
         self.start_difficulty_selection()
+        self.master.after_idle(lambda: startup.mark("first frame"))
+
+    def on_loaded(self, data, error):
+        if error is not None:
+            messagebox.showerror("Load Failed", f"Couldn't load the word bank: {error}")
+            return
+        self.bank, self.scheduler, self.candidate_index, self.leaderboard, self.wins, self.losses, high_score = data
+        self.words_data = self.bank.entries
+        self.score.high_score = max(self.score.high_score, high_score)
+        self.run = self.leaderboard.start_run("hangman")
+        if self.summary_label is not None and self.summary_label.winfo_exists():
+            self.summary_label.config(text=self.scoreboard_text())
+        startup.mark("data loaded")
 
     def start_difficulty_selection(self):
         self.clear_screen()
@@ -46,18 +104,24 @@ class WordGuessGame:
         self.display_scoreboard()
 
     def start_game(self):
+        if self.scheduler is None:
+            messagebox.showinfo("Loading", "The word bank is still loading, try again in a moment.")
+            return
         self.difficulty = self.difficulty_choice.get()
-        filtered_words = [entry for entry in self.words_data if entry['difficulty'] == self.difficulty]
-        if not filtered_words:
+        # A bank locked by an import elsewhere is played as it is rather than waited for
+        self.words_data = self.bank.refresh(wait=False).entries
+        word_entry = self.scheduler.draw(self.difficulty, player=self.leaderboard.player)
+        if word_entry is None:
             messagebox.showerror("No Words", f"No words for difficulty: {self.difficulty}")
             return
 
-        word_entry = random.choice(filtered_words)
         self.word = word_entry['word']
         self.hint = word_entry['hint']
-        self.guessed = set()
-        self.attempts_left = 7
-        self.timer_seconds = 60
+        self.game = HangmanState(self.word, MAX_ATTEMPTS)
+        self.candidates = self.candidate_index.track(self.word)
+        self.timer_seconds = ROUND_SECONDS
+        if self.recorder is not None:
+            self.recorder.round(self.word, self.difficulty)
 
         self.setup_game_screen()
         self.start_timer()
@@ -71,15 +135,18 @@ class WordGuessGame:
         self.animate_typing(self.hint, self.hint_label)
 
         self.word_display = tk.StringVar()
+        self.candidates_display = tk.StringVar()
         self.update_display()
         tk.Label(self.master, textvariable=self.word_display,
-                 font=("Courier", 24), bg=self.bg_color, fg=self.fg_color).pack(pady=15)
+                 font=("Courier", 24), bg=self.bg_color, fg=self.fg_color).pack(pady=(15, 0))
+        tk.Label(self.master, textvariable=self.candidates_display,
+                 font=("Arial", 11), bg=self.bg_color, fg="gray").pack(pady=(0, 10))
 
         self.entry = tk.Entry(self.master, font=("Arial", 14), bg="#2d2d2d", fg=self.fg_color, insertbackground="white")
         self.entry.pack()
         self.entry.bind("<Return>", self.make_guess)
 
-        self.status_label = self.style_label(f"Attempts left: {self.attempts_left}", size=12)
+        self.status_label = self.style_label(f"Attempts left: {self.game.attempts_left}", size=12)
         self.status_label.pack(pady=10)
 
         self.timer_label = self.style_label(f"Time left: {self.timer_seconds} s", size=12, fg="orange")
@@ -92,36 +159,48 @@ class WordGuessGame:
         self.update_scoreboard()
 
     def update_display(self):
-        display_text = ' '.join([ch if ch in self.guessed else '_' for ch in self.word])
-        self.word_display.set(display_text)
+        self.word_display.set(self.game.pattern())
+        count = self.candidates.count
+        self.candidates_display.set(f"{count} word{'' if count == 1 else 's'} still possible")
 
+    @timed("make_guess")
     def make_guess(self, event=None):
         guess = self.entry.get().lower()
         self.entry.delete(0, tk.END)
+        if self.recorder is not None:
+            self.recorder.guess(guess)
 
-        if not guess.isalpha() or len(guess) != 1:
+        result = self.game.guess(guess)
+        metrics.count("hangman_guesses", result=result)
+        if result == INVALID:
             messagebox.showwarning("Invalid Input", "Enter a single alphabet.")
             return
 
-        if guess in self.guessed:
+        if result == REPEATED:
             messagebox.showinfo("Repeated", f"You already guessed '{guess}'.")
             return
 
-        self.guessed.add(guess)
+        self.candidates.guess(guess)
+        self.update_display()
+        self.status_label.config(text=f"Attempts left: {self.game.attempts_left}")
+        if result == WON:
+            self.stop_timer()
+            self.record_result(win=True)
+            self.end_game(win=True)
+        elif result == LOST:
+            self.stop_timer()
+            self.record_result(win=False)
+            self.end_game(win=False)
 
-        if guess in self.word:
-            self.update_display()
-            if all(letter in self.guessed for letter in self.word):
-                self.stop_timer()
-                self.wins += 1
-                self.end_game(win=True)
+    def record_result(self, win):
+        if win:
+            self.wins += 1
+            self.score.add(self.game.attempts_left)
+            self.leaderboard.record_score(self.run, self.score.score)
         else:
-            self.attempts_left -= 1
-            self.status_label.config(text=f"Attempts left: {self.attempts_left}")
-            if self.attempts_left == 0:
-                self.stop_timer()
-                self.losses += 1
-                self.end_game(win=False)
+            self.losses += 1
+        self.leaderboard.record_result("hangman", self.difficulty, win)
+        self.scheduler.record(self.word, win, self.leaderboard.player)
 
     def end_game(self, win):
         result_msg = f"You won! The word was '{self.word}'" if win else f"You lost! The word was '{self.word}'"
@@ -143,25 +222,42 @@ class WordGuessGame:
 
     def display_scoreboard(self):
         self.style_label("Scoreboard", size=13).pack(pady=(20, 5))
-        tk.Label(self.master, text=f"Wins: {self.wins}   Losses: {self.losses}",
-                 bg=self.bg_color, fg=self.fg_color, font=("Arial", 12)).pack()
+        self.summary_label = tk.Label(self.master, text=self.scoreboard_text(),
+                                      bg=self.bg_color, fg=self.fg_color, font=("Arial", 12))
+        self.summary_label.pack()
 
     def update_scoreboard(self):
-        self.fade_in_text(f"Wins: {self.wins}   Losses: {self.losses}", self.scoreboard_label)
+        self.fade_in_text(self.scoreboard_text(), self.scoreboard_label)
+
+    def scoreboard_text(self):
+        return f"Wins: {self.wins}   Losses: {self.losses}   Score: {self.score.score}   Best: {self.score.high_score}"
 
     def clear_screen(self):
+        # Drop pending animations and clock updates before their labels go away
+        self.timers.cancel_owner(SCREEN)
+        self.timers.cancel_owner(ROUND)
         for widget in self.master.winfo_children():
             widget.destroy()
 
-    def animate_typing(self, text, label, idx=0):
-        if idx <= len(text):
-            label.config(text=text[:idx])
-            self.master.after(30, lambda: self.animate_typing(text, label, idx + 1))
+    def animate_typing(self, text, label):
+        self.reveal_text(text, label, 0.03)
+
+    def fade_in_text(self, full_text, label):
+        self.reveal_text(full_text, label, 0.04)
+
+    def reveal_text(self, text, label, interval):
+        label.config(text="")
+        if not text:
+            return
+        shown = [0]
+
+        def step():
+            shown[0] += 1
+            label.config(text=text[:shown[0]])
+            if shown[0] >= len(text):
+                timer.cancel()
 
-    def fade_in_text(self, full_text, label, current=0):
-        if current <= len(full_text):
-            label.config(text=full_text[:current])
-            self.master.after(40, lambda: self.fade_in_text(full_text, label, current + 1))
+        timer = self.timers.every(interval, step, owner=SCREEN)
 
     def style_label(self, text, size=12, fg=None, wrap=0):
         return tk.Label(self.master, text=text, font=("Arial", size),
@@ -172,29 +268,34 @@ class WordGuessGame:
 
     # Timer logic
     def start_timer(self):
+        self.round_timer = self.timers.schedule(self.timer_seconds, self.time_up, owner=ROUND)
         self.update_timer_label()
-        self.timer_id = self.master.after(1000, self.countdown)
+        self.timers.every(1.0, self.update_timer_label, owner=ROUND)
 
-    def countdown(self):
-        if self.timer_seconds > 0:
-            self.timer_seconds -= 1
-            self.update_timer_label()
-            self.timer_id = self.master.after(1000, self.countdown)
-        else:
-            self.losses += 1
-            self.stop_timer()
-            self.end_game(win=False)
+    def time_up(self):
+        if self.recorder is not None:
+            self.recorder.timeout()
+        self.game.timeout()
+        self.record_result(win=False)
+        self.stop_timer()
+        self.end_game(win=False)
 
     def update_timer_label(self):
+        # Derived from the deadline, so a late tick never makes the clock drift
+        self.timer_seconds = math.ceil(self.timers.remaining(self.round_timer))
         self.timer_label.config(text=f"Time left: {self.timer_seconds} s")
 
     def stop_timer(self):
-        if self.timer_id:
-            self.master.after_cancel(self.timer_id)
-            self.timer_id = None
+        self.timers.cancel_owner(ROUND)
 
 # Launch
 if __name__ == "__main__":
+    metrics.start()
     root = tk.Tk()
     app = WordGuessGame(root)
     root.mainloop()
+    if app.recorder is not None:
+        app.recorder.close()
+    if app.leaderboard is not None:
+        app.leaderboard.close()
+    get_writer().close()
@@ -1,27 +1,91 @@
 # main.py
 
+from startup import StartupTimer
+
+startup = StartupTimer("wordguessapp", until=("first frame", "data loaded"))
+
+# Only what the first frame needs is imported here; KivyMD widgets are imported
+# by the screens that use them and the data modules on the I/O thread
 from kivymd.app import MDApp
-from kivymd.uix.button import MDRaisedButton
-from kivymd.uix.label import MDLabel
-from kivymd.uix.textfield import MDTextField
-from kivymd.uix.snackbar import Snackbar
-from kivymd.uix.boxlayout import MDBoxLayout
-from kivymd.uix.scrollview import MDScrollView
-from kivy.uix.screenmanager import ScreenManager, Screen, FadeTransition
 from kivy.clock import Clock
-from kivy.uix.boxlayout import BoxLayout
-from datetime import datetime
-import os
-import json
+from kivy.uix.recycleview import RecycleView
+from kivy.uix.recycleboxlayout import RecycleBoxLayout
+from kivy.uix.screenmanager import ScreenManager, Screen, FadeTransition
+import math
 import random
+from nearby import distance
+from wordbank import get_bank, refresh_on, word_key
+from engine import ScrambleRound, Score, ROUND_SECONDS
+from timerwheel import TimerWheel, kivy_driver
+from iowriter import get_writer, deliver_on
+import metrics
+import recording
+from metrics import timed
+
+startup.mark("imports")
 
 JSON_FILE = "words.json"
-SCORE_FILE = "score.json"
-HISTORY_FILE = "history.json"
+
+# One wheel drives every countdown in the app; each screen owns its own timers
+timers = TimerWheel(tick=0.05)
+
+
+def notify(text):
+    from kivymd.uix.snackbar import Snackbar
+    Snackbar(text=text).open()
+
+
+@timed("game_load")
+def load_game_data():
+    # Runs on the I/O thread: the bank, play history and leaderboard are read
+    # while the first frame is already on screen
+    from anagram import get_anagram_index
+    from history import HistoryLog, HISTORY_FILE
+    from leaderboard import get_leaderboard
+    from nearby import get_nearby_index
+    from scheduler import get_scheduler
+    bank = get_bank(JSON_FILE)
+    bank.writer = get_writer()
+    nearby = get_nearby_index(bank)
+    nearby.build()
+    leaderboard = get_leaderboard()
+    scheduler = get_scheduler(bank)
+    # Words are picked from this player's review queue, saved with the leaderboard
+    scheduler.store = leaderboard
+    # Rounds draw from every difficulty, so only the whole-bank queue is needed
+    scheduler.schedule(leaderboard.player).build()
+    return (scheduler, get_anagram_index(bank), nearby, HistoryLog(HISTORY_FILE, writer=get_writer()),
+            leaderboard, leaderboard.high_score("scramble"))
+
+
+@timed("bank_load")
+def load_manager_data():
+    # Runs on the I/O thread; the search index is built here rather than on the first keystroke
+    from search import get_search_index
+    bank = get_bank(JSON_FILE)
+    index = get_search_index(bank)
+    index.build()
+    return bank, index
+
+
+class RowList(RecycleView):
+    # Only the rows in view get widgets; rows live in self.data as dicts
+    def __init__(self, **kwargs):
+        from kivymd.uix.label import MDLabel
+        super().__init__(**kwargs)
+        self.viewclass = MDLabel
+        layout = RecycleBoxLayout(orientation="vertical", size_hint_y=None,
+                                  default_size=(None, 30), default_size_hint=(1, None))
+        layout.bind(minimum_height=layout.setter('height'))
+        self.add_widget(layout)
 
 
 class WordManagerScreen(Screen):
     def __init__(self, **kwargs):
+        from kivymd.uix.boxlayout import MDBoxLayout
+        from kivymd.uix.button import MDRaisedButton
+        from kivymd.uix.label import MDLabel
+        from kivymd.uix.textfield import MDTextField
         super().__init__(**kwargs)
         self.layout = MDBoxLayout(orientation='vertical', padding=20, spacing=10)
 
@@ -33,83 +97,167 @@ class WordManagerScreen(Screen):
         self.go_to_game = MDRaisedButton(text="Go to Game", on_release=lambda x: setattr(self.manager, 'current', 'game'))
 
         self.word_list_label = MDLabel(text="Word List Preview", halign="center")
-
-        self.scroll = MDScrollView()
-        self.scroll_layout = MDBoxLayout(orientation="vertical", size_hint_y=None)
-        self.scroll_layout.bind(minimum_height=self.scroll_layout.setter('height'))
-        self.scroll.add_widget(self.scroll_layout)
+        self.search_input = MDTextField(hint_text="Search words or hints", mode="rectangle")
+        self.search_input.bind(text=lambda instance, text: self.update_word_list())
+
+        self.scroll = RowList()
+        # Word key of each row in scroll.data, and each key's row, so one change patches one row
+        self.row_keys = []
+        self.rows = {}
+        # Whether the last search stopped at SEARCH_LIMIT results
+        self.capped = False
+        self.redraw_pending = False
+        self.bank = None
+        self.search_index = None
 
         self.layout.add_widget(MDLabel(text="Word Manager", halign="center", font_style="H5"))
         for widget in [self.word_input, self.difficulty_input, self.hint_input,
-                       self.add_button, self.word_list_label, self.scroll, self.go_to_game]:
+                       self.add_button, self.word_list_label, self.search_input, self.scroll,
+                       self.go_to_game]:
             self.layout.add_widget(widget)
 
         self.add_widget(self.layout)
+        self.add_button.disabled = True
+        self.word_list_label.text = "Loading words..."
+        get_writer().submit(("load", "manager"), load_manager_data, callback=self.on_loaded)
+
+    def on_loaded(self, result, error):
+        if error is not None:
+            self.word_list_label.text = f"Couldn't load words: {error}"
+            return
+        self.bank, self.search_index = result
+        self.bank.listeners.append(self.on_bank_change)
+        self.add_button.disabled = False
+        if self.manager is not None and self.manager.current == self.name:
+            self.on_pre_enter()
         self.update_word_list()
 
-    def load_data(self):
-        if os.path.exists(JSON_FILE):
-            try:
-                with open(JSON_FILE, "r") as f:
-                    return json.load(f)
-            except json.JSONDecodeError:
-                return []
-        return []
-
-    def save_data(self, data):
-        with open(JSON_FILE, "w") as f:
-            json.dump(data, f, indent=4)
+    def on_pre_enter(self, *args):
+        # Picks up edits made by other processes, and keeps polling while the screen is up;
+        # the poll skips a locked bank rather than waiting on the UI thread
+        if self.bank is not None:
+            refresh_on(self.bank, timers)
+
+    def on_leave(self, *args):
+        if self.bank is not None:
+            timers.cancel_owner(self.bank)
+
+    def on_bank_change(self, kind, old, new):
+        if self.redraw_pending:
+            return
+        if kind == "reload":
+            # Everything may have changed; redrawn once, on the next frame
+            self.redraw_pending = True
+            Clock.schedule_once(self.redraw)
+            return
+        query = self.search_input.text
+        if new is not None and query.strip() and not self.search_index.matches(new, query):
+            new = None
+        data = self.scroll.data
+        i = self.rows.pop(word_key(old['word']), None) if old is not None else None
+        if new is not None:
+            key = word_key(new['word'])
+            if i is None:
+                i = self.rows.get(key)
+            if i is None:
+                i = len(data)
+                data.append(self.word_row(new))
+                self.row_keys.append(key)
+            else:
+                # An edit keeps its row
+                data[i] = self.word_row(new)
+                self.row_keys[i] = key
+            self.rows[key] = i
+        elif i is not None:
+            # Gone, or no longer matching the search: the last row takes its place
+            last, last_key = data.pop(), self.row_keys.pop()
+            if i < len(data):
+                data[i] = last
+                self.row_keys[i] = last_key
+                self.rows[last_key] = i
+        self.update_label()
+
+    def redraw(self, dt):
+        self.redraw_pending = False
+        self.update_word_list()
 
+    @timed("update_word_list")
     def update_word_list(self):
-        data = self.load_data()
-        self.scroll_layout.clear_widgets()
-        if not data:
-            self.word_list_label.text = "No words added."
+        if self.bank is None:
+            return
+        from search import SEARCH_LIMIT
+        results = self.search_index.search(self.search_input.text)
+        self.capped = results is not None and len(results) >= SEARCH_LIMIT
+        items = self.bank.entries if results is None else results
+        self.scroll.data = [self.word_row(item) for item in items]
+        self.row_keys = [word_key(item['word']) for item in items]
+        self.rows = {key: i for i, key in enumerate(self.row_keys)}
+        self.update_label()
+
+    def update_label(self):
+        if self.search_input.text.strip():
+            if not self.row_keys:
+                self.word_list_label.text = "No matches."
+            else:
+                self.word_list_label.text = f"{len(self.row_keys)}{'+' if self.capped else ''} matches"
         else:
-            self.word_list_label.text = "Word List Preview"
-            for i, item in enumerate(data[-20:]):
-                label = MDLabel(
-                    text=f"{i+1}. {item['word']} - {item['difficulty']}",
-                    halign="left",
-                    size_hint_y=None,
-                    height=30
-                )
-                self.scroll_layout.add_widget(label)
+            self.word_list_label.text = "Word List Preview" if self.row_keys else "No words added."
+
+    def word_row(self, item):
+        return {"text": f"{item['word']} - {item['difficulty']}", "halign": "left"}
 
     def add_word(self, instance):
-        word = self.word_input.text.strip()
+        from anagram import is_degenerate
+        word = self.word_input.text.strip().lower()
         difficulty = self.difficulty_input.text.strip()
         hint = self.hint_input.text.strip()
 
         if word and difficulty and hint:
+            bank = self.bank
+            if word in bank:
+                notify(f"'{word}' already exists")
+                return
             try:
-                data = self.load_data()
-                data.append({"word": word, "difficulty": difficulty, "hint": hint})
-                self.save_data(data)
+                bank.add({"word": word, "difficulty": difficulty, "hint": hint})
 
-                Snackbar(text=f"Added '{word}'").open()
+                if is_degenerate(word):
+                    notify(f"Added '{word}' (it can't be scrambled, so the game will skip it)")
+                else:
+                    notify(f"Added '{word}'")
                 self.word_input.text = self.difficulty_input.text = self.hint_input.text = ""
-                self.update_word_list()
             except Exception as e:
-                Snackbar(text=f"Error adding word: {str(e)}").open()
+                notify(f"Error adding word: {str(e)}")
         else:
-            Snackbar(text="All fields are required").open()
+            notify("All fields are required")
 
 
 class WordGameScreen(Screen):
     def __init__(self, **kwargs):
+        from kivymd.uix.boxlayout import MDBoxLayout
+        from kivymd.uix.button import MDRaisedButton
+        from kivymd.uix.label import MDLabel
+        from kivymd.uix.textfield import MDTextField
         super().__init__(**kwargs)
-        self.timer = 60
-        self.score = 0
-        self.high_score = self.load_high_score()
-        self.clock_event = None
-        self.words = []
-        self.used_indices = set()
+        self.timer = ROUND_SECONDS
+        self.scores = Score()
+        self.leaderboard = None
+        self.run = None
+        self.round = None
+        # False while playing the placeholder word, which nothing is recorded for
+        self.in_bank = False
+        self.round_timer = None
+        self.scheduler = None
+        self.anagrams = None
+        self.nearby = None
+        self.history = None
+        # With recording on, scrambles come from the recording's seed so a replay matches
+        self.recorder = recording.start("scramble", get_writer())
+        self.rng = random.Random(self.recorder.seed if self.recorder is not None else None)
 
         self.layout = MDBoxLayout(orientation='vertical', padding=20, spacing=10)
 
         self.title = MDLabel(text="Word Guess Game", halign="center", font_style="H5")
-        self.scrambled_label = MDLabel(text="Word", halign="center")
+        self.scrambled_label = MDLabel(text="Loading words...", halign="center")
         self.timer_label = MDLabel(text="60s", halign="center")
         self.score_label = MDLabel(text="Score: 0 | High Score: 0", halign="center")
         self.entry = MDTextField(hint_text="Your Guess", mode="rectangle")
@@ -123,10 +271,7 @@ class WordGameScreen(Screen):
 
         # Scrollable history
         self.history_label = MDLabel(text="Guess History", halign="center")
-        self.history_scroll = MDScrollView(size_hint=(1, 0.3))
-        self.history_layout = MDBoxLayout(orientation="vertical", size_hint_y=None)
-        self.history_layout.bind(minimum_height=self.history_layout.setter('height'))
-        self.history_scroll.add_widget(self.history_layout)
+        self.history_scroll = RowList(size_hint=(1, 0.3))
 
         widgets = [
             self.title, self.scrambled_label, self.timer_label, self.score_label,
@@ -139,157 +284,195 @@ class WordGameScreen(Screen):
             self.layout.add_widget(w)
 
         self.add_widget(self.layout)
-        self.load_words()
+        self.set_buttons_enabled(False)
+        get_writer().submit(("load", "game"), load_game_data, callback=self.on_loaded)
+
+    def on_loaded(self, data, error):
+        if error is not None:
+            self.scrambled_label.text = f"Couldn't load words: {error}"
+            return
+        self.scheduler, self.anagrams, self.nearby, self.history, self.leaderboard, high_score = data
+        self.scores.high_score = max(self.scores.high_score, high_score)
+        # Everything scored from launch to exit is one leaderboard run
+        self.run = self.leaderboard.start_run("scramble")
+        self.set_buttons_enabled(True)
+        self.update_score_display()
         self.load_history()
         self.next_word()
+        startup.mark("data loaded")
 
-    def load_words(self):
-        if os.path.exists(JSON_FILE):
-            try:
-                with open(JSON_FILE, "r") as f:
-                    self.words = json.load(f)
-            except json.JSONDecodeError:
-                self.words = []
-        if not self.words:
-            self.words = [{"word": "example", "difficulty": "Medium", "hint": "A sample word"}]
-        self.used_indices = set()
+    def set_buttons_enabled(self, enabled):
+        for button in (self.check_button, self.hint_button, self.next_button, self.back_button):
+            button.disabled = not enabled
 
     def get_random_word(self):
-        if len(self.used_indices) == len(self.words):
-            self.used_indices.clear()
-        while True:
-            index = random.randint(0, len(self.words) - 1)
-            if index not in self.used_indices:
-                self.used_indices.add(index)
-                return self.words[index]
+        # A bank locked by an import elsewhere is played as it is rather than waited for
+        self.scheduler.bank.refresh(wait=False)
+        # Words that can't be scrambled are skipped
+        word = self.scheduler.draw(accept=lambda entry: self.anagrams.is_scrambleable(entry['word']),
+                                   player=self.leaderboard.player)
+        self.in_bank = word is not None
+        if word is None:
+            return {"word": "example", "difficulty": "Medium", "hint": "A sample word"}
+        return word
 
     def next_word(self, *args):
+        if self.round is not None and self.in_bank and not self.round.solved and self.timer > 0:
+            # Skipped before time ran out; the scheduler treats it as a miss (as the server does)
+            self.scheduler.record(self.current_word, False, self.leaderboard.player)
         self.stop_timer()
-        word_data = self.get_random_word()
-        self.current_word = word_data["word"]
-        self.current_hint = word_data["hint"]
-        self.current_difficulty = word_data["difficulty"]
-
-        while True:
-            scrambled = ''.join(random.sample(self.current_word, len(self.current_word)))
-            if scrambled.lower() != self.current_word.lower():
-                break
-
-        self.scrambled_label.text = f"Guess: {scrambled}"
-        self.timer = 60
-        self.timer_label.text = "60s"
+        self.round = ScrambleRound(self.get_random_word(), self.rng)
+        if self.recorder is not None:
+            self.recorder.round(self.round.word, self.round.difficulty)
+        self.current_word = self.round.word
+        self.current_hint = self.round.hint
+        self.current_difficulty = self.round.difficulty
+
+        self.scrambled_label.text = f"Guess: {self.round.scrambled}"
+        self.timer = ROUND_SECONDS
+        self.timer_label.text = f"{ROUND_SECONDS}s"
         self.entry.text = ""
         self.hint_label.text = ""
         self.result_label.text = ""
         self.start_timer()
 
+    @timed("check_answer")
     def check_answer(self, *args):
+        if self.round is None or self.round.solved or self.timer == 0:
+            # The round is over; only the next word takes guesses again
+            return
+        if self.recorder is not None:
+            self.recorder.guess(self.entry.text)
         guess = self.entry.text.strip().lower()
-        correct = guess == self.current_word.lower()
+        correct = self.round.check(guess)
         if correct:
             self.result_label.text = "Correct!"
             self.stop_timer()
-            self.update_score(10 if self.current_difficulty.lower() == "easy" else 20)
+            if self.in_bank:
+                self.update_score(self.round.points())
+                self.leaderboard.record_result("scramble", self.current_difficulty, True)
+                self.scheduler.record(self.current_word, True, self.leaderboard.player)
+            outcome = "correct"
+        elif self.anagrams.is_other_anagram(guess, self.current_word):
+            self.result_label.text = "Valid anagram, but not the word we're after"
+            outcome = "anagram"
+        elif distance(guess, self.current_word) == 1:
+            self.result_label.text = "So close! One letter off"
+            outcome = "close"
         else:
-            self.result_label.text = "Try Again"
+            # A misspelling of some other bank word is worth pointing out
+            suggestion = self.nearby.near(guess, limit=1)
+            if suggestion:
+                self.result_label.text = f"Did you mean '{suggestion[0]}'? That's not the word, try again"
+                outcome = "near"
+            else:
+                self.result_label.text = "Try Again"
+                outcome = "wrong"
+        metrics.count("scramble_guesses", result=outcome)
         self.update_score_display()
         self.save_history(guess, correct)
 
     def show_hint(self, *args):
+        if self.recorder is not None:
+            self.recorder.hint()
         self.hint_label.text = f"Hint: {self.current_hint}"
-        if self.current_difficulty.lower() == "easy":
-            self.update_score(-5)
-            Snackbar(text="Hint penalty: -5 points for Easy").open()
+        penalty = self.round.use_hint()
+        if penalty:
+            self.update_score(-penalty)
+            notify(f"Hint penalty: -{penalty} points for Easy")
             self.update_score_display()
 
     def update_score(self, points):
-        self.score += points
-        if self.score < 0:
-            self.score = 0
-        if self.score > self.high_score:
-            self.high_score = self.score
-            self.save_high_score()
+        self.scores.add(points)
+        if points > 0:
+            self.leaderboard.record_score(self.run, self.scores.score)
 
     def update_score_display(self):
-        self.score_label.text = f"Score: {self.score} | High Score: {self.high_score}"
-
-    def load_high_score(self):
-        if os.path.exists(SCORE_FILE):
-            try:
-                with open(SCORE_FILE, "r") as f:
-                    return json.load(f).get("high_score", 0)
-            except json.JSONDecodeError:
-                return 0
-        return 0
-
-    def save_high_score(self):
-        with open(SCORE_FILE, "w") as f:
-            json.dump({"high_score": self.high_score}, f)
+        self.score_label.text = f"Score: {self.scores.score} | High Score: {self.scores.high_score}"
 
     def start_timer(self):
         self.stop_timer()
-        self.clock_event = Clock.schedule_interval(self.update_timer, 1)
+        self.round_timer = timers.schedule(ROUND_SECONDS, self.time_up, owner=self)
+        timers.every(1, self.update_timer, owner=self)
 
     def stop_timer(self):
-        if self.clock_event:
-            self.clock_event.cancel()
-            self.clock_event = None
+        timers.cancel_owner(self)
 
-    def update_timer(self, dt):
-        self.timer -= 1
+    def update_timer(self):
+        # Derived from the deadline, so a late tick never makes the clock drift
+        self.timer = math.ceil(timers.remaining(self.round_timer))
         self.timer_label.text = f"{self.timer}s"
-        if self.timer <= 0:
-            self.result_label.text = f"Time's up! Word was: {self.current_word}"
-            self.stop_timer()
+
+    def time_up(self):
+        if self.recorder is not None:
+            self.recorder.timeout()
+        self.timer = 0
+        self.timer_label.text = "0s"
+        self.result_label.text = f"Time's up! Word was: {self.current_word}"
+        self.stop_timer()
+        if self.in_bank:
+            self.leaderboard.record_result("scramble", self.current_difficulty, False)
+            self.scheduler.record(self.current_word, False, self.leaderboard.player)
 
     def switch_to_manager(self, *args):
         self.stop_timer()
-        self.manager.current = 'manager'
+        MDApp.get_running_app().show('manager')
 
+    @timed("save_history")
     def save_history(self, guess, correct):
-        record = {
-            "word": self.current_word,
-            "guess": guess,
-            "result": "Correct" if correct else "Wrong",
-            "time": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        }
-        history = []
-        if os.path.exists(HISTORY_FILE):
-            try:
-                with open(HISTORY_FILE, "r") as f:
-                    history = json.load(f)
-            except:
-                pass
-        history.append(record)
-        with open(HISTORY_FILE, "w") as f:
-            json.dump(history[-30:], f, indent=4)  # Keep last 30
-        self.load_history()
+        elapsed = ROUND_SECONDS - timers.remaining(self.round_timer)
+        record = self.history.append(self.current_word, guess, correct, self.current_difficulty,
+                                     self.leaderboard.player, elapsed)
+        rows = self.history_scroll.data
+        rows.insert(0, self.history_row(record))
+        if len(rows) > self.history.recent.maxlen:
+            rows.pop()
 
     def load_history(self):
-        self.history_layout.clear_widgets()
-        if os.path.exists(HISTORY_FILE):
-            try:
-                with open(HISTORY_FILE, "r") as f:
-                    history = json.load(f)
-                for item in reversed(history):
-                    lbl = MDLabel(
-                        text=f"{item['time']} | {item['guess']} -> {item['result']} ({item['word']})",
-                        size_hint_y=None, height=30
-                    )
-                    self.history_layout.add_widget(lbl)
-            except:
-                pass
+        self.history_scroll.data = [self.history_row(item) for item in reversed(self.history.recent)]
+
+    def history_row(self, item):
+        return {"text": f"{item['time']} | {item['guess']} -> {item['result']} ({item['word']})"}
 
 
 class WordGuessGameApp(MDApp):
+    # Screens other than the first are built the first time they are shown
+    screens = {'game': WordGameScreen, 'manager': WordManagerScreen}
+
     def build(self):
         self.theme_cls.theme_style = "Dark"
         self.theme_cls.primary_palette = "Indigo"
+        kivy_driver(timers)
+        # Loading and all writes (word bank, history, leaderboard) go through one background thread
+        writer = deliver_on(get_writer(), timers)
+        writer.on_error = lambda key, error: notify(f"Couldn't save: {error}")
+        metrics.collect("io_writer", writer.metrics)
         sm = ScreenManager(transition=FadeTransition())
         sm.add_widget(WordGameScreen(name='game'))
-        sm.add_widget(WordManagerScreen(name='manager'))
         return sm
 
+    def on_start(self):
+        # Callbacks scheduled now run before the first frame is drawn, so wait one more
+        Clock.schedule_once(lambda dt: Clock.schedule_once(lambda dt: startup.mark("first frame")))
+
+    def show(self, name):
+        if not self.root.has_screen(name):
+            self.root.add_widget(self.screens[name](name=name))
+        self.root.current = name
+
+    def on_stop(self):
+        game = self.root.get_screen('game')
+        if game.recorder is not None:
+            game.recorder.close()
+        if game.history is not None:
+            game.history.close()
+        if game.leaderboard is not None:
+            game.leaderboard.close()
+        if game.scheduler is not None:
+            game.scheduler.bank.close()
+        get_writer().close()
+
 
 if __name__ == '__main__':
+    metrics.start()
     WordGuessGameApp().run()
@@ -1,147 +1,295 @@
+from startup import StartupTimer
+
+startup = StartupTimer("wordguessmanage", until=("first frame", "data loaded"))
+
 import tkinter as tk
-from tkinter import ttk, messagebox
-import json
-import os
+from tkinter import ttk, messagebox, filedialog
+from wordbank import ConflictError, get_bank, iter_import_rows, refresh_on
+from tklistview import WindowedListbox
+from timerwheel import TimerWheel, tk_driver
+from iowriter import get_writer, deliver_on
+import metrics
+from metrics import timed
+
+startup.mark("imports")
 
 FILE_PATH = "words.json"
 
-def load_data():
-    if os.path.exists(FILE_PATH):
-        with open(FILE_PATH, 'r') as f:
+@timed("bank_load")
+def load_bank():
+    # Runs on the I/O thread while the window is already showing
+    from search import get_search_index
+    bank = get_bank(FILE_PATH)
+    bank.writer = get_writer()
+    index = get_search_index(bank)
+    index.build()
+    return bank, index
+
+class WordManager:
+    def __init__(self, root):
+        self.root = root
+        self.bank = None
+        self.search_index = None
+        self.data = []
+        self.redraw_pending = False
+
+        root.title("Word Bank JSON Manager")
+        root.geometry("600x400")
+        root.configure(bg="#1f1f1f")
+
+        # Title
+        tk.Label(root, text="Word Bank Manager", font=("Arial", 18, "bold"), fg="white", bg="#1f1f1f").pack(pady=10)
+
+        # Entry fields
+        form_frame = tk.Frame(root, bg="#1f1f1f")
+        form_frame.pack(pady=10)
+
+        tk.Label(form_frame, text="Word:", bg="#1f1f1f", fg="white").grid(row=0, column=0, sticky="e")
+        self.word_entry = tk.Entry(form_frame, width=30)
+        self.word_entry.grid(row=0, column=1, padx=5)
+
+        tk.Label(form_frame, text="Hint:", bg="#1f1f1f", fg="white").grid(row=1, column=0, sticky="e")
+        self.hint_entry = tk.Entry(form_frame, width=30)
+        self.hint_entry.grid(row=1, column=1, padx=5)
+
+        tk.Label(form_frame, text="Difficulty:", bg="#1f1f1f", fg="white").grid(row=2, column=0, sticky="e")
+        self.difficulty_var = tk.StringVar(value="easy")
+        difficulty_menu = ttk.Combobox(form_frame, textvariable=self.difficulty_var, values=["easy", "medium", "hard"], state="readonly")
+        difficulty_menu.grid(row=2, column=1)
+
+        # Buttons
+        btn_frame = tk.Frame(root, bg="#1f1f1f")
+        btn_frame.pack(pady=10)
+
+        self.buttons = [
+            ttk.Button(btn_frame, text="Add", command=self.add_word),
+            ttk.Button(btn_frame, text="Edit", command=self.edit_word),
+            ttk.Button(btn_frame, text="Delete", command=self.delete_word),
+            ttk.Button(btn_frame, text="Clear", command=self.clear_inputs),
+            ttk.Button(btn_frame, text="Import", command=self.import_words),
+        ]
+        for column, button in enumerate(self.buttons):
+            button.grid(row=0, column=column, padx=5)
+            button.state(["disabled"])
+
+        self.status_label = tk.Label(root, text="Loading words...", bg="#1f1f1f", fg="white")
+        self.status_label.pack()
+
+        # Listbox
+        list_frame = tk.Frame(root, bg="#1f1f1f")
+        list_frame.pack(pady=10)
+
+        self.search_var = tk.StringVar()
+        self.search_var.trace_add("write", self.run_search)
+        search_row = tk.Frame(list_frame, bg="#1f1f1f")
+        search_row.pack(fill=tk.X, pady=(0, 5))
+        tk.Label(search_row, text="Search:", bg="#1f1f1f", fg="white").pack(side=tk.LEFT)
+        tk.Entry(search_row, textvariable=self.search_var).pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+
+        self.word_listbox = WindowedListbox(list_frame, items=self.data, format_item=lambda entry: entry['word'],
+                                            height=10, width=50, bg="#1f1f1f")
+        self.word_listbox.pack()
+        self.word_listbox.bind_select(self.on_select)
+
+        # Loading and journal writes happen on a background thread; failures are reported here
+        self.timers = tk_driver(root, TimerWheel())
+        self.writer = deliver_on(get_writer(), self.timers)
+        self.writer.on_error = lambda key, error: messagebox.showerror("Save Failed", str(error))
+        metrics.collect("io_writer", self.writer.metrics)
+        self.writer.submit(("load", FILE_PATH), load_bank, callback=self.on_loaded)
+        root.after_idle(lambda: startup.mark("first frame"))
+
+    def on_loaded(self, result, error):
+        if error is not None:
+            self.status_label.config(text=f"Couldn't load {FILE_PATH}: {error}")
+            return
+        self.bank, self.search_index = result
+        self.data = self.bank.entries
+        # Edits made by other processes (another manager, a game adding words) show up here
+        self.bank.listeners.append(self.on_bank_change)
+        refresh_on(self.bank, self.timers)
+        self.status_label.config(text="")
+        for button in self.buttons:
+            button.state(["!disabled"])
+        self.run_search()
+        startup.mark("data loaded")
+
+    def on_bank_change(self, kind, old, new):
+        # A burst of changes (an import elsewhere) is redrawn once
+        if not self.redraw_pending:
+            self.redraw_pending = True
+            self.root.after_idle(self.redraw)
+
+    def redraw(self):
+        # Also runs after our own edits; the list stays where the user left it
+        self.redraw_pending = False
+        self.run_search(keep_position=True)
+
+    def conflict(self, error):
+        messagebox.showwarning("Changed Elsewhere", f"{error}. The list has been refreshed, please try again.")
+        self.bank.refresh()
+        self.run_search()
+
+    @timed("refresh_word_list")
+    def refresh_word_list(self):
+        # Only the visible window of rows is redrawn, however large the bank is
+        self.word_listbox.refresh()
+
+    @timed("run_search")
+    def run_search(self, *args, keep_position=False):
+        if self.search_index is None:
+            return
+        results = self.search_index.search(self.search_var.get())
+        self.word_listbox.set_items(self.data if results is None else results, keep_position)
+
+    def selected_entry(self):
+        selected = self.word_listbox.curselection()
+        if not selected:
+            return None, None
+        return selected[0], self.word_listbox.items[selected[0]]
+
+    def add_word(self):
+        from anagram import is_degenerate
+        word = self.word_entry.get().strip().lower()
+        hint = self.hint_entry.get().strip()
+        difficulty = self.difficulty_var.get()
+
+        if not word or not hint or not difficulty:
+            messagebox.showwarning("Incomplete", "Please fill all fields.")
+            return
+
+        if word in self.bank:
+            messagebox.showwarning("Duplicate", f"The word '{word}' already exists.")
+            return
+
+        try:
+            self.bank.add({"word": word, "hint": hint, "difficulty": difficulty})
+        except ConflictError as e:
+            self.conflict(e)
+            return
+        if self.word_listbox.items is self.data:
+            self.refresh_word_list()
+            self.word_listbox.see(len(self.data) - 1)
+        else:
+            self.run_search()
+        self.clear_inputs()
+        if is_degenerate(word):
+            self.status_label.config(text=f"'{word}' can't be scrambled; the unscramble game will skip it.")
+        messagebox.showinfo("Success", f"Word '{word}' added!")
+
+    def delete_word(self):
+        index, entry = self.selected_entry()
+        if entry is None:
+            messagebox.showwarning("Select", "Please select a word to delete.")
+            return
+        word = entry['word']
+        if messagebox.askyesno("Confirm", f"Delete word '{word}'?"):
+            # The entry is looked up again rather than trusting the row number: the
+            # list may have changed underneath the selection
+            bank_index = self.bank.index_of(entry)
             try:
-                return json.load(f)
-            except json.JSONDecodeError:
-                return []
-    return []
-
-def save_data(data):
-    with open(FILE_PATH, 'w') as f:
-        json.dump(data, f, indent=4)
-
-def refresh_word_list():
-    word_listbox.delete(0, tk.END)
-    for entry in data:
-        word_listbox.insert(tk.END, entry['word'])
-
-def add_word():
-    word = word_entry.get().strip().lower()
-    hint = hint_entry.get().strip()
-    difficulty = difficulty_var.get()
-
-    if not word or not hint or not difficulty:
-        messagebox.showwarning("Incomplete", "Please fill all fields.")
-        return
-
-    for entry in data:
-        if entry['word'] == word:
+                if bank_index is None:
+                    raise ConflictError(f"'{word}' was changed by someone else")
+                self.bank.delete(bank_index)
+            except ConflictError as e:
+                self.conflict(e)
+                return
+            if self.word_listbox.items is not self.data:
+                del self.word_listbox.items[index]
+            self.refresh_word_list()
+            self.clear_inputs()
+
+    def edit_word(self):
+        index, entry = self.selected_entry()
+        if entry is None:
+            messagebox.showwarning("Select", "Select a word to edit.")
+            return
+
+        word = self.word_entry.get().strip().lower()
+        hint = self.hint_entry.get().strip()
+        difficulty = self.difficulty_var.get()
+
+        if not word or not hint or not difficulty:
+            messagebox.showwarning("Incomplete", "Please fill all fields.")
+            return
+
+        existing = self.bank.find(word)
+        if existing is not None and existing is not entry:
             messagebox.showwarning("Duplicate", f"The word '{word}' already exists.")
             return
 
-    data.append({"word": word, "hint": hint, "difficulty": difficulty})
-    save_data(data)
-    refresh_word_list()
-    clear_inputs()
-    messagebox.showinfo("Success", f"Word '{word}' added!")
-
-def delete_word():
-    selected = word_listbox.curselection()
-    if not selected:
-        messagebox.showwarning("Select", "Please select a word to delete.")
-        return
-    index = selected[0]
-    word = data[index]['word']
-    if messagebox.askyesno("Confirm", f"Delete word '{word}'?"):
-        del data[index]
-        save_data(data)
-        refresh_word_list()
-        clear_inputs()
-
-def edit_word():
-    selected = word_listbox.curselection()
-    if not selected:
-        messagebox.showwarning("Select", "Select a word to edit.")
-        return
-
-    index = selected[0]
-    word = word_entry.get().strip().lower()
-    hint = hint_entry.get().strip()
-    difficulty = difficulty_var.get()
-
-    if not word or not hint or not difficulty:
-        messagebox.showwarning("Incomplete", "Please fill all fields.")
-        return
-
-    data[index] = {"word": word, "hint": hint, "difficulty": difficulty}
-    save_data(data)
-    refresh_word_list()
-    clear_inputs()
-    messagebox.showinfo("Updated", f"Word '{word}' updated successfully.")
-
-def on_select(event):
-    selected = word_listbox.curselection()
-    if not selected:
-        return
-    index = selected[0]
-    entry = data[index]
-    word_entry.delete(0, tk.END)
-    word_entry.insert(0, entry['word'])
-    hint_entry.delete(0, tk.END)
-    hint_entry.insert(0, entry['hint'])
-    difficulty_var.set(entry['difficulty'])
-
-def clear_inputs():
-    word_entry.delete(0, tk.END)
-    hint_entry.delete(0, tk.END)
-    difficulty_var.set("easy")
-    word_listbox.selection_clear(0, tk.END)
-
-# Load data initially
-data = load_data()
-
-# GUI setup
-root = tk.Tk()
-root.title("Word Bank JSON Manager")
-root.geometry("600x400")
-root.configure(bg="#1f1f1f")
-
-# Title
-tk.Label(root, text="Word Bank Manager", font=("Arial", 18, "bold"), fg="white", bg="#1f1f1f").pack(pady=10)
-
-# Entry fields
-form_frame = tk.Frame(root, bg="#1f1f1f")
-form_frame.pack(pady=10)
-
-tk.Label(form_frame, text="Word:", bg="#1f1f1f", fg="white").grid(row=0, column=0, sticky="e")
-word_entry = tk.Entry(form_frame, width=30)
-word_entry.grid(row=0, column=1, padx=5)
-
-tk.Label(form_frame, text="Hint:", bg="#1f1f1f", fg="white").grid(row=1, column=0, sticky="e")
-hint_entry = tk.Entry(form_frame, width=30)
-hint_entry.grid(row=1, column=1, padx=5)
-
-tk.Label(form_frame, text="Difficulty:", bg="#1f1f1f", fg="white").grid(row=2, column=0, sticky="e")
-difficulty_var = tk.StringVar(value="easy")
-difficulty_menu = ttk.Combobox(form_frame, textvariable=difficulty_var, values=["easy", "medium", "hard"], state="readonly")
-difficulty_menu.grid(row=2, column=1)
-
-# Buttons
-btn_frame = tk.Frame(root, bg="#1f1f1f")
-btn_frame.pack(pady=10)
-
-ttk.Button(btn_frame, text="Add", command=add_word).grid(row=0, column=0, padx=5)
-ttk.Button(btn_frame, text="Edit", command=edit_word).grid(row=0, column=1, padx=5)
-ttk.Button(btn_frame, text="Delete", command=delete_word).grid(row=0, column=2, padx=5)
-ttk.Button(btn_frame, text="Clear", command=clear_inputs).grid(row=0, column=3, padx=5)
-
-# Listbox
-list_frame = tk.Frame(root, bg="#1f1f1f")
-list_frame.pack(pady=10)
-
-word_listbox = tk.Listbox(list_frame, height=10, width=50)
-word_listbox.pack()
-word_listbox.bind("<<ListboxSelect>>", on_select)
-
-# Load list
-refresh_word_list()
-
-root.mainloop()
+        updated = {"word": word, "hint": hint, "difficulty": difficulty}
+        bank_index = self.bank.index_of(entry)
+        try:
+            if bank_index is None:
+                raise ConflictError(f"'{entry['word']}' was changed by someone else")
+            self.bank.replace(bank_index, updated)
+        except ConflictError as e:
+            self.conflict(e)
+            return
+        if self.word_listbox.items is not self.data:
+            self.word_listbox.items[index] = updated
+        self.word_listbox.refresh_row(index)
+        self.clear_inputs()
+        messagebox.showinfo("Updated", f"Word '{word}' updated successfully.")
+
+    def import_words(self):
+        path = filedialog.askopenfilename(
+            title="Import Words",
+            filetypes=[("Word lists", "*.csv *.jsonl *.ndjson"), ("All files", "*.*")]
+        )
+        if not path:
+            return
+
+        def report(result):
+            # Runs on the I/O thread; the label is updated on the UI thread
+            self.writer.post(lambda text, error: self.status_label.config(text=f"Importing... {text}"), str(result))
+
+        def done(result, error):
+            for button in self.buttons:
+                button.state(["!disabled"])
+            if error is not None:
+                self.status_label.config(text="")
+                messagebox.showerror("Import Failed", str(error))
+                return
+            self.status_label.config(text=str(result))
+            self.run_search()
+            messagebox.showinfo("Import Complete", str(result))
+
+        # The file is read and written on the I/O thread while the window stays
+        # responsive; the imported words show up through on_bank_change as each batch lands
+        for button in self.buttons:
+            button.state(["disabled"])
+        self.status_label.config(text="Importing...")
+        self.writer.submit(("import", path), self.bank.bulk_import, iter_import_rows(path), report, callback=done)
+
+    def on_select(self, event):
+        index, entry = self.selected_entry()
+        if entry is None:
+            return
+        self.word_entry.delete(0, tk.END)
+        self.word_entry.insert(0, entry['word'])
+        self.hint_entry.delete(0, tk.END)
+        self.hint_entry.insert(0, entry['hint'])
+        self.difficulty_var.set(entry['difficulty'])
+
+    def clear_inputs(self):
+        self.word_entry.delete(0, tk.END)
+        self.hint_entry.delete(0, tk.END)
+        self.difficulty_var.set("easy")
+        self.word_listbox.selection_clear()
+
+    def close(self):
+        if self.bank is not None:
+            self.bank.close()
+        self.writer.close()
+
+def main():
+    metrics.start()
+    root = tk.Tk()
+    app = WordManager(root)
+    root.mainloop()
+    app.close()
+
+if __name__ == "__main__":
+    main()